@@ -1,26 +1,19 @@
 import streamlit as st
-import pandas as pd
-import json
-import uuid
-import networkx as nx
-from pyvis.network import Network
-import tempfile
-import os
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import yara
 
+from logripper import ui
+from logripper.retag import apply_rescan, rescan
+from logripper.yara_rules import compile_cached
+from logripper.yara_tagging import DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, SCAN_FIELDS, YaraTagger, scan_text
+
 st.set_page_config(layout="wide")
 st.title("\U0001f575️ EVTX Threat Hunting UI")
 
 # --- Session State Init ---
-if "event_store" not in st.session_state:
-    st.session_state.event_store = []
-if "node_colors" not in st.session_state:
-    st.session_state.node_colors = {}
-if "excluded_uuids" not in st.session_state:
-    st.session_state.excluded_uuids = set()
-if "fields_to_show_per_event" not in st.session_state:
-    st.session_state.fields_to_show_per_event = {}
+# Sections live in logripper.ui, shared with the plain viewer; the YARA rules,
+# tagging and re-tagging are this viewer's own.
+ui.init_session(tree_fields=["yara_rule"])
 if "yara_text" not in st.session_state:
     # Load YARA rules text from file initially
     try:
@@ -31,172 +24,61 @@ if "yara_text" not in st.session_state:
 
 if "rules" not in st.session_state:
     try:
-        st.session_state.rules = yara.compile(source=st.session_state.yara_text)
+        st.session_state.rules = compile_cached(st.session_state.yara_text)
     except yara.SyntaxError as e:
         st.warning(f"Initial YARA compile error: {e}")
         st.session_state.rules = None
+    # Source of the active compiled rules, and of the rules the stored tags reflect
+    st.session_state.rules_source = st.session_state.yara_text if st.session_state.rules is not None else None
+    st.session_state.tagged_source = st.session_state.rules_source
 
-# --- Tag Colors ---
-TAG_COLORS = {
-    "Initial Access": "#e74c3c",
-    "Execution": "#f39c12",
-    "Persistence": "#8e44ad",
-    "C2": "#3498db",
-    "Exfiltration": "#2ecc71",
-    "Cleanup": "#95a5a6",
-    "Enumeration": "#2980b9",
-    "Discovery": "#f1c40f",
-    "Collection": "#16a085",
-    "": "#bdc3c7"  # Uncategorized
-}
-
-# ====== MITRE ATT&CK HARD-CODED DICTIONARY ======
-MITRE_TECHNIQUES = {
-    "": {"name": "", "url": ""},
-    "T1059 Command and Scripting Interpreter": {
-        "name": "Command and Scripting Interpreter",
-        "url": "https://attack.mitre.org/techniques/T1059/",
-    },
-    "T1086 PowerShell": {
-        "name": "PowerShell",
-        "url": "https://attack.mitre.org/techniques/T1086/",
-    },
-    "T1569 System Services": {
-        "name": "System Services",
-        "url": "https://attack.mitre.org/techniques/T1569/",
-    },
-    "T1027 Obfuscated Files or Information": {
-        "name": "Obfuscated Files or Information",
-        "url": "https://attack.mitre.org/techniques/T1027/",
-    },
-    "T1204 User Execution": {
-        "name": "User Execution",
-        "url": "https://attack.mitre.org/techniques/T1204/",
-    },
-    "T1105 Ingress Tool Transfer": {
-        "name": "Ingress Tool Transfer",
-        "url": "https://attack.mitre.org/techniques/T1105/",
-    },
-    "T1003 OS Credential Dumping": {
-        "name": "OS Credential Dumping",
-        "url": "https://attack.mitre.org/techniques/T1003/",
-    },
-    "T1218 Signed Binary Proxy Execution": {
-        "name": "Signed Binary Proxy Execution",
-        "url": "https://attack.mitre.org/techniques/T1218/",
-    },
-    "T1047 Windows Management Instrumentation": {
-        "name": "Windows Management Instrumentation",
-        "url": "https://attack.mitre.org/techniques/T1047/",
-    },
-    "TA0010 Exfiltration": {
-        "name": "Exfiltration",
-        "url": "https://attack.mitre.org/tactics/TA0010/",
-    },
-    "T1033 System Owner/User Discovery": {
-        "name": "System Owner/User Discovery",
-        "url": "https://attack.mitre.org/techniques/T1033/",
-    },
-    "T1082 System Information Discovery": {
-        "name": "System Information Discovery",
-        "url": "https://attack.mitre.org/techniques/T1082/",
-    },
-    "T1057 Process Discovery": {
-        "name": "Process Discovery",
-        "url": "https://attack.mitre.org/techniques/T1057/",
-    },
-    "T1074 Data Staged": {
-        "name": "Data Staged",
-        "url": "https://attack.mitre.org/techniques/T1074/",
-    },
-    "T1074.001 Data Staged: Local Data Staging": {
-        "name": "Data Staged: Local Data Staging",
-        "url": "https://attack.mitre.org/techniques/T1074/001/",
-    },
-    "T1115 Clipboard Data": {
-        "name": "Clipboard Data",
-        "url": "https://attack.mitre.org/techniques/T1115/",
-    },
-    "T1059.001 Command and Scripting Interpreter: PowerShell": {
-        "name": "Command and Scripting Interpreter: PowerShell",
-        "url": "https://attack.mitre.org/techniques/T1059/001/",
-    },
-}
-
-# --- YARA scan function ---
-def apply_yara_to_event(event):
-    if st.session_state.rules is None:
-        return None
-    text_to_scan = " ".join(str(event.get(f, "")) for f in ["CommandLine", "Image", "ParentCommandLine"])
-    matches = st.session_state.rules.match(data=text_to_scan)
-    if matches:
-        meta = matches[0].meta
-        return {
-            "tag": meta.get("tag", ""),
-            "mitre": meta.get("mitre_id", ""),
-            "yara_rule": matches[0].rule
-        }
-    return None
-
-# --- Parse JSON Function with YARA tagging ---
-def parse_json(file):
-    data = json.load(file)
-    if isinstance(data, dict):
-        data = [data]
+if "retag_job" not in st.session_state:
+    st.session_state.retag_job = None
+    st.session_state.retag_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retag")
 
-    parsed_events = []
-    for evt in data:
-        flat = {k: v for k, v in evt.items() if k != "DataValues"}
-        for item in evt.get("DataValues", []):
-            flat[item["Name"]] = item["Value"]
-        flat["uuid"] = str(uuid.uuid4())
-        flat["tag"] = ""
-        flat["notes"] = ""
-        flat["mitre"] = ""
-        flat["yara_rule"] = ""
-
-        # Apply yara tags if matched
-        yara_result = apply_yara_to_event(flat)
-        if yara_result:
-            flat["tag"] = yara_result["tag"]
-            flat["mitre"] = yara_result["mitre"]
-            flat["yara_rule"] = yara_result["yara_rule"]
-
-        parsed_events.append(flat)
-    return parsed_events
+# --- Case File ---
+store, opened = ui.case_sidebar()
+if opened and store.db is not None and len(store):
+    st.session_state.tagged_source = store.db.get_meta("tagged_source", st.session_state.tagged_source)
 
 # --- Sidebar UI: YARA rules editor/upload/save ---
 st.sidebar.header("🎯 YARA Rules")
 
-# Upload new YARA rule file
+# Compiles go through a source-hash cache (memory + disk). A failed compile keeps
+# the last good rule set active until the source is fixed.
+def apply_yara_source(source, success_message):
+    st.session_state.yara_text = source
+    try:
+        st.session_state.rules = compile_cached(source)
+        st.session_state.rules_source = source
+        st.sidebar.success(success_message)
+    except yara.Error as e:
+        kept = " (keeping the last good rules active)" if st.session_state.rules is not None else ""
+        st.sidebar.error(f"YARA compile error: {e}{kept}")
+
+# Upload new YARA rule file (compiled once per uploaded file)
 uploaded_yara = st.sidebar.file_uploader("Upload YARA rule file (.yar/.yara)", type=["yar", "yara"], key="yara_upload")
-if uploaded_yara is not None:
+if uploaded_yara is not None and uploaded_yara.file_id != st.session_state.get("yara_upload_id"):
+    st.session_state.yara_upload_id = uploaded_yara.file_id
     try:
         content = uploaded_yara.getvalue().decode("utf-8")
-        st.session_state.yara_text = content
-        # Try to compile uploaded rules
-        st.session_state.rules = yara.compile(source=st.session_state.yara_text)
-        st.sidebar.success("YARA rules uploaded and compiled successfully!")
-    except Exception as e:
+        st.session_state.yara_textarea = content
+        apply_yara_source(content, "YARA rules uploaded and compiled successfully!")
+    except UnicodeDecodeError as e:
         st.sidebar.error(f"Error loading YARA file: {e}")
 
-# Editable textarea for YARA rules
-edited_yara = st.sidebar.text_area(
-    "Edit YARA Rules",
-    value=st.session_state.yara_text,
-    height=300,
-    key="yara_textarea",
-)
+# Editable textarea for YARA rules; edits are only compiled on Apply
+with st.sidebar.form("yara_editor"):
+    edited_yara = st.text_area(
+        "Edit YARA Rules",
+        value=st.session_state.yara_text,
+        height=300,
+        key="yara_textarea",
+    )
+    apply_clicked = st.form_submit_button("✅ Apply Rules")
 
-# Update session_state with edited rules and try to compile on change
-if edited_yara != st.session_state.yara_text:
-    st.session_state.yara_text = edited_yara
-    try:
-        st.session_state.rules = yara.compile(source=st.session_state.yara_text)
-        st.sidebar.success("YARA rules compiled successfully!")
-    except yara.SyntaxError as e:
-        st.sidebar.error(f"YARA compile error: {e}")
-        st.session_state.rules = None
+if apply_clicked and edited_yara != st.session_state.rules_source:
+    apply_yara_source(edited_yara, "YARA rules compiled successfully!")
 
 # Save edited rules back to file
 if st.sidebar.button("💾 Save Edited YARA to File"):
@@ -207,289 +89,85 @@ if st.sidebar.button("💾 Save Edited YARA to File"):
     except Exception as e:
         st.sidebar.error(f"Failed to save file: {e}")
 
-# --- File Upload for EVTX JSON logs ---
-st.sidebar.header("\U0001f4c2 Upload Logs")
-uploaded_files = st.sidebar.file_uploader(
-    "Upload one or more EVTX-converted JSON files",
-    type=["json"],
-    accept_multiple_files=True,
-)
-
-# --- Load Uploaded Events ---
-if uploaded_files:
-    for f in uploaded_files:
-        new_events = parse_json(f)
-        existing_keys = {(e.get("ProcessGuid"), e.get("UtcTime")) for e in st.session_state.event_store}
-        for evt in new_events:
-            key = (evt.get("ProcessGuid"), evt.get("UtcTime"))
-            if key not in existing_keys:
-                st.session_state.event_store.append(evt)
-                st.session_state.node_colors[evt["uuid"]] = TAG_COLORS.get(evt["tag"], TAG_COLORS[""])
-
-# --- Filter out hidden events ---
-visible_events = [e for e in st.session_state.event_store if e["uuid"] not in st.session_state.excluded_uuids]
-df = pd.DataFrame(visible_events)
-
-if not df.empty:
-    with st.expander("\U0001f50d Event Table (click to expand)", expanded=True):
-        visible_columns = sorted(set().union(*[e.keys() for e in visible_events]))
-        df_full = df.reindex(columns=visible_columns)
-        df_full["UtcTime"] = pd.to_datetime(df_full["UtcTime"], errors="coerce")
-        df_full = df_full.sort_values("UtcTime")
-        st.dataframe(df_full, use_container_width=True)
-
-    # --- Annotate Events ---
-    st.sidebar.header("✏️ Annotate Events")
-    selected_uuid = st.sidebar.selectbox("Select Event by UUID", df["uuid"])
-    selected_event = df[df["uuid"] == selected_uuid].iloc[0]
-
-    st.sidebar.write(f"**Image:** {selected_event.get('Image', 'N/A')}")
-    new_tag = st.sidebar.selectbox(
-        "Tag",
-        [
-            "",
-            "Initial Access",
-            "Execution",
-            "Persistence",
-            "C2",
-            "Exfiltration",
-            "Cleanup",
-            "Enumeration",
-            "Discovery",
-            "Collection"
-        ],
-        index=([
-            "",
-            "Initial Access",
-            "Execution",
-            "Persistence",
-            "C2",
-            "Exfiltration",
-            "Cleanup",
-            "Enumeration",
-            "Discovery",
-            "Collection"
-        ].index(selected_event.get("tag", "")) if selected_event.get("tag", "") in [
-            "",
-            "Initial Access",
-            "Execution",
-            "Persistence",
-            "C2",
-            "Exfiltration",
-            "Cleanup",
-            "Enumeration",
-            "Discovery",
-            "Collection"
-        ] else 0)
-    )
-    new_note = st.sidebar.text_area("Notes", value=selected_event.get("notes", ""))
-
-    # ======= MITRE Technique Selection Dropdown =======
-    mitre_ids = sorted(MITRE_TECHNIQUES.keys())
-    selected_mitre = st.sidebar.selectbox(
-        "MITRE Technique ID",
-        mitre_ids,
-        index=mitre_ids.index(selected_event.get("mitre", "") if selected_event.get("mitre", "") in mitre_ids else ""),
+# Scanned fields and worker pool sizing for the tagging stage
+with st.sidebar.expander("⚙️ YARA Tagging Options"):
+    yara_fields = st.multiselect(
+        "Fields to scan",
+        options=sorted(set(SCAN_FIELDS).union(st.session_state.event_store.schema)),
+        default=list(SCAN_FIELDS),
+        key="yara_fields",
     )
-    if selected_mitre:
-        mitre_info = MITRE_TECHNIQUES.get(selected_mitre, {"name": "", "url": ""})
-        if mitre_info["name"]:
-            st.sidebar.markdown(f"[{mitre_info['name']}]({mitre_info['url']})", unsafe_allow_html=True)
-    # ===================================================
-
-    for i, evt in enumerate(st.session_state.event_store):
-        if evt["uuid"] == selected_uuid:
-            st.session_state.event_store[i]["tag"] = new_tag
-            st.session_state.event_store[i]["notes"] = new_note
-            st.session_state.event_store[i]["mitre"] = selected_mitre
-            st.session_state.node_colors[selected_uuid] = TAG_COLORS.get(new_tag, TAG_COLORS[""])
-            break
-
-    is_excluded = selected_uuid in st.session_state.excluded_uuids
-    if st.sidebar.button("🚫 Hide this log from view" if not is_excluded else "♻️ Unhide this log"):
-        if is_excluded:
-            st.session_state.excluded_uuids.remove(selected_uuid)
-        else:
-            st.session_state.excluded_uuids.add(selected_uuid)
-
-    if st.sidebar.checkbox("Show hidden logs"):
-        hidden_events = [e for e in st.session_state.event_store if e["uuid"] in st.session_state.excluded_uuids]
-        st.sidebar.write(f"Total hidden: {len(hidden_events)}")
-        for e in hidden_events:
-            st.sidebar.markdown(f"- `{e['uuid']}` | **{e.get('Image', 'N/A')}**")
-            if st.sidebar.button(f"Unhide {e['uuid']}", key=e["uuid"]):
-                st.session_state.excluded_uuids.remove(e["uuid"])
-
-    # --- Graph Visualization ---
-    st.subheader("\U0001f310 Process Relationship Graph")
-    G = nx.DiGraph()
-
-    for evt in visible_events:
-        node_color = st.session_state.node_colors.get(evt["uuid"], TAG_COLORS[""])
-        label = evt.get("Image", "Unknown")
-        mitre_id = evt.get("mitre", "")
-        mitre_info = MITRE_TECHNIQUES.get(mitre_id, {})
-        node_label = f"{label}\n{evt['tag'] or 'Uncategorized'}"
-        if mitre_id:
-            node_label += f"\n{mitre_id}: {mitre_info.get('name', '')}"
-        G.add_node(evt["uuid"], label=node_label, color=node_color)
-
-    for evt in visible_events:
-        parent_guid = evt.get("ParentProcessGuid")
-        child_guid = evt.get("ProcessGuid")
-        if parent_guid and child_guid:
-            parent = next((e for e in visible_events if e.get("ProcessGuid") == parent_guid), None)
-            if parent:
-                G.add_edge(parent["uuid"], evt["uuid"])
-
-    net = Network(height="600px", width="100%", directed=True)
-    net.from_nx(G)
+    yara_batch_scan = st.checkbox("Scan each batch as one buffer", value=True, key="yara_batch_scan")
+    yara_workers = st.number_input("Worker threads", min_value=1, value=DEFAULT_WORKERS, key="yara_workers")
+    yara_batch_size = st.number_input("Events per worker batch", min_value=1, value=DEFAULT_BATCH_SIZE, key="yara_batch_size")
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp_file:
-        net.save_graph(tmp_file.name)
-        st.components.v1.html(open(tmp_file.name, "r", encoding="utf-8").read(), height=600)
-        os.unlink(tmp_file.name)
+ui.keyword_sidebar()
 
-    # --- Execution Flow Timeline (Tree View) ---
-    st.subheader("\U0001f9ec Execution Flow Timeline (Tree View)")
-
-    show_untagged = st.sidebar.checkbox("Show untagged events", value=True)
-
-    guid_to_event = {e.get("ProcessGuid"): e for e in visible_events}
-    child_map = defaultdict(list)
-    for e in visible_events:
-        parent_guid = e.get("ParentProcessGuid")
-        if parent_guid:
-            child_map[parent_guid].append(e)
-
-    # --- All keys & default fields for selection ---
-    all_keys = sorted(set().union(*[e.keys() for e in visible_events])) if visible_events else []
-    default_fields = ["EventID", "Computer", "User", "IntegrityLevel", "Image", "CommandLine", "ProcessId", "ParentProcessId", "ParentImage", "ParentCommandLine", "QueryName", "QueryResults", "yara_rule"]
-
-    # --- Per-event fields multiselect ---
-    st.sidebar.header("Select Fields Per Event")
-    for evt in visible_events:
-        event_id = evt["uuid"]
-        if event_id not in st.session_state.fields_to_show_per_event:
-            st.session_state.fields_to_show_per_event[event_id] = [f for f in default_fields if f in all_keys]
-
-        selected_fields = st.sidebar.multiselect(
-            f"Fields for event {event_id} ({evt.get('Image', 'Unknown')})",
-            options=all_keys,
-            default=st.session_state.fields_to_show_per_event[event_id],
-            key=f"fields_{event_id}",
-        )
-        st.session_state.fields_to_show_per_event[event_id] = selected_fields
-
-    def get_tag_emoji(tag):
-        return {
-            "Initial Access": "\U0001f6aa",
-            "Execution": "💥",
-            "Persistence": "\U0001f6e1️",
-            "C2": "\U0001f4e1",
-            "Exfiltration": "\U0001f4e4",
-            "Enumeration": "🔍",
-            "Discovery": "💡",
-            "Cleanup": "\U0001f9f9",
-            "Collection": "🗃️",
-            "": "\U0001f9e9",
-        }.get(tag, "\U0001f9e9")
-
-    def get_tag_color(tag):
-        return TAG_COLORS.get(tag, "#bdc3c7")
-
-    def format_tree_line(depth, is_last, sibling_stack):
-        prefix = ""
-        for i in range(depth - 1):
-            prefix += "│   " if sibling_stack[i] else "    "
-        prefix += "└── " if is_last else "├── "
-        return prefix
-
-    def display_tree(node, child_map, depth=0, sibling_stack=[]):
-        if node is None:
-            return
-
-        tag = node.get("tag", "")
-        if not show_untagged and tag == "":
-            return
-
-        children = sorted(child_map.get(node.get("ProcessGuid"), []), key=lambda e: e.get("UtcTime", ""))
-        is_last = True if not sibling_stack else not sibling_stack[-1]
-
-        prefix = format_tree_line(depth, is_last, sibling_stack)
-        emoji = get_tag_emoji(tag)
-        color = get_tag_color(tag)
-        img = node.get("Image", "Unknown")
-        time = node.get("UtcTime", "")
-        uuid_val = node.get("uuid", "")
-
-        st.markdown(f"{prefix}{emoji}")
-        indent = "&nbsp;&nbsp;&nbsp;" * (depth + 1)
-        st.markdown(
-            f"{indent}<code>{img}</code> <span style='color:#888; font-family: monospace;'>[{uuid_val}]</span>",
-            unsafe_allow_html=True,
-        )
-
-        if tag:
-            st.markdown(
-                f"{indent}<span style='color:{color}; font-style: italic; font-weight: 600;'>`{tag}`  \U0001f552 *{time}*</span>",
-                unsafe_allow_html=True,
-            )
-        else:
-            st.markdown(
-                f"{indent}<span style='color:gray; font-style: italic;'>\U0001f9e9 [Uncategorized] \U0001f552 *{time}*</span>",
-                unsafe_allow_html=True,
-            )
-
-        # ======= MITRE Display in Tree View =======
-        mitre_id = node.get("mitre", "")
-        if mitre_id in MITRE_TECHNIQUES and mitre_id != "":
-            mitre_info = MITRE_TECHNIQUES[mitre_id]
-            st.markdown(
-                f"{indent}🧩 <a href='{mitre_info['url']}' target='_blank'><code>{mitre_id}</code> - {mitre_info['name']}</a>",
-                unsafe_allow_html=True,
-            )
-        # ==========================================
-
-        # Get the selected fields for this event from session state (no widgets here!)
-        selected_fields = st.session_state.fields_to_show_per_event.get(uuid_val, [])
-
-        # Show selected fields with expanders (except CommandLine, which gets special code formatting)
-        for field in selected_fields:
-            if field == "CommandLine":
-                cmdline = node.get("CommandLine", "").strip()
-                if cmdline:
-                    with st.expander("Show CommandLine", expanded=False):
-                        st.code(cmdline, language="bash")
-            else:
-                val = node.get(field, "")
-                if val:
-                    with st.expander(f"Show {field}", expanded=False):
-                        st.write(val)
-
-        for idx, child in enumerate(children):
-            has_siblings_below = idx < len(children) - 1
-            display_tree(child, child_map, depth + 1, sibling_stack + [has_siblings_below])
-
-    roots = [e for e in visible_events if e.get("ParentProcessGuid") not in guid_to_event]
-    roots_sorted = sorted(roots, key=lambda e: e.get("UtcTime", ""))
-
-    for root in roots_sorted:
-        display_tree(root, child_map)
-
-    # --- Export Annotated Logs ---
-    st.sidebar.markdown("---")
-    if st.sidebar.button("\U0001f4e4 Export Annotated Logs"):
-        out_df = pd.DataFrame(st.session_state.event_store)
-        st.sidebar.download_button(
-            "Download JSON",
-            data=out_df.to_json(orient="records", indent=2),
-            file_name="annotated_logs.json",
-        )
-        st.sidebar.download_button(
-            "Download CSV",
-            data=out_df.to_csv(index=False),
-            file_name="annotated_logs.csv",
+# --- File Upload for EVTX JSON logs ---
+# Each file is parsed and tagged once per session; rule changes are applied to
+# stored events by re-tagging below.
+uploaded_files = ui.upload_sidebar()
+make_tagger = lambda: YaraTagger(
+    st.session_state.rules,
+    workers=yara_workers,
+    batch_size=yara_batch_size,
+    fields=yara_fields,
+    batch_scan=yara_batch_scan,
+    source=st.session_state.rules_source,
+)
+for tagger in ui.ingest_uploads(uploaded_files, make_tagger):
+    if tagger.events:
+        st.session_state.yara_stats = (tagger.events, tagger.seconds, tagger.rate)
+
+if "yara_stats" in st.session_state:
+    tagged, seconds, rate = st.session_state.yara_stats
+    st.sidebar.caption(f"YARA tagging: {tagged:,} events in {seconds:.2f}s ({rate:,.0f} events/s)")
+
+# --- Keyword Re-scoring ---
+ui.rescore_stale(store)
+
+# --- Retroactive Re-tagging ---
+# Stored tags reflect `tagged_source`. When the active rules differ, only the rule
+# delta is re-scanned on a background thread and applied on a later rerun.
+retag_job = st.session_state.retag_job
+if retag_job is not None and retag_job["future"].done():
+    try:
+        changed = apply_rescan(store, retag_job["future"].result())
+        st.sidebar.success(f"Re-tagged {len(changed)} stored events with the updated rules")
+    except Exception as e:
+        st.sidebar.error(f"Re-tagging failed: {e}")
+    st.session_state.tagged_source = retag_job["source"]
+    if store.db is not None:
+        store.db.set_meta("tagged_source", st.session_state.tagged_source)
+    st.session_state.retag_job = retag_job = None
+
+if (
+    retag_job is None
+    and st.session_state.rules is not None
+    and st.session_state.rules_source != st.session_state.tagged_source
+):
+    if len(store):
+        snapshot = [
+            (e["uuid"], scan_text(e, yara_fields), e.get("yara_rule", ""))
+            for e in store.records(["uuid", "yara_rule", *yara_fields], visible_only=False)
+        ]
+        future = st.session_state.retag_executor.submit(
+            rescan, snapshot, st.session_state.tagged_source, st.session_state.rules_source, st.session_state.rules
         )
-else:
-    st.info("Upload EVTX JSON files to start hunting.")
+        st.session_state.retag_job = {"future": future, "source": st.session_state.rules_source}
+    else:
+        st.session_state.tagged_source = st.session_state.rules_source
+        if store.db is not None:
+            store.db.set_meta("tagged_source", st.session_state.tagged_source)
+
+if st.session_state.retag_job is not None:
+    @st.fragment(run_every=1.0)
+    def watch_retag():
+        if st.session_state.retag_job["future"].done():
+            st.rerun()
+        st.caption("🔄 Re-tagging stored events against the updated rules…")
+
+    with st.sidebar:
+        watch_retag()
+
+ui.case_views(store, manual_tag_source=True)
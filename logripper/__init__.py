@@ -0,0 +1 @@
+"""Core ingest and analysis code shared by TheLogRipper's Python viewers."""
@@ -0,0 +1,162 @@
+"""Analyst annotations keyed by event id, with an append-only JSONL journal.
+
+The viewers used to write tag, notes and MITRE id straight into the event
+records. The :class:`AnnotationStore` keeps them apart, in a dict keyed by
+event id, and appends every real change to a journal file as one JSON line,
+flushed and synced before the edit is acknowledged, so a crash loses at most
+the line being written (a torn last line is skipped on replay).
+
+Every field value carries the wall-clock time and analyst of its edit, and
+the latest one wins. That makes merging another analyst's journal (or a
+compacted :meth:`~AnnotationStore.dumps`) order-independent and idempotent:
+annotations travel as a few lines per edited event, not as a re-export of
+the whole case. The event store's ``tag``/``notes``/``mitre`` columns mirror
+the annotations (see :meth:`~AnnotationStore.apply_to`) so the table, graph
+and exports keep filtering on them vectorized.
+"""
+import json
+import os
+import threading
+import time
+
+ANNOTATION_FIELDS = ("tag", "notes", "mitre", "tag_source")
+DEFAULT_ANALYST = os.environ.get("LOGRIPPER_ANALYST") or os.environ.get("USER") or os.environ.get("USERNAME", "")
+JOURNAL_SUFFIX = ".annotations.jsonl"
+
+
+def journal_path(case_path):
+    """Journal kept next to a case file: ``case.db`` -> ``case.annotations.jsonl``."""
+    return os.path.splitext(case_path)[0] + JOURNAL_SUFFIX
+
+
+def _entry(line):
+    """A journal line as ``(event id, fields, at, analyst)``, or ``None`` if it is torn or foreign."""
+    try:
+        entry = json.loads(line)
+        fields = {f: v for f, v in entry["fields"].items() if f in ANNOTATION_FIELDS}
+        return int(entry["uuid"]), fields, int(entry["at"]), str(entry.get("analyst", ""))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+class AnnotationStore:
+    def __init__(self, path=None, analyst=""):
+        self.path = path
+        self.analyst = analyst
+        self.skipped = 0  # unreadable journal lines
+        self._values = {}  # event id -> {field: value}
+        self._stamps = {}  # event id -> {field: (at, analyst)}
+        self._lock = threading.Lock()
+        self._torn = False  # the journal ends mid-line; the next write starts a fresh one
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._torn = not line.endswith("\n")
+                    if line.strip():
+                        entry = _entry(line)
+                        if entry is None:
+                            self.skipped += 1
+                        else:
+                            self._apply(*entry)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, event_id):
+        return event_id in self._values
+
+    def get(self, event_id):
+        """Annotated fields of one event (only those ever set)."""
+        return dict(self._values.get(event_id, {}))
+
+    # --- Writes ---
+    def _apply(self, event_id, fields, at, analyst):
+        """Take the fields of an edit newer than what is held; returns ``(taken, changed)`` fields."""
+        values = self._values.setdefault(event_id, {})
+        stamps = self._stamps.setdefault(event_id, {})
+        taken, changed = {}, {}
+        for field, value in fields.items():
+            if stamps.get(field, (-1, "")) < (at, analyst):
+                stamps[field] = (at, analyst)
+                taken[field] = value
+                if field not in values or values[field] != value:
+                    values[field] = changed[field] = value
+        return taken, changed
+
+    def _journal(self, lines):
+        if not self.path or not lines:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            if self._torn:
+                f.write("\n")
+                self._torn = False
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _line(event_id, fields, at, analyst):
+        return json.dumps({"uuid": event_id, "fields": fields, "at": at, "analyst": analyst}) + "\n"
+
+    def set(self, event_id, **fields):
+        """Record an analyst edit; only fields whose value changes are kept and journaled."""
+        current = self._values.get(event_id, {})
+        fields = {f: v for f, v in fields.items() if f in ANNOTATION_FIELDS and (f not in current or current[f] != v)}
+        if not fields:
+            return {}
+        with self._lock:
+            at = time.time_ns()
+            _, changed = self._apply(event_id, fields, at, self.analyst)
+            self._journal([self._line(event_id, changed, at, self.analyst)] if changed else [])
+        return changed
+
+    def merge(self, lines):
+        """Merge journal lines (another analyst's journal or a :meth:`dumps`); returns ``{event id: changed fields}``.
+
+        Edits newer than what is held are appended to this store's journal too.
+        """
+        merged = {}
+        journal = []
+        with self._lock:
+            for line in lines:
+                if isinstance(line, bytes):
+                    line = line.decode("utf-8", errors="replace")
+                if not line.strip():
+                    continue
+                entry = _entry(line)
+                if entry is None:
+                    self.skipped += 1
+                    continue
+                taken, changed = self._apply(*entry)
+                if taken:
+                    journal.append(self._line(entry[0], taken, entry[2], entry[3]))
+                if changed:
+                    merged.setdefault(entry[0], {}).update(changed)
+            self._journal(journal)
+        return merged
+
+    # --- Reads ---
+    def dumps(self):
+        """The current annotations as compact journal lines (one per field edit still in effect)."""
+        lines = []
+        for event_id, values in self._values.items():
+            stamps = self._stamps[event_id]
+            for field, value in values.items():
+                lines.append(self._line(event_id, {field: value}, *stamps[field]))
+        return "".join(lines).encode("utf-8")
+
+    def apply_to(self, store, event_ids=None):
+        """Bring the store's annotation columns in line for ``event_ids`` (default: all annotated); returns changed ids."""
+        event_ids = [e for e in (self._values if event_ids is None else event_ids) if e in store and e in self._values]
+        changed = set()
+        for field in ANNOTATION_FIELDS:
+            ids = [e for e in event_ids if field in self._values[e]]
+            if not ids:
+                continue
+            wanted = [self._values[e][field] for e in ids]
+            current = store.values(field, ids)
+            stale = [(e, v) for e, v, c in zip(ids, wanted, current) if (c or "") != v]
+            if stale:
+                store.update_many([e for e, _ in stale], **{field: [v for _, v in stale]})
+                changed.update(e for e, _ in stale)
+        return sorted(changed)
@@ -0,0 +1,195 @@
+"""Persistent on-disk case database (SQLite).
+
+A case keeps everything the viewers would otherwise hold only in
+``st.session_state``:
+
+* ``chunks`` – ingested events as Parquet blobs, one per appended batch, so a
+  case reopens with a few columnar reads instead of a re-ingest;
+* ``events`` – one row per event: the chunk holding it, so single events and
+  table pages are read without loading the rest, and its hidden flag;
+* ``edits`` – fields changed after ingest (annotations, re-tagging), written
+  through as they happen and replayed over the chunks on open;
+* ``meta`` – case-level state such as which uploads were already ingested.
+"""
+import io
+import json
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_CASE_PATH = os.environ.get("LOGRIPPER_CASE", "case.db")
+_MAX_PARAMS = 900  # below SQLite's bound-parameter limit on older builds
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS events (
+    uuid INTEGER PRIMARY KEY,
+    chunk INTEGER NOT NULL,
+    hidden INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS edits (
+    uuid INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (uuid, field)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _sql_value(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+def _arrow_column(values):
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # A field can mix ints and strings across events; Arrow needs one type.
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def _chunk_bytes(events):
+    fields = dict.fromkeys(field for evt in events for field in evt)
+    table = pa.table({field: _arrow_column([evt.get(field) for evt in events]) for field in fields})
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer)
+    return buffer.getvalue()
+
+
+def _chunk_frame(data, columns=None, exclude=()):
+    chunk = pq.ParquetFile(io.BytesIO(data))
+    names = [c for c in chunk.schema_arrow.names if (columns is None or c in columns) and c not in exclude]
+    # Nullable ints keep e.g. ProcessId integral in chunks where some events lack it.
+    return chunk.read(columns=names).to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
+
+def _batches(values, size=_MAX_PARAMS):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class CaseDB:
+    def __init__(self, path):
+        self.path = str(path)
+        # Streamlit reruns a session's script on different threads; writes are locked.
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    # --- Writes ---
+    def add_events(self, events):
+        """Persist a batch of flattened events as one chunk plus a row each in ``events``."""
+        if not events:
+            return
+        with self._lock, self._conn:
+            chunk = self._conn.execute("INSERT INTO chunks (data) VALUES (?)", (_chunk_bytes(events),)).lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO events (uuid, chunk) VALUES (?, ?)", [(evt["uuid"], chunk) for evt in events]
+            )
+
+    def update(self, event_id, fields):
+        """Record post-ingest field changes for one event."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO edits (uuid, field, value) VALUES (?, ?, ?)",
+                [(event_id, field, json.dumps(_sql_value(value))) for field, value in fields.items()],
+            )
+
+    def update_many(self, event_ids, fields):
+        """Record post-ingest changes for many events; ``fields`` maps each field to values aligned with ``event_ids``."""
+        with self._lock, self._conn:
+            for field, values in fields.items():
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO edits (uuid, field, value) VALUES (?, ?, ?)",
+                    [(event_id, field, json.dumps(_sql_value(value))) for event_id, value in zip(event_ids, values)],
+                )
+
+    def set_hidden(self, event_id, hidden):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE events SET hidden = ? WHERE uuid = ?", (int(hidden), event_id))
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    # --- Reads ---
+    def get_meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def load_frame(self, exclude=()):
+        """All stored events as one frame, in ingest order, without edits applied or ``exclude`` fields."""
+        chunks = self._conn.execute("SELECT data FROM chunks ORDER BY id")
+        parts = [_chunk_frame(data, exclude=exclude) for (data,) in chunks]
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, ignore_index=True, sort=False)
+
+    def fields(self):
+        """Every stored field, in first-seen order; only the chunks' Parquet footers are read."""
+        fields = {}
+        for (data,) in self._conn.execute("SELECT data FROM chunks ORDER BY id"):
+            fields.update(dict.fromkeys(pq.read_schema(io.BytesIO(data)).names))
+        return list(fields)
+
+    def fetch(self, event_ids, columns=None):
+        """Events ``event_ids`` as a frame in that order, with edits applied.
+
+        The ``events`` index locates each event's chunk, and only those chunks
+        are read, projected to ``columns`` (default: every field).
+        """
+        keys = [int(event_id) for event_id in event_ids]
+        chunk_keys = {}
+        for batch in _batches(keys):
+            marks = ", ".join("?" * len(batch))
+            for key, chunk in self._conn.execute(f"SELECT uuid, chunk FROM events WHERE uuid IN ({marks})", batch):
+                chunk_keys.setdefault(chunk, set()).add(key)
+        wanted = None if columns is None else {"uuid", *columns}
+        parts = []
+        for chunk, chunk_ids in chunk_keys.items():
+            (data,) = self._conn.execute("SELECT data FROM chunks WHERE id = ?", (chunk,)).fetchone()
+            part = _chunk_frame(data, wanted)
+            parts.append(part[part["uuid"].isin(chunk_ids)])
+        frame = pd.concat(parts, ignore_index=True, sort=False) if parts else pd.DataFrame(columns=["uuid"])
+        frame.index = frame["uuid"].astype("int64")
+        frame = frame.reindex(keys)
+        frame["uuid"] = keys
+
+        for batch in _batches(keys):
+            marks = ", ".join("?" * len(batch))
+            sql = f"SELECT uuid, field, value FROM edits WHERE uuid IN ({marks})"
+            for key, field, value in self._conn.execute(sql, batch):
+                if columns is not None and field not in columns:
+                    continue
+                if field not in frame.columns or frame[field].dtype != object:
+                    frame[field] = frame[field].astype(object) if field in frame.columns else None
+                frame.loc[key, field] = json.loads(value)
+        return frame.reset_index(drop=True)
+
+    def edits(self):
+        """``{field: {event_id: value}}`` for every field changed after ingest."""
+        edits = {}
+        for event_id, field, value in self._conn.execute("SELECT uuid, field, value FROM edits"):
+            edits.setdefault(field, {})[event_id] = json.loads(value)
+        return edits
+
+    def hidden_ids(self):
+        return {row[0] for row in self._conn.execute("SELECT uuid FROM events WHERE hidden = 1")}
@@ -0,0 +1,195 @@
+"""Headless command line entry point: ``python -m logripper ingest ...``."""
+import argparse
+import glob
+import os
+import sys
+import time
+
+from .casedb import CaseDB
+from .correlate import chains_frame, correlate
+from .export import FORMATS, PROJECTIONS, compression_for, compressions, export_store, format_for, write_events
+from .keywords import DEFAULT_KEYWORDS, KeywordScorer, load_keywords, rescore
+from .pipeline import StageStats, ingest_paths
+from .store import EventStore
+from .yara_tagging import DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, SCAN_FIELDS, scan_text
+
+CASE_SUFFIXES = (".db", ".sqlite")
+
+
+def _expand(patterns):
+    # Windows shells don't expand globs, so do it here for every platform.
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(matches)
+    return paths
+
+
+def _record_case_state(store, existing, keywords, rules, rules_source, scan_fields):
+    """Bring the ``existing`` events of an extended case in line, then record in its meta
+    the keyword weights and rule source the stored scores and tags reflect, as the viewers do.
+    """
+    db = store.db
+    if keywords is not None:
+        if existing and db.get_meta("scored_weights") != keywords:
+            rescore(store, KeywordScorer(keywords))
+        db.set_meta("keyword_weights", keywords)
+        db.set_meta("scored_weights", keywords)
+    else:
+        # Unscored events: a viewer scores the case with its weights when it opens it.
+        db.set_meta("scored_weights", None)
+
+    tagged_source = db.get_meta("tagged_source") if existing else None
+    if rules is not None and existing and tagged_source != rules_source:
+        from .retag import apply_rescan, rescan
+
+        records = store.records(["uuid", "yara_rule", *scan_fields], visible_only=False)[:existing]
+        snapshot = [(e["uuid"], scan_text(e, scan_fields), e.get("yara_rule", "")) for e in records]
+        apply_rescan(store, rescan(snapshot, tagged_source, rules_source, rules))
+    # Untagged events read as tagged with no rules, so a viewer adds its rules' tags.
+    db.set_meta("tagged_source", rules_source if rules is not None else "")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="logripper", description="TheLogRipper headless pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="parse, tag and export .evtx files or EVTX-converted JSON/NDJSON files")
+    ingest.add_argument("inputs", nargs="+", help="input files or glob patterns")
+    ingest.add_argument("--rules", help="YARA rule file used to tag events")
+    ingest.add_argument(
+        "--out",
+        required=True,
+        help="output file (.json, .ndjson, .csv, optionally + .gz/.zst, .parquet, or .db for a case file)",
+    )
+    ingest.add_argument("--format", choices=FORMATS + ("case",), help="output format (default: from --out suffix)")
+    ingest.add_argument(
+        "--compression",
+        choices=("none", "gzip", "zstd"),
+        help="output compression; the column codec for Parquet (default: from a .gz/.zst --out suffix)",
+    )
+    ingest.add_argument("--projection", choices=PROJECTIONS, default=PROJECTIONS[0], help="exported fields")
+    ingest.add_argument(
+        "--field",
+        action="append",
+        dest="fields",
+        default=[],
+        help="field exported with --projection 'selected fields' (repeatable)",
+    )
+    ingest.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="files parsed in parallel (for a single file: EVTX chunks decoded in parallel)")
+    ingest.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="YARA worker threads")
+    ingest.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="events per YARA batch")
+    ingest.add_argument(
+        "--keywords",
+        help="JSON file of {keyword: weight} used for risk scoring (default: the TheLogRipper2.0.ps1 list, weight 1 each)",
+    )
+    ingest.add_argument("--no-score", action="store_true", help="skip keyword risk scoring")
+    ingest.add_argument(
+        "--correlations",
+        metavar="FILE",
+        help="also write the correlated event chains to FILE (.json, .ndjson, .csv or .parquet)",
+    )
+    ingest.add_argument(
+        "--scan-field",
+        action="append",
+        dest="scan_fields",
+        help=f"field scanned by YARA (repeatable; default: {', '.join(SCAN_FIELDS)})",
+    )
+    return parser
+
+
+def run_ingest(args):
+    paths = _expand(args.inputs)
+    missing = [p for p in paths if not os.path.isfile(p)]
+    if missing:
+        print(f"error: input not found: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    try:
+        if args.format:
+            fmt = args.format
+        else:
+            fmt = "case" if os.path.splitext(args.out)[1].lower() in CASE_SUFFIXES else format_for(args.out)
+        chains_fmt = format_for(args.correlations) if args.correlations else None
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    compression = args.compression or compression_for(args.out)
+    if fmt not in ("case", "parquet") and compression not in compressions():
+        print(f"error: {compression} compression needs the zstandard package", file=sys.stderr)
+        return 2
+
+    rules = rules_source = None
+    if args.rules:
+        import yara
+
+        from .yara_rules import compile_cached
+
+        try:
+            with open(args.rules, "r", encoding="utf-8") as f:
+                rules_source = f.read()
+            rules = compile_cached(rules_source)
+        except (OSError, yara.Error) as e:
+            print(f"error: can't load YARA rules from {args.rules}: {e}", file=sys.stderr)
+            return 2
+
+    keywords = DEFAULT_KEYWORDS
+    if args.no_score:
+        keywords = None
+    elif args.keywords:
+        try:
+            keywords = load_keywords(args.keywords)
+        except (OSError, ValueError) as e:
+            print(f"error: can't load keywords from {args.keywords}: {e}", file=sys.stderr)
+            return 2
+
+    stats = StageStats()
+    # A case file is written through as events are stored; an existing case is extended.
+    # Nothing here browses the events, so the viewers' indexes are skipped.
+    store = EventStore.open(CaseDB(args.out), views=False) if fmt == "case" else EventStore(views=False)
+    existing = len(store)
+    store = ingest_paths(
+        paths,
+        rules=rules,
+        rules_source=rules_source,
+        store=store,
+        jobs=args.jobs,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        scan_fields=args.scan_fields or SCAN_FIELDS,
+        keywords=keywords,
+        stats=stats,
+    )
+
+    if chains_fmt:
+        started = time.perf_counter()
+        chains = chains_frame(correlate(store))
+        write_events(chains, args.correlations, chains_fmt)
+        stats.record("correlate", len(store), time.perf_counter() - started)
+        print(f"wrote {len(chains):,} event chains to {args.correlations}", file=sys.stderr)
+
+    if fmt == "case":
+        _record_case_state(store, existing, keywords, rules, rules_source, args.scan_fields or SCAN_FIELDS)
+        store.db.close()
+    else:
+        started = time.perf_counter()
+        export_store(
+            store,
+            args.out,
+            fmt,
+            projection=args.projection,
+            fields=args.fields,
+            compression=compression,
+        )
+        stats.record("export", len(store), time.perf_counter() - started)
+
+    for line in stats.lines():
+        print(line, file=sys.stderr)
+    print(f"wrote {len(store):,} events to {args.out}", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "ingest":
+        return run_ingest(args)
+    return 2
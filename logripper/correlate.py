@@ -0,0 +1,298 @@
+"""Declarative multi-event correlation ("attack chains") over the event store.
+
+A :class:`Rule` is a sequence of :class:`Step` s. The first step picks the
+anchor events by EventID; every later step joins events of its own EventIDs
+to an earlier step on equal key fields (compared case-insensitively, e.g.
+``TargetSid`` = ``MemberSid`` or ``Computer`` + ``ProcessGuid``), optionally
+only within a time window of that step's event. Required steps drop anchors
+without a match; optional ones keep them, like ``Run-CorrelationSummary`` in
+``TheLogRipper2.0.ps1`` listing a created user with no groups.
+
+Joins are vectorized over the store's columns. Keys on both sides are
+factorized together into integer codes (a hash join); windowed joins sort the
+joined-to events by ``(code, time)`` and find each event's window with two
+binary searches (a sorted-merge band join), so correlating a whole case costs
+a sort plus the size of the output.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .dedup import _present
+from .timestamps import TS_MISSING, as_datetimes
+
+VALUE_SEPARATOR = ", "
+_SECOND = 1_000_000_000
+
+
+@dataclass(frozen=True)
+class Key:
+    """A join field; ``suffix`` is stripped from its values first (e.g. an ADS stream name)."""
+
+    field: str
+    suffix: str = ""
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    event_ids: tuple
+    fields: tuple = ()  # shown in the results
+    join_to: str = None  # an earlier step's name
+    on: tuple = ()  # ((earlier step's field, this step's field), ...), each a name or a Key
+    within: tuple = None  # (min, max) seconds from the earlier step's event to this one
+    optional: bool = False
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    steps: tuple
+    description: str = ""
+
+
+RULES = (
+    Rule(
+        "User created + group membership",
+        (
+            Step("created", (4720,), ("TargetUserName", "TargetSid", "SubjectUserName", "SubjectLogonId")),
+            Step(
+                "added_to",
+                (4732,),
+                ("TargetUserName",),
+                join_to="created",
+                on=(("TargetSid", "MemberSid"),),
+                optional=True,
+            ),
+        ),
+        "4720 user account created, joined to the 4732 group additions of its SID.",
+    ),
+    Rule(
+        "Downloaded file executed",
+        (
+            Step("process", (1,), ("Image", "CommandLine", "User")),
+            Step(
+                "download",
+                (15,),
+                ("TargetFilename", "Contents", "Image"),
+                join_to="process",
+                on=(("Computer", "Computer"), ("Image", Key("TargetFilename", ":Zone.Identifier"))),
+                within=(-7 * 24 * 3600, 60),
+            ),
+            Step(
+                "dns",
+                (22,),
+                ("QueryName", "QueryResults"),
+                join_to="process",
+                on=(("Computer", "Computer"), ("ProcessGuid", "ProcessGuid")),
+                within=(0, 3600),
+                optional=True,
+            ),
+            Step(
+                "network",
+                (3,),
+                ("DestinationIp", "DestinationPort", "DestinationHostname"),
+                join_to="process",
+                on=(("Computer", "Computer"), ("ProcessGuid", "ProcessGuid")),
+                within=(0, 3600),
+                optional=True,
+            ),
+        ),
+        "Sysmon 1 process whose image has a Zone.Identifier stream (15, with the HostUrl it came from),"
+        " with its DNS queries (22) and network connections (3) in the following hour.",
+    ),
+)
+
+
+def _event_rows(store, event_ids):
+    """Visible rows of events with one of ``event_ids``."""
+    frame = store.frame
+    if "EventID" not in frame.columns:
+        return np.zeros(0, dtype=np.int64)
+    wanted = {str(e) for e in event_ids}
+    column = frame["EventID"]
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        matches = column.isin([c for c in column.cat.categories if str(c) in wanted]).to_numpy()
+    else:
+        matches = column.astype(str).isin(wanted).to_numpy()
+    return np.flatnonzero(matches & store.visible_mask())
+
+
+def _normalize(value, suffix):
+    value = str(value).strip().lower()
+    if suffix and value.endswith(suffix):
+        value = value[: -len(suffix)]
+    return None if value in ("", "-", "null") else value
+
+
+def _key_values(frame, rows, key):
+    """``key``'s normalized values at ``rows`` (``None`` where missing), normalizing each distinct value once."""
+    key = key if isinstance(key, Key) else Key(key)
+    if key.field not in frame.columns:
+        return np.full(len(rows), None, dtype=object)
+    codes, uniques = pd.factorize(frame[key.field].iloc[rows].to_numpy(dtype=object))
+    suffix = key.suffix.lower()
+    return np.array([_normalize(v, suffix) for v in uniques] + [None], dtype=object)[codes]
+
+
+def _key_codes(frame, left_rows, right_rows, on):
+    """Join key codes of both sides (-1 where a key field is missing), equal exactly where all of ``on`` match."""
+    codes = None
+    for earlier, this in on:
+        values = np.concatenate([_key_values(frame, left_rows, earlier), _key_values(frame, right_rows, this)])
+        field_codes, _ = pd.factorize(values)
+        if codes is None:
+            codes = field_codes.astype(np.int64)
+        else:
+            # Pairs of codes are packed into one int64, then renumbered densely.
+            missing = (codes < 0) | (field_codes < 0)
+            packed = codes * (int(field_codes.max(initial=0)) + 1) + field_codes
+            codes, _ = pd.factorize(np.where(missing, -1, packed))
+            codes = np.where(missing, -1, codes).astype(np.int64)
+    return codes[:len(left_rows)], codes[len(left_rows):]
+
+
+def _dense_rank(values):
+    order = np.argsort(values, kind="stable")
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.cumsum(np.concatenate(([0], np.diff(values[order]) != 0)))
+    return ranks
+
+
+def band_join(left_codes, left_ts, right_codes, right_ts, within=None):
+    """``(left, right)`` index pairs with equal codes (``>= 0``) and, with ``within``,
+    ``left_ts + min <= right_ts <= left_ts + max`` (seconds)."""
+    left = np.flatnonzero(left_codes >= 0)
+    right = np.flatnonzero(right_codes >= 0)
+    if within is not None:
+        left = left[left_ts[left] != TS_MISSING]
+        right = right[right_ts[right] != TS_MISSING]
+    if not len(left) or not len(right):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    if within is None:
+        right = right[np.argsort(right_codes[right], kind="stable")]
+        sorted_keys = right_codes[right]
+        lo = np.searchsorted(sorted_keys, left_codes[left], side="left")
+        hi = np.searchsorted(sorted_keys, left_codes[left], side="right")
+    else:
+        # Times are replaced by their rank among every time involved, so
+        # (code, time) packs into one int64 the joined-to side is sorted on.
+        starts = left_ts[left] + int(within[0] * _SECOND)
+        ends = left_ts[left] + int(within[1] * _SECOND)
+        ranks = _dense_rank(np.concatenate([right_ts[right], starts, ends]))
+        span = int(ranks.max()) + 1
+        right_keys = right_codes[right] * span + ranks[:len(right)]
+        order = np.argsort(right_keys, kind="stable")
+        right, sorted_keys = right[order], right_keys[order]
+        lo = np.searchsorted(sorted_keys, left_codes[left] * span + ranks[len(right):len(right) + len(left)], side="left")
+        hi = np.searchsorted(sorted_keys, left_codes[left] * span + ranks[len(right) + len(left):], side="right")
+
+    counts = hi - lo
+    total = int(counts.sum())
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(left, counts), right[np.repeat(lo, counts) + offsets]
+
+
+def _join_step(store, paths, step):
+    """Extend ``paths`` (``{step name: rows}``, -1 for no event) with ``step``."""
+    frame = store.frame
+    times = store.timestamps()
+    left_rows = paths[step.join_to]
+    candidates = _event_rows(store, step.event_ids)
+    known = np.flatnonzero(left_rows >= 0)
+    known_codes, right_codes = _key_codes(frame, left_rows[known], candidates, step.on)
+    left_codes = np.full(len(left_rows), -1, dtype=np.int64)
+    left_codes[known] = known_codes
+    left_ts = np.full(len(left_rows), TS_MISSING, dtype=np.int64)
+    left_ts[known] = times[left_rows[known]]
+    left, right = band_join(left_codes, left_ts, right_codes, times[candidates], step.within)
+
+    joined = {name: rows[left] for name, rows in paths.items()}
+    joined[step.name] = candidates[right]
+    if step.optional:
+        unmatched = np.setdiff1d(np.arange(len(left_rows)), left)
+        for name, rows in paths.items():
+            joined[name] = np.concatenate([joined[name], rows[unmatched]])
+        joined[step.name] = np.concatenate([joined[step.name], np.full(len(unmatched), -1, dtype=np.int64)])
+    return joined
+
+
+def _chain_rows(chains, rows, times):
+    """Distinct ``(chain, row)`` pairs for ``rows >= 0``, ordered by chain, then time."""
+    keep = rows >= 0
+    span = int(rows.max(initial=0)) + 1
+    pairs = np.unique(chains[keep] * span + rows[keep])
+    chains, rows = pairs // span, pairs % span
+    order = np.lexsort((rows, times[rows], chains))
+    return chains[order], rows[order]
+
+
+def _joined(chains, values, count):
+    """``values`` grouped by chain as distinct, separator-joined strings."""
+    groups = [{} for _ in range(count)]
+    for chain, value in zip(chains.tolist(), values.tolist()):
+        if _present(value):
+            groups[chain][str(value)] = None
+    return [VALUE_SEPARATOR.join(group) for group in groups]
+
+
+def run_rule(store, rule):
+    """One row per anchor event with a complete chain: ids and shown fields per step."""
+    anchor = rule.steps[0]
+    paths = {anchor.name: _event_rows(store, anchor.event_ids)}
+    for step in rule.steps[1:]:
+        paths = _join_step(store, paths, step)
+        if not len(paths[anchor.name]):
+            break
+
+    columns = ["rule", "chain", "start", "events"]
+    for step in rule.steps:
+        columns += [f"{step.name}.uuid", *(f"{step.name}.{field}" for field in step.fields)]
+    if not len(paths[anchor.name]) or any(step.name not in paths for step in rule.steps):
+        return pd.DataFrame(columns=columns)
+
+    frame = store.frame
+    times = store.timestamps()
+    uuids = frame["uuid"].to_numpy(dtype=object)
+    # Chains are numbered in anchor time order; a path is one combination of
+    # step events, so a chain's events per step are the distinct ones over its paths.
+    anchors = np.unique(paths[anchor.name])
+    anchors = anchors[np.lexsort((anchors, times[anchors]))]
+    number = np.empty(len(frame), dtype=np.int64)
+    number[anchors] = np.arange(len(anchors))
+    chains = number[paths[anchor.name]]
+    count = len(anchors)
+
+    result = {
+        "rule": rule.name,
+        "chain": [f"{rule.name}:{event_id}" for event_id in uuids[anchors]],
+        "start": as_datetimes(times[anchors]),
+    }
+    every = []
+    for step in rule.steps:
+        step_chains, rows = _chain_rows(chains, paths[step.name], times)
+        every.append((step_chains, rows))
+        result[f"{step.name}.uuid"] = _joined(step_chains, uuids[rows], count)
+        for field in step.fields:
+            values = frame[field].to_numpy(dtype=object)[rows] if field in frame.columns else np.full(len(rows), None)
+            result[f"{step.name}.{field}"] = _joined(step_chains, values, count)
+    step_chains, rows = _chain_rows(
+        np.concatenate([c for c, _ in every]), np.concatenate([r for _, r in every]), times
+    )
+    result["events"] = _joined(step_chains, uuids[rows], count)
+    return pd.DataFrame(result, columns=columns)
+
+
+def correlate(store, rules=RULES):
+    """``{rule name: chains}`` for every rule, see :func:`run_rule`."""
+    return {rule.name: run_rule(store, rule) for rule in rules}
+
+
+def chains_frame(results):
+    """All rules' chains in one frame, for export."""
+    frames = [chains for chains in results.values() if len(chains)]
+    if not frames:
+        return pd.DataFrame(columns=["rule", "chain", "start", "events"])
+    return pd.concat(frames, ignore_index=True, sort=False)
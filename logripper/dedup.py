@@ -0,0 +1,97 @@
+"""Duplicate detection across uploads.
+
+An event's identity is ``(Computer, Channel, EventRecordID)``: Windows numbers
+records per channel per machine, so the same record exported twice (or found
+in two overlapping exports) gets the same key whatever else differs. Exports
+without record ids fall back to a hash of the event's own fields, leaving out
+the ones ingest adds (id, ``ts``, annotations, tagging and scoring results).
+
+Event ids are derived from that identity (:func:`event_id`): a 63-bit
+integer hash of the key, so re-parsing the same log gives the same ids and
+anything keyed by them (annotations, hidden state, tree overrides, caches)
+carries over between sessions and re-ingests. The :class:`DedupIndex` holds
+the ids of every event in a store and is kept up to date as events are
+appended, so checking a new event is one set lookup on the id it already has.
+"""
+import hashlib
+
+import pandas as pd
+
+RECORD_FIELDS = ("Computer", "Channel", "EventRecordID")
+# Non-negative and within int64, so ids fit numpy, Arrow and SQLite integer columns.
+ID_MASK = (1 << 63) - 1
+DERIVED_FIELDS = frozenset(
+    {"uuid", "ts", "tag", "notes", "mitre", "yara_rule", "tag_source", "risk_score", "matched_keywords"}
+)
+
+
+def _present(value):
+    return value is not None and value is not pd.NA and value == value and value != ""
+
+
+def content_hash(evt):
+    """Stable hash of ``evt``'s own fields.
+
+    Values are hashed as strings so an event reads the same whether it comes
+    straight from JSON or back out of a case file with numeric columns.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for field in sorted(f for f, v in evt.items() if f not in DERIVED_FIELDS and _present(v)):
+        digest.update(f"{field}\0{evt[field]}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _record_key(computer, channel, record_id):
+    return (
+        str(computer) if _present(computer) else None,
+        str(channel) if _present(channel) else None,
+        str(record_id),
+    )
+
+
+def dedup_key(evt):
+    """``(Computer, Channel, EventRecordID)`` when the record id is known, else :func:`content_hash`."""
+    record_id = evt.get("EventRecordID")
+    if _present(record_id):
+        return _record_key(evt.get("Computer"), evt.get("Channel"), record_id)
+    return content_hash(evt)
+
+
+def _key_id(key):
+    if isinstance(key, tuple):
+        key = hashlib.blake2b("\0".join(part or "" for part in key).encode("utf-8"), digest_size=8).hexdigest()
+    return int(key[:16], 16) & ID_MASK
+
+
+def event_id(evt):
+    """Deterministic 63-bit id of ``evt``: a hash of its :func:`dedup_key`."""
+    return _key_id(dedup_key(evt))
+
+
+class DedupIndex:
+    def __init__(self):
+        self._keys = set()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, evt):
+        return evt["uuid"] in self._keys
+
+    def add(self, events):
+        self._keys.update(evt["uuid"] for evt in events)
+
+    def add_frame(self, frame):
+        """Index the events in a stored frame (as loaded from a case file)."""
+        self._keys.update(frame["uuid"].tolist())
+
+    def new_events(self, batch):
+        """Events from ``batch`` that aren't indexed yet, each kept only once."""
+        seen = set()
+        fresh = []
+        for evt in batch:
+            key = evt["uuid"]
+            if key not in self._keys and key not in seen:
+                seen.add(key)
+                fresh.append(evt)
+        return fresh
@@ -0,0 +1,127 @@
+"""The process relationship graph, maintained incrementally by the EventStore.
+
+One node per visible event and an edge from each event to its parent
+process's event (as resolved by the :class:`~logripper.process_index.ProcessIndex`).
+Appends add nodes and edges, hide/unhide remove and restore them, and a tag,
+MITRE, Image or risk score change only rewrites that node's label and color.
+``version`` changes whenever any of that happens, so views can skip
+re-rendering an unchanged graph.
+"""
+import networkx as nx
+import pandas as pd
+
+from .taxonomy import MITRE_TECHNIQUES, TAG_COLORS
+
+GRAPH_FIELDS = ("Image", "tag", "mitre", "risk_score")
+
+
+def node_label(evt):
+    label = evt.get("Image", "Unknown")
+    mitre_id = evt.get("mitre", "")
+    node_label = f"{label}\n{evt.get('tag') or 'Uncategorized'}"
+    if mitre_id:
+        node_label += f"\n{mitre_id}: {MITRE_TECHNIQUES.get(mitre_id, {}).get('name', '')}"
+    if evt.get("risk_score"):
+        node_label += f"\nrisk {evt['risk_score']}"
+    return node_label
+
+
+class EventGraph:
+    def __init__(self, processes):
+        self.processes = processes
+        self.G = nx.DiGraph()
+        self.node_colors = {}
+        self.version = 0
+        self._fields = {}
+
+    def _attrs(self, event_id):
+        fields = self._fields[event_id]
+        return {
+            "label": node_label(fields),
+            "color": self.node_colors[event_id],
+            "image": fields.get("Image", "Unknown"),
+            "tag": fields.get("tag", ""),
+            "risk": fields.get("risk_score", 0),
+        }
+
+    def _link(self, event_id, new=False):
+        if not new:
+            self.G.remove_edges_from(list(self.G.in_edges(event_id)))
+        parent_id = self.processes.parent_of(event_id)
+        if parent_id is not None and parent_id in self.G:
+            self.G.add_edge(parent_id, event_id)
+
+    def _relink_children(self, guids):
+        # A change to a process's events can change which event its children hang off.
+        for guid in guids:
+            for child in self.processes.children_of(guid):
+                if child in self.G:
+                    self._link(child)
+
+    # --- Maintenance (called by the store after its ProcessIndex is updated) ---
+    def _add_node(self, event_id, fields):
+        self._fields[event_id] = fields
+        self.node_colors[event_id] = TAG_COLORS.get(fields.get("tag", ""), TAG_COLORS[""])
+
+    def add(self, events):
+        added = {}
+        guids = set()
+        for evt in events:
+            event_id = evt["uuid"]
+            self._add_node(event_id, {f: evt[f] for f in GRAPH_FIELDS if evt.get(f) is not None})
+            self.G.add_node(event_id, **self._attrs(event_id))
+            added[event_id] = None
+            if evt.get("ProcessGuid"):
+                guids.add(evt["ProcessGuid"])
+        for event_id in added:
+            self._link(event_id, new=True)
+        # Children hang off their parent process's first event, so earlier
+        # children only move when the batch brought that first event.
+        for guid in guids:
+            if self.processes.first_event(guid) in added:
+                for child in self.processes.children_of(guid):
+                    if child in self.G and child not in added:
+                        self._link(child)
+        self.version += 1
+
+    def add_frame(self, frame, visible):
+        """Add stored events in bulk (e.g. a reopened case), linking each once.
+
+        ``frame`` holds ``uuid`` and the :data:`GRAPH_FIELDS` columns; only
+        rows marked in ``visible`` get a node.
+        """
+        columns = [f for f in GRAPH_FIELDS if f in frame.columns]
+        event_ids = frame["uuid"].tolist()
+        values = zip(*(frame[f].tolist() for f in columns)) if columns else [()] * len(event_ids)
+        for event_id, row in zip(event_ids, values):
+            self._add_node(event_id, {f: v for f, v in zip(columns, row) if v is not None and v is not pd.NA and v == v})
+        shown = [e for e, v in zip(event_ids, visible) if v]
+        self.G.add_nodes_from((e, self._attrs(e)) for e in shown)
+        parents = ((self.processes.parent_of(e), e) for e in shown)
+        self.G.add_edges_from((parent, e) for parent, e in parents if parent is not None)
+        self.version += 1
+
+    def update(self, event_id, fields):
+        current = self._fields[event_id]
+        changed = {f: v for f, v in fields.items() if f in GRAPH_FIELDS and current.get(f, "") != v}
+        if not changed:
+            return
+        current.update(changed)
+        if "tag" in changed:
+            self.node_colors[event_id] = TAG_COLORS.get(changed["tag"], TAG_COLORS[""])
+        if event_id in self.G:
+            self.G.nodes[event_id].update(self._attrs(event_id))
+        self.version += 1
+
+    def hide(self, event_id):
+        if event_id in self.G:
+            self.G.remove_node(event_id)
+            self._relink_children([self.processes.guid_of(event_id)])
+            self.version += 1
+
+    def unhide(self, event_id):
+        if event_id not in self.G:
+            self.G.add_node(event_id, **self._attrs(event_id))
+            self._link(event_id)
+            self._relink_children([self.processes.guid_of(event_id)])
+            self.version += 1
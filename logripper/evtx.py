@@ -0,0 +1,408 @@
+"""Native reader for Windows ``.evtx`` files.
+
+An EVTX file is a 4 KB header followed by 64 KB chunks. Every chunk carries
+its own string and template tables, so chunks decode independently and are
+spread over a process pool, with events put back in file order. Each record
+is Binary XML (BinXML), normally one template instance: the template (the
+``<Event>`` skeleton) is defined once per chunk and each record supplies the
+substitution values that fill it in.
+
+Events come out in the shape ``TheLogRipper2.0.ps1`` exports, without
+``PrettyXml``: System fields at the top level and ``EventData`` as
+``DataValues`` Name/Value pairs, ready for :func:`~logripper.ingest.flatten_event`.
+Values are rendered as Windows renders them in event XML.
+"""
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+FILE_MAGIC = b"ElfFile\x00"
+CHUNK_MAGIC = b"ElfChnk\x00"
+RECORD_MAGIC = b"\x2a\x2a\x00\x00"
+HEADER_SIZE = 0x1000
+CHUNK_SIZE = 0x10000
+CHUNK_HEADER_SIZE = 0x200
+
+_FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'"}
+
+_u16 = struct.Struct("<H").unpack_from
+_u32 = struct.Struct("<I").unpack_from
+_u64 = struct.Struct("<Q").unpack_from
+_DESCRIPTOR = struct.Struct("<HBx")
+
+
+def is_evtx(file):
+    """Whether a binary file object starts with the EVTX file signature."""
+    start = file.tell()
+    magic = file.read(len(FILE_MAGIC))
+    file.seek(start)
+    return magic == FILE_MAGIC
+
+
+# --- Value rendering ---
+def _filetime(value):
+    stamp = _FILETIME_EPOCH + timedelta(microseconds=value // 10)
+    return f"{stamp:%Y-%m-%dT%H:%M:%S}.{value % 10_000_000:07d}Z"
+
+
+def _systemtime(data):
+    year, month, _, day, hour, minute, second, millis = struct.unpack("<8H", data)
+    return f"{year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:{second:02d}.{millis:03d}0000Z"
+
+
+def _sid(data):
+    revision, count = data[0], data[1]
+    authority = int.from_bytes(data[2:8], "big")
+    subs = struct.unpack_from(f"<{count}I", data, 8)
+    return "-".join(["S", str(revision), str(authority), *map(str, subs)])
+
+
+def _guid(data):
+    a, b, c = struct.unpack_from("<IHH", data)
+    tail = data[8:16].hex().upper()
+    return f"{{{a:08X}-{b:04X}-{c:04X}-{tail[:4]}-{tail[4:]}}}"
+
+
+_FIXED = {
+    0x03: ("<b", str),
+    0x04: ("<B", str),
+    0x05: ("<h", str),
+    0x06: ("<H", str),
+    0x07: ("<i", str),
+    0x08: ("<I", str),
+    0x09: ("<q", str),
+    0x0A: ("<Q", str),
+    0x0B: ("<f", repr),
+    0x0C: ("<d", repr),
+    0x0D: ("<I", lambda v: "true" if v else "false"),
+    0x11: ("<Q", _filetime),
+    0x14: ("<I", lambda v: f"0x{v:x}"),
+    0x15: ("<Q", lambda v: f"0x{v:x}"),
+}
+
+
+def _render(value_type, data):
+    """Text for one substitution value of BinXML ``value_type``."""
+    if value_type == 0x01:
+        return data.decode("utf-16-le", "replace").rstrip("\x00")
+    if value_type == 0x02:
+        return data.decode("latin-1").rstrip("\x00")
+    if value_type in _FIXED:
+        fmt, text = _FIXED[value_type]
+        return text(struct.unpack_from(fmt, data)[0])
+    if value_type == 0x0E:
+        return data.hex().upper()
+    if value_type == 0x0F:
+        return _guid(data)
+    if value_type == 0x10:
+        return f"0x{int.from_bytes(data, 'little'):x}"
+    if value_type == 0x12:
+        return _systemtime(data)
+    if value_type == 0x13:
+        return _sid(data)
+    if value_type == 0x81:
+        return ", ".join(data.decode("utf-16-le", "replace").rstrip("\x00").split("\x00"))
+    if value_type & 0x80:
+        item_type = value_type & 0x7F
+        size = {0x0F: 16, 0x12: 16}.get(item_type) or struct.calcsize(_FIXED.get(item_type, ("<Q",))[0])
+        return ", ".join(_render(item_type, data[i:i + size]) for i in range(0, len(data) - size + 1, size))
+    return data.hex().upper()
+
+
+# --- BinXML ---
+class _Element:
+    __slots__ = ("name", "attrs", "children")
+
+    def __init__(self, name):
+        self.name = name
+        self.attrs = []
+        self.children = []
+
+
+class _Substitution:
+    # Normal and optional substitutions read the same: a missing value renders as nothing.
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+
+class _Instance:
+    """A template instance: the chunk's (shared) template nodes and this record's values."""
+
+    __slots__ = ("nodes", "values")
+
+    def __init__(self, nodes, values):
+        self.nodes = nodes
+        self.values = values
+
+
+# Templates are never copied per record. Readers walk the shared nodes with the
+# record's values alongside, resolving substitutions only where they look.
+def _expand(nodes, values):
+    """``(node, values)`` for ``nodes``, with substitutions and template instances resolved."""
+    for node in nodes:
+        if isinstance(node, _Substitution):
+            value = values[node.index] if node.index < len(values) else None
+            if isinstance(value, list):
+                # An embedded BinXML fragment brings its own template instance.
+                yield from _expand(value, ())
+            elif value is not None:
+                yield value, values
+        elif isinstance(node, _Instance):
+            yield from _expand(node.nodes, node.values)
+        else:
+            yield node, values
+
+
+def _elements(element, values):
+    for child, child_values in _expand(element.children, values):
+        if isinstance(child, _Element):
+            yield child, child_values
+
+
+def _text(parts, values):
+    if len(parts) == 1:
+        # Nearly every value is one literal or one substituted string.
+        part = parts[0]
+        if isinstance(part, _Substitution) and part.index < len(values):
+            part = values[part.index]
+        if part is None or isinstance(part, str):
+            return part or ""
+    return "".join(part for part, _ in _expand(parts, values) if isinstance(part, str))
+
+
+def _attr(element, values, name, default=""):
+    for attr_name, parts in element.attrs:
+        if attr_name == name:
+            return _text(parts, values)
+    return default
+
+
+class _Chunk:
+    def __init__(self, data):
+        self.data = data
+        self._names = {}
+        self._templates = {}
+
+    def _name(self, offset):
+        name = self._names.get(offset)
+        if name is None:
+            length = _u16(self.data, offset + 6)[0]
+            name = self._names[offset] = self.data[offset + 8:offset + 8 + 2 * length].decode("utf-16-le")
+        return name
+
+    def _skip_name(self, pos, offset):
+        # A name used for the first time in the chunk is stored inline, right here.
+        if offset != pos:
+            return pos
+        return pos + 10 + 2 * _u16(self.data, pos + 6)[0]
+
+    def _template(self, offset):
+        nodes = self._templates.get(offset)
+        if nodes is None:
+            nodes = self._templates[offset] = self._parse(offset + 24)[0]
+        return nodes
+
+    def _values(self, pos):
+        count = _u32(self.data, pos)[0]
+        descriptors = list(_DESCRIPTOR.iter_unpack(self.data[pos + 4:pos + 4 + 4 * count]))
+        pos += 4 + 4 * count
+        values = []
+        for size, value_type in descriptors:
+            if value_type == 0x00 or size == 0:
+                values.append(None)
+            elif value_type == 0x21:
+                values.append(self._parse(pos)[0])
+            else:
+                values.append(_render(value_type, self.data[pos:pos + size]))
+            pos += size
+        return values, pos
+
+    def _parse(self, pos):
+        """Nodes of the BinXML fragment at ``pos``, and the offset just past it."""
+        data = self.data
+        root = _Element(None)
+        stack = [root]
+        attr = None
+
+        def add(node):
+            (attr if attr is not None else stack[-1].children).append(node)
+
+        while True:
+            token = data[pos]
+            kind = token & 0x0F
+            more = token & 0x40
+            if kind == 0x00:  # end of fragment
+                return root.children, pos + 1
+            if kind == 0x0F:  # fragment header
+                pos += 4
+            elif kind == 0x01:  # open start element
+                name_offset = _u32(data, pos + 7)[0]
+                pos += 11
+                sized_first = more and name_offset == pos + 4
+                pos = self._skip_name(pos + 4 if sized_first else pos, name_offset)
+                if more and not sized_first:
+                    pos += 4  # attribute list size
+                element = _Element(self._name(name_offset))
+                stack[-1].children.append(element)
+                stack.append(element)
+                attr = None
+            elif kind == 0x02:  # close start element
+                attr = None
+                pos += 1
+            elif kind in (0x03, 0x04):  # close empty element / end element
+                if len(stack) == 1:
+                    raise ValueError(f"unbalanced BinXML end element at {pos:#x}")
+                stack.pop()
+                attr = None
+                pos += 1
+            elif kind == 0x06:  # attribute
+                name_offset = _u32(data, pos + 1)[0]
+                pos = self._skip_name(pos + 5, name_offset)
+                attr = []
+                stack[-1].attrs.append((self._name(name_offset), attr))
+            elif kind in (0x05, 0x07):  # value text / CDATA
+                offset = pos + 2 if kind == 0x05 else pos + 1
+                length = _u16(data, offset)[0]
+                add(data[offset + 2:offset + 2 + 2 * length].decode("utf-16-le", "replace"))
+                pos = offset + 2 + 2 * length
+            elif kind == 0x08:  # character reference
+                add(chr(_u16(data, pos + 1)[0]))
+                pos += 3
+            elif kind == 0x09:  # entity reference
+                name_offset = _u32(data, pos + 1)[0]
+                pos = self._skip_name(pos + 5, name_offset)
+                name = self._name(name_offset)
+                add(_ENTITIES.get(name, f"&{name};"))
+            elif kind == 0x0A:  # processing instruction target
+                pos = self._skip_name(pos + 5, _u32(data, pos + 1)[0])
+            elif kind == 0x0B:  # processing instruction data
+                pos += 3 + 2 * _u16(data, pos + 1)[0]
+            elif kind == 0x0C:  # template instance
+                start = pos
+                offset = _u32(data, pos + 6)[0]
+                pos += 10
+                template = self._template(offset)
+                if offset > start:
+                    # Defined here: GUID and size header, then the template's own fragment.
+                    pos = offset + 24 + _u32(data, offset + 20)[0]
+                values, pos = self._values(pos)
+                add(_Instance(template, values))
+            elif kind in (0x0D, 0x0E):  # normal / optional substitution
+                add(_Substitution(_u16(data, pos + 1)[0]))
+                pos += 4
+            else:
+                raise ValueError(f"unknown BinXML token {token:#04x} at {pos:#x}")
+
+    def records(self):
+        """``(record id, BinXML nodes)`` for each record, skipping malformed ones."""
+        data = self.data
+        end = min(_u32(data, 48)[0], len(data))
+        pos = CHUNK_HEADER_SIZE
+        while pos + 28 <= end and data[pos:pos + 4] == RECORD_MAGIC:
+            size = _u32(data, pos + 4)[0]
+            if size < 28 or pos + size > end:
+                break
+            try:
+                nodes = self._parse(pos + 24)[0]
+            except (IndexError, ValueError, struct.error):
+                nodes = None
+            if nodes:
+                yield _u64(data, pos + 8)[0], nodes
+            pos += size
+
+
+def _event(record_id, nodes):
+    """An event dict shaped like the PowerShell export, or ``None`` without an ``<Event>``."""
+    root = None
+    for node, values in _expand(nodes, ()):
+        if isinstance(node, _Element):
+            root = node, values
+            break
+    if root is None:
+        return None
+    sections = {element.name: (element, values) for element, values in _elements(*root)}
+    system = {element.name: (element, values) for element, values in _elements(*sections["System"])} if "System" in sections else {}
+
+    def text(name):
+        return _text(system[name][0].children, system[name][1]) if name in system else ""
+
+    def attr(name, attr_name):
+        return _attr(*system[name], attr_name) if name in system else ""
+
+    data_values = []
+    if "EventData" in sections:
+        for data, values in _elements(*sections["EventData"]):
+            if data.name == "Data":
+                value = _text(data.children, values)
+                data_values.append({"Name": _attr(data, values, "Name", "Unknown"), "Value": value or "null"})
+    event_id = text("EventID")
+    return {
+        "TimeCreated": attr("TimeCreated", "SystemTime"),
+        "EventID": int(event_id) if event_id.isdigit() else event_id,
+        "EventRecordID": text("EventRecordID") or str(record_id),
+        "ProviderName": attr("Provider", "Name"),
+        "Version": text("Version"),
+        "Level": text("Level"),
+        "Task": text("Task"),
+        "Opcode": text("Opcode"),
+        "ProcessID": attr("Execution", "ProcessID"),
+        "ThreadID": attr("Execution", "ThreadID"),
+        "Channel": text("Channel"),
+        "Computer": text("Computer"),
+        "UserID": attr("Security", "UserID"),
+        "DataValues": data_values,
+    }
+
+
+def parse_chunk(data):
+    """Events in one 64 KB chunk, in record order; empty for an unused chunk."""
+    if len(data) < CHUNK_HEADER_SIZE or data[:len(CHUNK_MAGIC)] != CHUNK_MAGIC:
+        return []
+    events = (_event(record_id, nodes) for record_id, nodes in _Chunk(bytes(data)).records())
+    return [evt for evt in events if evt is not None]
+
+
+def iter_evtx(file, progress=None, workers=1):
+    """Yield events from a binary ``.evtx`` file object in file order.
+
+    Chunks are decoded in a pool of ``workers`` processes (inline for 1),
+    with a bounded number in flight. ``progress`` is called with the
+    fraction of bytes consumed so far.
+    """
+    start = file.tell()
+    total = file.seek(0, 2) - start
+    file.seek(start)
+    if file.read(HEADER_SIZE)[:len(FILE_MAGIC)] != FILE_MAGIC:
+        raise ValueError("not an EVTX file")
+    consumed = HEADER_SIZE
+
+    def chunks():
+        nonlocal consumed
+        for data in iter(lambda: file.read(CHUNK_SIZE), b""):
+            consumed += len(data)
+            yield data
+
+    def report():
+        if progress is not None and total:
+            progress(min(consumed / total, 1.0))
+
+    if workers <= 1:
+        for data in chunks():
+            yield from parse_chunk(data)
+            report()
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for data in chunks():
+            pending.append(pool.submit(parse_chunk, data))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+                report()
+        while pending:
+            yield from pending.popleft().result()
+            report()
@@ -0,0 +1,294 @@
+"""Annotated event export to JSON, NDJSON, CSV and Parquet.
+
+Whole-case exports are streamed: :func:`iter_chunks` slices the store into
+fixed-size row chunks projected to the exported columns, and
+:func:`write_chunks` serializes them one at a time through an optional
+gzip/zstd compressor (for Parquet, the file's own column codec), so peak
+memory is one chunk rather than the case serialized in full.
+"""
+import gzip
+import io
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .store import BULKY_FIELDS
+
+FORMATS = ("json", "ndjson", "csv", "parquet")
+CHUNK_ROWS = 10_000
+PROJECTIONS = ("all fields", "without PrettyXml", "annotations only", "selected fields")
+EVENT_SCOPES = ("all", "visible", "hidden")
+# Enough to find the event again next to the analyst's work on it.
+ANNOTATION_FIELDS = (
+    "uuid", "ts", "EventID", "EventRecordID", "Computer", "Channel",
+    "tag", "notes", "mitre", "tag_source", "yara_rule", "risk_score", "matched_keywords",
+)
+# Integer ids that come back as floats when some events lack them.
+INTEGER_FIELDS = ("EventRecordID",)
+_SUFFIXES = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv", ".parquet": "parquet"}
+_COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+
+def compressions():
+    """Compression choices available here; zstd needs the ``zstandard`` package."""
+    return ("none", "gzip") + (("zstd",) if zstandard is not None else ())
+
+
+def compression_for(path):
+    """Compression implied by ``path``'s last suffix (``.gz``/``.zst``), or ``"none"``."""
+    return _COMPRESSION_SUFFIXES.get(Path(path).suffix.lower(), "none")
+
+
+def format_for(path):
+    """Export format implied by ``path``'s suffix, looking past a ``.gz``/``.zst`` suffix."""
+    path = Path(path)
+    if path.suffix.lower() in _COMPRESSION_SUFFIXES:
+        path = path.with_suffix("")
+    fmt = _SUFFIXES.get(path.suffix.lower())
+    if fmt is None:
+        raise ValueError(f"can't infer export format from {str(path)!r}; expected one of {', '.join(_SUFFIXES)}")
+    return fmt
+
+
+def file_name(stem, fmt, compression="none"):
+    suffix = {"gzip": ".gz", "zstd": ".zst"}.get(compression, "") if fmt != "parquet" else ""
+    return f"{stem}.{fmt}{suffix}"
+
+
+def _integer_ids(frame):
+    """``frame`` with float :data:`INTEGER_FIELDS` as nullable ``Int64``, so ids export as ``7``, not ``7.0``."""
+    floats = [c for c in INTEGER_FIELDS if c in frame.columns and pd.api.types.is_float_dtype(frame[c].dtype)]
+    if not floats:
+        return frame
+    return frame.astype({c: "Int64" for c in floats})
+
+
+def _parquet_safe(frame):
+    # Object columns can mix ints and strings across exports; Arrow needs one type.
+    frame = frame.copy()
+    for column in frame.columns:
+        if frame[column].dtype == object:
+            frame[column] = frame[column].map(lambda v: v if v is None or v != v else str(v))
+    return frame
+
+
+def write_events(frame, target, fmt):
+    """Write ``frame`` to ``target`` (a path or binary file object) as ``fmt``."""
+    frame = _integer_ids(frame)
+    if fmt == "json":
+        data = frame.to_json(orient="records", indent=2).encode("utf-8")
+    elif fmt == "ndjson":
+        data = frame.to_json(orient="records", lines=True).encode("utf-8")
+    elif fmt == "csv":
+        data = frame.to_csv(index=False).encode("utf-8")
+    elif fmt == "parquet":
+        _parquet_safe(frame).to_parquet(target, index=False)
+        return
+    else:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+    if isinstance(target, (str, Path)):
+        Path(target).write_bytes(data)
+    else:
+        target.write(data)
+
+
+def export_bytes(frame, fmt):
+    buffer = io.BytesIO()
+    write_events(frame, buffer, fmt)
+    return buffer.getvalue()
+
+
+# --- Streaming export ---
+def export_columns(store, projection="all fields", fields=()):
+    """Columns exported under ``projection`` (one of :data:`PROJECTIONS`), in schema order."""
+    schema = store.schema
+    if projection == "all fields":
+        return schema
+    if projection == "without PrettyXml":
+        return [c for c in schema if c not in BULKY_FIELDS]
+    if projection == "annotations only":
+        return [c for c in ANNOTATION_FIELDS if c in schema]
+    if projection == "selected fields":
+        wanted = set(fields)
+        return [c for c in schema if c in wanted]
+    raise ValueError(f"unknown projection {projection!r}; expected one of {', '.join(PROJECTIONS)}")
+
+
+def iter_chunks(store, columns=None, scope="all", chunk_size=CHUNK_ROWS):
+    """The store's rows in ``scope`` (one of :data:`EVENT_SCOPES`) as frames of at most ``chunk_size`` rows."""
+    frame = store.frame
+    if not len(frame):
+        return
+    columns = store.schema if columns is None else [c for c in columns if c in store.schema]
+    if scope == "all":
+        rows = np.arange(len(frame))
+    elif scope == "visible":
+        rows = np.flatnonzero(store.visible_mask())
+    elif scope == "hidden":
+        rows = np.flatnonzero(~store.visible_mask())
+    else:
+        raise ValueError(f"unknown event scope {scope!r}; expected one of {', '.join(EVENT_SCOPES)}")
+    for start in range(0, len(rows), chunk_size):
+        yield _integer_ids(store.frame_at(rows[start:start + chunk_size], columns))
+
+
+def _arrow_type(series):
+    """One Arrow type for ``series`` across every chunk; mixed object columns become strings."""
+    if series.name in INTEGER_FIELDS and pd.api.types.is_float_dtype(series.dtype):
+        return pa.int64()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if categories.dtype == object or pd.api.types.is_string_dtype(categories):
+            return pa.dictionary(pa.int32(), pa.string())
+        # Extension dtypes (Int64 categories of a reopened case) have no numpy dtype.
+        return pa.dictionary(pa.int32(), pa.array(categories).type)
+    if series.dtype != object:
+        return pa.Schema.from_pandas(series.iloc[:0].to_frame(), preserve_index=False).field(0).type
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    return {"integer": pa.int64(), "floating": pa.float64(), "mixed-integer-float": pa.float64(), "boolean": pa.bool_()}.get(inferred, pa.string())
+
+
+def parquet_schema(frame, columns, stored=()):
+    """Arrow schema for ``columns`` of ``frame``; ``stored`` ones it lacks (read from a case file) are strings."""
+    return pa.schema(
+        [(c, _arrow_type(frame[c]) if c in frame.columns else pa.string()) for c in columns if c in frame.columns or c in stored]
+    )
+
+
+def _arrow_chunk(chunk, schema):
+    chunk = chunk.copy()
+    for field in schema:
+        column = chunk[field.name]
+        if pa.types.is_string(field.type) and column.dtype == object:
+            chunk[field.name] = column.map(lambda v: None if v is None or v != v else str(v))
+        elif pa.types.is_dictionary(field.type) and pa.types.is_string(field.type.value_type):
+            if not all(type(c) is str for c in column.cat.categories):
+                chunk[field.name] = column.astype(object).map(lambda v: None if v is None or v != v else str(v))
+    return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+class _Compressed:
+    """Binary writer compressing into ``target``; ``close`` flushes it but leaves ``target`` open."""
+
+    def __init__(self, target, compression):
+        if compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=target, mode="wb")
+        elif compression == "zstd":
+            if zstandard is None:
+                raise ValueError("zstd compression needs the zstandard package")
+            self._stream = zstandard.ZstdCompressor().stream_writer(target, closefd=False)
+        else:
+            self._stream = None
+        self._target = target
+
+    def write(self, data):
+        (self._stream or self._target).write(data)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+
+
+def write_chunks(chunks, target, fmt, compression="none", columns=None, schema=None):
+    """Write frames from ``chunks`` to ``target`` (a path or binary file object) as one ``fmt`` file.
+
+    ``columns`` is the exported header, used when there are no rows at all.
+    Parquet columns get ``schema``'s types, by default inferred from the first chunk.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    opened = isinstance(target, (str, Path))
+    sink = open(target, "wb") if opened else target
+    try:
+        if fmt == "parquet":
+            _write_parquet(chunks, sink, compression, columns, schema)
+        else:
+            out = _Compressed(sink, compression)
+            _write_text(chunks, out, fmt, columns)
+            out.close()
+    finally:
+        if opened:
+            sink.close()
+
+
+def _write_text(chunks, out, fmt, columns):
+    first = True
+    if fmt == "json":
+        out.write(b"[")
+    for chunk in chunks:
+        if fmt == "csv":
+            out.write(chunk.to_csv(index=False, header=first).encode("utf-8"))
+        else:
+            lines = chunk.to_json(orient="records", lines=True).rstrip("\n")
+            if fmt == "json":
+                # JSON strings escape newlines, so the only raw ones separate records.
+                lines = ("" if first else ",") + "\n" + lines.replace("\n", ",\n")
+            else:
+                lines += "\n"
+            out.write(lines.encode("utf-8"))
+        first = False
+    if fmt == "json":
+        out.write(b"\n]\n" if not first else b"]\n")
+    elif fmt == "csv" and first and columns:
+        out.write(pd.DataFrame(columns=list(columns)).to_csv(index=False).encode("utf-8"))
+
+
+def _write_parquet(chunks, sink, compression, columns, schema):
+    codec = {"gzip": "gzip", "zstd": "zstd"}.get(compression, "snappy")
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                schema = schema or parquet_schema(chunk, chunk.columns)
+                writer = pq.ParquetWriter(sink, schema, compression=codec)
+            writer.write_table(_arrow_chunk(chunk, schema))
+        if writer is None:
+            schema = schema or pa.schema([(c, pa.string()) for c in columns or ()])
+            writer = pq.ParquetWriter(sink, schema, compression=codec)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_store(store, target, fmt, projection="all fields", fields=(), scope="all", compression="none", chunk_size=CHUNK_ROWS):
+    """Stream the store's events to ``target``; see :func:`export_columns` and :func:`iter_chunks`."""
+    columns = export_columns(store, projection, fields)
+    # Parquet types come from whole columns, so every chunk agrees on them.
+    schema = parquet_schema(store.frame, columns, store.schema) if fmt == "parquet" and len(store) else None
+    write_chunks(iter_chunks(store, columns, scope, chunk_size), target, fmt, compression, columns, schema)
+
+
+def export_store_bytes(store, fmt, **options):
+    """:func:`export_store` into memory."""
+    buffer = io.BytesIO()
+    export_store(store, buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def export_store_file(store, fmt, **options):
+    """:func:`export_store` into an anonymous temporary file, rewound for reading.
+
+    For download buttons: the export goes to disk chunk by chunk instead of
+    into memory, and the file is deleted when the returned reader is closed.
+    """
+    raw = tempfile.TemporaryFile(buffering=0)
+    out = io.BufferedWriter(raw)
+    try:
+        export_store(store, out, fmt, **options)
+        out.flush()
+    except BaseException:
+        out.close()
+        raise
+    out.detach()
+    raw.seek(0)
+    return io.BufferedReader(raw)
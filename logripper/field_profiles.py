@@ -0,0 +1,53 @@
+"""Which event fields the tree view shows, chosen per EventID.
+
+Events of the same type carry the same fields, so display choices are made
+once per EventID (a profile) rather than once per event. Events without a
+profile fall back to the default field list, and a single event can still be
+given its own field list as an override.
+"""
+
+DEFAULT_FIELDS = [
+    "EventID",
+    "Computer",
+    "User",
+    "IntegrityLevel",
+    "Image",
+    "CommandLine",
+    "ProcessId",
+    "ParentProcessId",
+    "ParentImage",
+    "ParentCommandLine",
+    "QueryName",
+    "QueryResults",
+]
+
+FIELD_PROFILES = {
+    # Sysmon: process creation
+    1: ["Computer", "User", "IntegrityLevel", "Image", "CommandLine", "ProcessId", "ParentProcessId", "ParentImage", "ParentCommandLine", "Hashes"],
+    # Sysmon: network connection
+    3: ["Computer", "User", "Image", "Protocol", "SourceIp", "SourcePort", "DestinationIp", "DestinationHostname", "DestinationPort"],
+    # Sysmon: file created
+    11: ["Computer", "User", "Image", "TargetFilename", "CreationUtcTime"],
+    # Sysmon: file stream created (e.g. Zone.Identifier on downloads)
+    15: ["Computer", "User", "Image", "TargetFilename", "Hash", "Contents"],
+    # Sysmon: DNS query
+    22: ["Computer", "User", "Image", "QueryName", "QueryStatus", "QueryResults"],
+    # Security: successful / failed logon
+    4624: ["Computer", "TargetUserName", "TargetDomainName", "LogonType", "IpAddress", "WorkstationName", "LogonProcessName", "AuthenticationPackageName"],
+    4625: ["Computer", "TargetUserName", "TargetDomainName", "LogonType", "IpAddress", "WorkstationName", "Status", "SubStatus", "FailureReason"],
+}
+
+
+def profile_key(event_id):
+    """EventIDs arrive as ints or strings depending on the exporter."""
+    try:
+        return int(event_id)
+    except (TypeError, ValueError):
+        return event_id
+
+
+def fields_for(evt, profiles, default_fields, overrides=None):
+    """Fields to show for ``evt``: its override, else its EventID profile, else the default."""
+    if overrides and evt.get("uuid") in overrides:
+        return overrides[evt["uuid"]]
+    return profiles.get(profile_key(evt.get("EventID")), default_fields)
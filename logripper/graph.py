@@ -0,0 +1,236 @@
+"""Level-of-detail process graph for the pyvis relationship view.
+
+The full graph (:class:`~logripper.event_graph.EventGraph`) has one node per
+visible event. Before it reaches the browser it is reduced to roughly a node budget:
+
+* untagged siblings sharing an ``Image`` collapse into one ``Image ×N`` node;
+* an untagged event whose whole subtree is untagged folds that subtree into
+  its own node;
+* once the budget is spent, the remaining children of a node become one
+  ``+N more`` node.
+
+Events whose keyword risk score reaches :data:`~logripper.keywords.FLAG_SCORE`
+count as tagged here, so they are never folded away. Nodes are colored by tag
+or, with ``color_by="risk"``, by risk score.
+
+Every aggregate node has a stable id, and passing it in ``expanded`` opens it
+up on the next render (drill-down). Positions are computed here as a layered
+tree layout and cached by graph structure, so the browser never runs a physics
+simulation.
+"""
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict, deque
+
+import networkx as nx
+from pyvis.network import Network
+
+from .keywords import FLAG_SCORE
+
+DEFAULT_NODE_BUDGET = 300
+AGGREGATE_COLOR = "#7f8c8d"
+LAYOUT_CACHE_SIZE = 16
+X_SPACING = 180
+Y_SPACING = 140
+COLOR_MODES = ("tag", "risk")
+# (minimum score, color), highest first
+RISK_COLORS = ((2 * FLAG_SCORE, "#c0392b"), (FLAG_SCORE, "#e67e22"), (1, "#f1c40f"), (0, "#bdc3c7"))
+
+_layouts = OrderedDict()
+_layouts_lock = threading.Lock()
+
+
+def risk_color(score):
+    return next(color for minimum, color in RISK_COLORS if (score or 0) >= minimum)
+
+
+def _notable(attrs):
+    return bool(attrs.get("tag")) or (attrs.get("risk") or 0) >= FLAG_SCORE
+
+
+def _subtree_stats(G):
+    """Per node: subtree size and whether anything in it is tagged."""
+    size = {}
+    tagged = {}
+    for root in G:
+        if root in size:
+            continue
+        # Iterative post-order; ProcessGuid links can be cyclic in bad data, so
+        # a node already on the stack is treated as a leaf.
+        stack = [(root, iter(G.successors(root)))]
+        on_stack = {root}
+        size[root], tagged[root] = 1, _notable(G.nodes[root])
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                on_stack.discard(node)
+                if stack:
+                    parent = stack[-1][0]
+                    size[parent] += size[node]
+                    tagged[parent] = tagged[parent] or tagged[node]
+                continue
+            if child in on_stack:
+                continue
+            if child not in size:
+                size[child], tagged[child] = 1, _notable(G.nodes[child])
+                stack.append((child, iter(G.successors(child))))
+                on_stack.add(child)
+            else:
+                size[node] += size[child]
+                tagged[node] = tagged[node] or tagged[child]
+    return size, tagged
+
+
+def _roots(G):
+    roots = [n for n in G if G.in_degree(n) == 0]
+    reached = set()
+    for root in roots:
+        reached.update(nx.descendants(G, root))
+        reached.add(root)
+    # Nodes only reachable through a cycle still need an entry point.
+    roots += [n for n in G if n not in reached]
+    return roots
+
+
+def lod_graph(G, budget=DEFAULT_NODE_BUDGET, expanded=frozenset(), color_by="tag"):
+    """Reduce ``G`` to about ``budget`` nodes; see the module docstring.
+
+    Aggregate nodes carry ``members`` (the event ids they stand for) and
+    ``aggregate=True``. Ids in ``expanded`` are never aggregated.
+    """
+    size, tagged = _subtree_stats(G)
+    view = nx.DiGraph()
+    placed = set()
+
+    def add_aggregate(node_id, parent, label, members):
+        view.add_node(node_id, label=label, color=AGGREGATE_COLOR, shape="box", aggregate=True, members=members)
+        if parent is not None:
+            view.add_edge(parent, node_id)
+        placed.update(members)
+
+    def subtree(node):
+        members = []
+        seen = set()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current in placed or current in seen:
+                continue
+            seen.add(current)
+            members.append(current)
+            stack.extend(G.successors(current))
+        return members
+
+    queue = deque([(None, _roots(G))])
+    while queue:
+        parent, children = queue.popleft()
+        children = [c for c in children if c not in placed]
+        scope = parent if parent is not None else "roots"
+
+        singles = []
+        by_image = defaultdict(list)
+        for child in children:
+            if tagged[child]:
+                singles.append(child)
+            else:
+                by_image[G.nodes[child]["image"]].append(child)
+        for image, group in by_image.items():
+            group_id = f"group:{scope}:{image}"
+            if len(group) > 1 and group_id not in expanded:
+                members = [m for child in group for m in subtree(child)]
+                add_aggregate(group_id, parent, f"{image} ×{len(group)}\n{len(members)} untagged events", members)
+            else:
+                singles.extend(group)
+
+        for index, child in enumerate(singles):
+            if child in placed:
+                continue
+            more_id = f"more:{scope}"
+            if len(view) >= budget and more_id not in expanded:
+                rest = [m for c in singles[index:] if c not in placed for m in subtree(c)]
+                add_aggregate(more_id, parent, f"+{len(singles) - index} more\n{len(rest)} events", rest)
+                break
+            fold_id = f"fold:{child}"
+            if not tagged[child] and size[child] > 1 and fold_id not in expanded:
+                members = subtree(child)
+                add_aggregate(fold_id, parent, f"{G.nodes[child]['label']}\n+{len(members) - 1} untagged descendants", members)
+                continue
+            attrs = G.nodes[child]
+            color = risk_color(attrs.get("risk")) if color_by == "risk" else attrs["color"]
+            view.add_node(child, label=attrs["label"], color=color)
+            if parent is not None:
+                view.add_edge(parent, child)
+            placed.add(child)
+            queue.append((child, list(G.successors(child))))
+    return view
+
+
+def _structure_key(view):
+    digest = hashlib.sha256()
+    for node in view:
+        digest.update(f"n{node}\0".encode("utf-8"))
+    for parent, child in view.edges:
+        digest.update(f"e{parent}\0{child}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def tree_layout(view):
+    """Layered positions: depth sets y, leaves are spread along x and parents centred."""
+    key = _structure_key(view)
+    with _layouts_lock:
+        if key in _layouts:
+            _layouts.move_to_end(key)
+            return _layouts[key]
+
+    positions = {}
+    next_x = 0
+    for root in _roots(view):
+        if root in positions:
+            continue
+        stack = [(root, 0, iter(view.successors(root)))]
+        positions[root] = None
+        while stack:
+            node, depth, children = stack[-1]
+            child = next(children, None)
+            if child is not None:
+                if child not in positions:
+                    positions[child] = None
+                    stack.append((child, depth + 1, iter(view.successors(child))))
+                continue
+            stack.pop()
+            xs = [positions[c][0] for c in view.successors(node) if positions.get(c) is not None]
+            if xs:
+                x = (min(xs) + max(xs)) / 2
+            else:
+                x, next_x = next_x, next_x + X_SPACING
+            positions[node] = (x, depth * Y_SPACING)
+
+    with _layouts_lock:
+        _layouts[key] = positions
+        while len(_layouts) > LAYOUT_CACHE_SIZE:
+            _layouts.popitem(last=False)
+    return positions
+
+
+def render_html(view, height="600px"):
+    """Self-contained pyvis HTML for ``view`` with precomputed, fixed positions."""
+    positions = tree_layout(view)
+    net = Network(height=height, width="100%", directed=True, cdn_resources="in_line")
+    # Ids go to vis.js as strings; 63-bit event ids don't survive as JS numbers.
+    for node, attrs in view.nodes(data=True):
+        x, y = positions[node]
+        net.add_node(
+            str(node),
+            label=attrs["label"],
+            color=attrs["color"],
+            shape=attrs.get("shape", "dot"),
+            x=x,
+            y=y,
+            physics=False,
+        )
+    for parent, child in view.edges:
+        net.add_edge(str(parent), str(child))
+    net.toggle_physics(False)
+    return net.generate_html()
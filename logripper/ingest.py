@@ -0,0 +1,139 @@
+"""Streaming readers for EVTX-converted JSON exports and raw ``.evtx`` files.
+
+The PowerShell scripts export a single top-level JSON array (UTF-16 from
+Windows PowerShell 5.1 ``Out-File``, UTF-8 elsewhere). Other tooling emits
+newline-delimited JSON. Both are decoded incrementally here so memory use is
+bounded by the read size and batch size rather than the size of the export.
+Native ``.evtx`` files are recognised by their signature and decoded by
+:mod:`logripper.evtx` into the same event shape.
+"""
+import codecs
+import hashlib
+import json
+from itertools import islice
+
+from .evtx import is_evtx, iter_evtx
+
+READ_SIZE = 1 << 20
+BATCH_SIZE = 5000
+
+_WHITESPACE = " \t\r\n"
+
+
+def flatten_event(evt):
+    """Lift ``DataValues`` Name/Value pairs to top-level fields."""
+    flat = {k: v for k, v in evt.items() if k != "DataValues"}
+    data_values = evt.get("DataValues") or []
+    if isinstance(data_values, dict):
+        data_values = [data_values]
+    for item in data_values:
+        flat[item["Name"]] = item["Value"]
+    return flat
+
+
+def _stream_size(file):
+    start = file.tell()
+    size = file.seek(0, 2)
+    file.seek(start)
+    return size - start
+
+
+def _detect_encoding(file):
+    start = file.tell()
+    head = file.read(4)
+    file.seek(start)
+    return json.detect_encoding(head) if head else "utf-8"
+
+
+def iter_json_values(file, progress=None):
+    """Yield top-level JSON values from a binary file object.
+
+    A top-level array is unpacked element by element; otherwise consecutive
+    values are yielded in order, which covers NDJSON and single-object files.
+    ``progress`` is called with the fraction of bytes consumed so far.
+    """
+    total = _stream_size(file)
+    decoder = codecs.getincrementaldecoder(_detect_encoding(file))()
+    json_decoder = json.JSONDecoder()
+    consumed = 0
+    buf = ""
+    pos = 0
+    eof = False
+    in_array = None
+
+    def fill():
+        nonlocal buf, pos, consumed, eof
+        chunk = file.read(READ_SIZE)
+        consumed += len(chunk)
+        eof = not chunk
+        buf = buf[pos:] + decoder.decode(chunk, final=eof)
+        pos = 0
+        if progress is not None and total:
+            progress(min(consumed / total, 1.0))
+        return not eof
+
+    fill()
+    while True:
+        while pos < len(buf) and (buf[pos] in _WHITESPACE or (in_array and buf[pos] == ",")):
+            pos += 1
+        if pos >= len(buf):
+            if fill():
+                continue
+            return
+        if in_array is None:
+            in_array = buf[pos] == "["
+            if in_array:
+                pos += 1
+            continue
+        if in_array and buf[pos] == "]":
+            return
+        try:
+            value, end = json_decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if end == len(buf) and not eof:
+            # A scalar cut at the buffer edge still decodes; read on to be sure.
+            fill()
+            continue
+        pos = end
+        if not in_array and isinstance(value, list):
+            yield from value
+        else:
+            yield value
+
+
+def iter_events(file, progress=None, workers=1):
+    """Yield flattened events from an EVTX-converted JSON or NDJSON export or an ``.evtx`` file.
+
+    ``workers`` processes decode ``.evtx`` chunks; it has no effect on JSON.
+    """
+    if is_evtx(file):
+        values = iter_evtx(file, progress=progress, workers=workers)
+    else:
+        values = iter_json_values(file, progress=progress)
+    for evt in values:
+        if isinstance(evt, dict):
+            yield flatten_event(evt)
+
+
+def iter_batches(iterable, size=BATCH_SIZE):
+    """Group ``iterable`` into lists of at most ``size`` items."""
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def hash_file(file):
+    """SHA-256 hex digest of a binary file object, read in chunks."""
+    start = file.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(READ_SIZE), b""):
+        digest.update(chunk)
+    file.seek(start)
+    return digest.hexdigest()
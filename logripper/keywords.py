@@ -0,0 +1,225 @@
+"""Suspicious-keyword scoring, ported from ``TheLogRipper2.0.ps1``.
+
+The PowerShell script runs one regex of suspicious strings over each
+``DataValues`` value in turn. Here the keywords are matched over a whole
+batch at once: the distinct field values not seen before are lowercased and
+joined into one byte buffer, each keyword is located in it with vectorized
+numpy comparisons (starting from its rarest byte, so only a few candidate
+offsets are checked), and hit offsets are mapped back to values with a binary
+search, so no Python code runs per hit. Values already scanned are answered
+from a cache, so the common case (the same ``Image`` or ``ParentImage`` on
+thousands of events) costs one dict lookup. Re-scoring a stored frame scans
+each column's distinct values once and spreads the results by code.
+
+Each event gets ``risk_score``, the summed weight of the distinct keywords
+found in its event data fields, and ``matched_keywords``. Matching is
+case-insensitive, like PowerShell's ``-match``, and with the default weights
+of 1 an event scoring at least :data:`FLAG_SCORE` is one the script would
+have flagged.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from .dedup import DERIVED_FIELDS
+
+DEFAULT_KEYWORDS = {
+    "shutdown": 1,
+    ".exe": 1,
+    "MXNfYV": 1,
+    "base64": 1,
+    "powershell": 1,
+    "cmd.exe": 1,
+    "wscript": 1,
+    "reg add": 1,
+    "bypass": 1,
+    "Invoke-": 1,
+    "curl": 1,
+    "wget": 1,
+    "whoami": 1,
+    "Get-ComputerInfo": 1,
+}
+FLAG_SCORE = 2
+KEYWORD_SEPARATOR = ", "
+SCORE_FIELDS = ("risk_score", "matched_keywords")
+
+# Event header fields and the raw XML copy; the script only scored DataValues.
+HEADER_FIELDS = frozenset({
+    "TimeCreated", "EventID", "EventRecordID", "ProviderName", "Version", "Level", "Task", "Opcode",
+    "ProcessID", "ThreadID", "Channel", "Computer", "UserID", "PrettyXml", "Message",
+})
+SKIP_FIELDS = HEADER_FIELDS | DERIVED_FIELDS
+CACHE_SIZE = 1 << 20
+_SEPARATOR = "\0"
+_SAMPLE_STRIDE = 61
+
+
+def _find_all(data, patterns):
+    """Start offsets of each of ``patterns`` (uint8 arrays) in the bytes ``data``.
+
+    Each pattern is anchored on its rarest byte (by a sampled histogram); one
+    pass over the buffer collects the offsets of every anchor byte, and each
+    pattern then checks its other bytes at its own anchors' offsets only.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    counts = np.bincount(buffer[::_SAMPLE_STRIDE], minlength=256)
+    anchors = [int(np.argmin(counts[pattern])) for pattern in patterns]
+    wanted = bytearray(256)
+    for pattern, anchor in zip(patterns, anchors):
+        wanted[pattern[anchor]] = 1
+    positions = np.flatnonzero(np.frombuffer(data.translate(wanted), dtype=bool))
+    found = buffer[positions]
+    for pattern, anchor in zip(patterns, anchors):
+        hits = positions[found == pattern[anchor]] - anchor
+        hits = hits[(hits >= 0) & (hits <= len(buffer) - len(pattern))]
+        for offset in np.argsort(counts[pattern], kind="stable").tolist():
+            if offset != anchor and len(hits):
+                hits = hits[buffer[hits + offset] == pattern[offset]]
+        yield hits
+
+
+def load_keywords(path):
+    """``{keyword: weight}`` from a JSON object file."""
+    with open(path, "r", encoding="utf-8") as f:
+        weights = json.load(f)
+    if not isinstance(weights, dict) or not all(isinstance(w, (int, float)) for w in weights.values()):
+        raise ValueError(f"{path}: expected a JSON object mapping keywords to numeric weights")
+    return weights
+
+
+class KeywordScorer:
+    """Score events against ``weights`` (``{keyword: weight}``)."""
+
+    def __init__(self, weights=DEFAULT_KEYWORDS):
+        merged = {}
+        for keyword, weight in weights.items():
+            if keyword:
+                merged[keyword.lower()] = merged.get(keyword.lower(), 0) + weight
+        self.weights = merged
+        self.keywords = list(merged)
+        self._cache = {"": 0}
+        self._results = {0: (0, "")}
+        self._patterns = [np.frombuffer(keyword.encode("utf-8"), dtype=np.uint8) for keyword in self.keywords]
+        # One bit per keyword; past 63 keywords the masks are Python ints.
+        self._mask_dtype = object if len(self.keywords) > 63 else np.int64
+
+    # --- Scanning ---
+    def _masks(self, values):
+        """Bitmask of the keywords in each of ``values`` (strings), as an array."""
+        masks = np.zeros(len(values), dtype=self._mask_dtype)
+        if not self.keywords or not len(values):
+            return masks
+        text = _SEPARATOR.join(values)
+        if text.isascii():
+            data = text.encode("ascii").lower()
+            lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        else:
+            # Offsets are in bytes, and a few characters change length when lowered.
+            lowered = [value.lower().encode("utf-8") for value in values]
+            data = _SEPARATOR.encode("ascii").join(lowered)
+            lengths = np.fromiter(map(len, lowered), dtype=np.int64, count=len(values))
+        starts = np.cumsum(lengths + 1) - lengths - 1
+        for index, hits in enumerate(_find_all(data, self._patterns)):
+            if not len(hits):
+                continue
+            owners = np.searchsorted(starts, hits, side="right") - 1
+            if self._mask_dtype is object:
+                masks[owners] = [mask | 1 << index for mask in masks[owners].tolist()]
+            else:
+                masks[owners] |= 1 << index
+        return masks
+
+    def _lookup(self, values):
+        """Keyword masks of ``values`` (a list of strings), filling the cache with the new ones."""
+        cache = self._cache
+        cached = cache.get
+        masks = [cached(value) for value in values]
+        missing = [index for index, mask in enumerate(masks) if mask is None]
+        if not missing:
+            return masks
+        codes, misses = pd.factorize(np.array([values[index] for index in missing], dtype=object))
+        misses = misses.tolist()
+        found = self._masks(misses).tolist()
+        if len(cache) + len(misses) > CACHE_SIZE:
+            cache.clear()
+            cache[""] = 0
+        cache.update(zip(misses, found))
+        for index, code in zip(missing, codes.tolist()):
+            masks[index] = found[code]
+        return masks
+
+    def _result(self, mask):
+        result = self._results.get(mask)
+        if result is None:
+            found = [index for index in range(len(self.keywords)) if mask >> index & 1]
+            result = self._results[mask] = (
+                sum(self.weights[self.keywords[i]] for i in found),
+                KEYWORD_SEPARATOR.join(self.keywords[i] for i in found),
+            )
+        return result
+
+    # --- Scoring ---
+    def score(self, events):
+        """Set ``risk_score``/``matched_keywords`` on ``events`` in place."""
+        cached = self._cache.get
+        masks = []
+        misses = []
+        for index, evt in enumerate(events):
+            mask = 0
+            for field, value in evt.items():
+                if type(value) is str and field not in SKIP_FIELDS:
+                    hit = cached(value)
+                    if hit is None:
+                        misses.append((index, value))
+                    else:
+                        mask |= hit
+            masks.append(mask)
+        if misses:
+            for (index, _), hit in zip(misses, self._lookup([value for _, value in misses])):
+                masks[index] |= hit
+        for evt, mask in zip(events, masks):
+            evt["risk_score"], evt["matched_keywords"] = self._result(mask)
+        return events
+
+    def score_frame(self, frame):
+        """``(risk_score, matched_keywords)`` arrays for every row of a stored frame.
+
+        Each column's distinct values are scanned once and spread to rows by
+        code; the cache is left alone, since a frame is scored with a scorer
+        built for new weights.
+        """
+        masks = np.zeros(len(frame), dtype=self._mask_dtype)
+        for column in frame.columns:
+            if column in SKIP_FIELDS:
+                continue
+            series = frame[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+            elif series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+                codes, uniques = pd.factorize(series)
+            else:
+                continue
+            strings = [value if type(value) is str else "" for value in uniques.tolist()]
+            # Code -1 (missing) picks the trailing 0.
+            masks |= np.append(self._masks(strings), 0).astype(self._mask_dtype)[codes]
+        distinct, inverse = np.unique(masks, return_inverse=True)
+        results = [self._result(mask) for mask in distinct.tolist()]
+        scores = np.array([score for score, _ in results])[inverse]
+        matched = np.array([keywords for _, keywords in results], dtype=object)[inverse]
+        return scores, matched
+
+
+def rescore(store, scorer):
+    """Score every stored event with ``scorer``; returns the ids whose score changed."""
+    frame = store.frame
+    if not len(frame):
+        return []
+    scores, matched = scorer.score_frame(frame)
+    changed = np.ones(len(frame), dtype=bool)
+    if all(field in frame.columns for field in SCORE_FIELDS):
+        current = frame["risk_score"].astype(object).where(frame["risk_score"].notna(), None).to_numpy()
+        changed = (current != scores) | (frame["matched_keywords"].astype(object).to_numpy() != matched)
+    event_ids = frame["uuid"].to_numpy()[changed].tolist()
+    store.update_many(event_ids, risk_score=scores[changed].tolist(), matched_keywords=matched[changed].tolist())
+    return event_ids
@@ -0,0 +1,210 @@
+"""Authentication-event filters (4624/4625), ported from ``TheLogRipper2.0.ps1``.
+
+The PowerShell script asks for LogonType, TargetUserName, IpAddress,
+WorkstationName and "external IPs only" filters and checks them per event
+with ``-match`` while the log is read. Here the :class:`LogonIndex` keeps the
+fields those filters need as integer columns, filled in once as events are
+stored:
+
+* ``LogonType`` as a small int;
+* ``IpAddress`` parsed once per distinct value into a 128-bit integer (IPv4
+  as its IPv4-mapped IPv6 address), split over two ``uint64`` columns, so an
+  address, a CIDR block or the private/external split is a range check;
+* ``TargetUserName`` and ``WorkstationName`` as codes into a table of
+  lowercased values (the script's ``-ne`` compares case-insensitively).
+
+A :class:`LogonFilter` then turns into a boolean mask over the store's rows
+with a handful of vectorized comparisons, whatever the size of the case.
+"""
+import ipaddress
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+AUTH_EVENT_IDS = (4624, 4625)
+LOGON_FIELDS = ("LogonType", "TargetUserName", "IpAddress", "WorkstationName")
+# Is-PrivateIP in TheLogRipper2.0.ps1, plus loopback, link-local and IPv6 private ranges.
+INTERNAL_NETWORKS = (
+    "10.0.0.0/8",
+    "172.16.0.0/12",
+    "192.168.0.0/16",
+    "127.0.0.0/8",
+    "169.254.0.0/16",
+    "::1/128",
+    "fe80::/10",
+    "fc00::/7",
+)
+
+_AUTH_KEYS = frozenset(AUTH_EVENT_IDS) | frozenset(str(e) for e in AUTH_EVENT_IDS)
+_IPV4_MAPPED = 0xFFFF << 32
+_LOW = (1 << 64) - 1
+_MISSING_TYPE = -1
+_MISSING_CODE = -1
+
+
+def _present(value):
+    return value is not None and value is not pd.NA and value == value and value not in ("", "-")
+
+
+def ip_number(value):
+    """``value`` as a 128-bit integer (IPv4 mapped into IPv6), or ``None`` if it isn't an address."""
+    try:
+        address = ipaddress.ip_address(str(value).strip())
+    except ValueError:
+        return None
+    if address.version == 4:
+        return _IPV4_MAPPED | int(address)
+    return int(address)
+
+
+def network_bounds(cidr):
+    """First and last address of ``cidr`` (an address or CIDR block) as 128-bit integers.
+
+    Raises ``ValueError`` for anything else.
+    """
+    network = ipaddress.ip_network(cidr.strip(), strict=False)
+    first, last = int(network.network_address), int(network.broadcast_address)
+    if network.version == 4:
+        first, last = _IPV4_MAPPED | first, _IPV4_MAPPED | last
+    return first, last
+
+
+def _split(number):
+    return number >> 64, number & _LOW
+
+
+@dataclass(frozen=True)
+class LogonFilter:
+    """Logon-event filters; empty fields don't filter. ``ip`` is an address or CIDR block."""
+
+    logon_types: tuple = ()
+    users: tuple = ()
+    workstations: tuple = ()
+    ip: str = ""
+    external_only: bool = False
+
+    @property
+    def active(self):
+        return bool(self.logon_types or self.users or self.workstations or self.ip or self.external_only)
+
+
+class LogonIndex:
+    def __init__(self):
+        self._codes = {"TargetUserName": {}, "WorkstationName": {}}
+        self._ips = {}
+        self._pending = []
+        self._columns = {
+            "auth": np.zeros(0, dtype=bool),
+            "LogonType": np.zeros(0, dtype=np.int16),
+            "TargetUserName": np.zeros(0, dtype=np.int32),
+            "WorkstationName": np.zeros(0, dtype=np.int32),
+            "ip_known": np.zeros(0, dtype=bool),
+            "ip_high": np.zeros(0, dtype=np.uint64),
+            "ip_low": np.zeros(0, dtype=np.uint64),
+        }
+
+    def __len__(self):
+        return len(self._columns["auth"]) + sum(len(part["auth"]) for part in self._pending)
+
+    def _code(self, field, value):
+        if not _present(value):
+            return _MISSING_CODE
+        codes = self._codes[field]
+        key = str(value).lower()
+        code = codes.get(key)
+        if code is None:
+            code = codes[key] = len(codes)
+        return code
+
+    def _ip(self, value):
+        if not _present(value):
+            return None
+        key = str(value)
+        if key not in self._ips:
+            self._ips[key] = ip_number(key)
+        return self._ips[key]
+
+    @staticmethod
+    def _logon_type(value):
+        try:
+            return int(str(value).strip())
+        except ValueError:
+            return _MISSING_TYPE
+
+    def _part(self, event_ids, logon_types, users, workstations, ips):
+        self._pending.append({
+            "auth": np.fromiter((e in _AUTH_KEYS for e in event_ids), dtype=bool, count=len(event_ids)),
+            "LogonType": np.array([self._logon_type(v) if _present(v) else _MISSING_TYPE for v in logon_types], dtype=np.int16),
+            "TargetUserName": np.array([self._code("TargetUserName", v) for v in users], dtype=np.int32),
+            "WorkstationName": np.array([self._code("WorkstationName", v) for v in workstations], dtype=np.int32),
+            "ip_known": np.fromiter((n is not None for n in ips), dtype=bool, count=len(ips)),
+            "ip_high": np.array([0 if n is None else n >> 64 for n in ips], dtype=np.uint64),
+            "ip_low": np.array([0 if n is None else n & _LOW for n in ips], dtype=np.uint64),
+        })
+
+    # --- Maintenance (called by the store with each batch it appends) ---
+    def add(self, events):
+        event_ids, logon_types, users, workstations, ips = [], [], [], [], []
+        for evt in events:
+            event_ids.append(evt.get("EventID"))
+            logon_types.append(evt.get("LogonType"))
+            users.append(evt.get("TargetUserName"))
+            workstations.append(evt.get("WorkstationName"))
+            ips.append(self._ip(evt.get("IpAddress")))
+        self._part(event_ids, logon_types, users, workstations, ips)
+
+    def add_frame(self, frame):
+        def column(field):
+            if field not in frame.columns:
+                return [None] * len(frame)
+            return frame[field].astype(object).tolist()
+
+        self._part(
+            column("EventID"),
+            column("LogonType"),
+            column("TargetUserName"),
+            column("WorkstationName"),
+            [self._ip(v) for v in column("IpAddress")],
+        )
+
+    def _consolidate(self):
+        if self._pending:
+            parts = [self._columns, *self._pending]
+            self._columns = {name: np.concatenate([part[name] for part in parts]) for name in self._columns}
+            self._pending = []
+        return self._columns
+
+    # --- Queries ---
+    def _in_range(self, columns, first, last):
+        high, low = columns["ip_high"], columns["ip_low"]
+        (first_high, first_low), (last_high, last_low) = _split(first), _split(last)
+        above = (high > first_high) | ((high == first_high) & (low >= first_low))
+        below = (high < last_high) | ((high == last_high) & (low <= last_low))
+        return columns["ip_known"] & above & below
+
+    def mask(self, logon_filter):
+        """Rows of 4624/4625 events matching every filter in ``logon_filter``.
+
+        Raises ``ValueError`` if ``logon_filter.ip`` isn't an address or CIDR block.
+        """
+        columns = self._consolidate()
+        mask = columns["auth"].copy()
+        if logon_filter.logon_types:
+            mask &= np.isin(columns["LogonType"], [self._logon_type(t) for t in logon_filter.logon_types])
+        for field, values in (("TargetUserName", logon_filter.users), ("WorkstationName", logon_filter.workstations)):
+            if values:
+                codes = [self._codes[field].get(str(v).lower(), _MISSING_CODE - 1) for v in values]
+                mask &= np.isin(columns[field], codes)
+        if logon_filter.ip or logon_filter.external_only:
+            # Address checks only run on the rows still in play.
+            rows = np.flatnonzero(mask)
+            candidates = {name: columns[name][rows] for name in ("ip_known", "ip_high", "ip_low")}
+            keep = candidates["ip_known"].copy()
+            if logon_filter.ip:
+                keep &= self._in_range(candidates, *network_bounds(logon_filter.ip))
+            if logon_filter.external_only:
+                for network in INTERNAL_NETWORKS:
+                    keep &= ~self._in_range(candidates, *network_bounds(network))
+            mask[rows[~keep]] = False
+        return mask
@@ -0,0 +1,166 @@
+"""The parse → dedup → score → tag → store ingest pipeline.
+
+Both Streamlit viewers and the ``python -m logripper`` CLI drive ingest
+through these functions so events are shaped, deduplicated and tagged the
+same way everywhere.
+"""
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+
+from .dedup import event_id
+from .ingest import iter_batches, iter_events
+from .keywords import DEFAULT_KEYWORDS, KeywordScorer
+from .store import EventStore
+from .timestamps import event_timestamp
+from .yara_tagging import DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, SCAN_FIELDS, YaraTagger
+
+ANNOTATION_DEFAULTS = {"tag": "", "notes": "", "mitre": ""}
+YARA_DEFAULTS = {"yara_rule": "", "tag_source": ""}
+QUEUED_BATCHES = 4  # parsed batches a worker may get ahead of ingest, per file
+
+
+def parse_file(file, progress=None, yara=False, workers=1):
+    """Yield flattened events from ``file`` with a derived id, a normalized ``ts`` and empty annotations.
+
+    The id keeps the ``uuid`` field name the viewers and exports have always used.
+    """
+    for flat in iter_events(file, progress=progress, workers=workers):
+        flat["uuid"] = event_id(flat)
+        flat["ts"] = event_timestamp(flat)
+        flat.update(ANNOTATION_DEFAULTS)
+        if yara:
+            flat.update(YARA_DEFAULTS)
+        yield flat
+
+
+class StageStats:
+    """Item counts and wall time per pipeline stage, for throughput reports."""
+
+    def __init__(self):
+        self.items = {}
+        self.seconds = {}
+
+    def record(self, stage, items, seconds):
+        self.items[stage] = self.items.get(stage, 0) + items
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def lines(self):
+        for stage, items in self.items.items():
+            seconds = self.seconds[stage]
+            rate = items / seconds if seconds else 0.0
+            yield f"{stage:<8} {items:>10,} events  {seconds:8.2f}s  {rate:>12,.0f} events/s"
+
+
+def _parse_path(path, yara, batches):
+    # Runs in a worker; a None marks the end of the file, even when parsing fails.
+    try:
+        with open(path, "rb") as file:
+            for batch in iter_batches(parse_file(file, yara=yara)):
+                batches.put(batch)
+    finally:
+        batches.put(None)
+
+
+def _parsed_batches(paths, jobs, yara, stats):
+    """Parsed batches for ``paths`` in order, parsing up to ``jobs`` files at once."""
+    if jobs <= 1 or len(paths) <= 1:
+        for path in paths:
+            with open(path, "rb") as file:
+                # With one file at a time, the jobs go to decoding its EVTX chunks instead.
+                events = parse_file(file, yara=yara, workers=jobs)
+                while True:
+                    started = time.perf_counter()
+                    batch = next(iter_batches(events), None)
+                    if batch is None:
+                        break
+                    stats.record("parse", len(batch), time.perf_counter() - started)
+                    yield path, batch
+        return
+
+    # Workers stream each file's batches through a bounded queue, so at most
+    # jobs * QUEUED_BATCHES parsed batches are held at once. The manager is
+    # shut down first on the way out, which unblocks workers still putting.
+    with ProcessPoolExecutor(max_workers=jobs) as pool, multiprocessing.Manager() as manager:
+        pending = []
+        queue = list(paths)
+        while queue or pending:
+            while queue and len(pending) < jobs:
+                path = queue.pop(0)
+                batches = manager.Queue(QUEUED_BATCHES)
+                pending.append((path, batches, pool.submit(_parse_path, path, yara, batches)))
+            path, batches, future = pending.pop(0)
+            while True:
+                # Parsing overlaps the later stages, so count only the time spent waiting on it
+                started = time.perf_counter()
+                batch = batches.get()
+                if batch is None:
+                    break
+                stats.record("parse", len(batch), time.perf_counter() - started)
+                yield path, batch
+            future.result()
+
+
+def ingest_batches(batches, store, tagger=None, stats=None, scorer=None):
+    """Dedup, score, tag and store parsed batches, yielding each batch once it is stored.
+
+    Events whose dedup key (see :mod:`logripper.dedup`) is already in ``store``,
+    including repeats earlier in the same upload, are dropped before tagging.
+    With a ``scorer`` (a :class:`~logripper.keywords.KeywordScorer`) events get
+    ``risk_score`` and ``matched_keywords``.
+    """
+    stats = StageStats() if stats is None else stats
+    for batch in batches:
+        started = time.perf_counter()
+        accepted = store.dedup.new_events(batch)
+        stats.record("dedup", len(batch), time.perf_counter() - started)
+
+        if scorer is not None:
+            started = time.perf_counter()
+            scorer.score(accepted)
+            stats.record("score", len(accepted), time.perf_counter() - started)
+
+        if tagger is not None and tagger.rules is not None:
+            started = time.perf_counter()
+            tagger.tag(accepted)
+            stats.record("tag", len(accepted), time.perf_counter() - started)
+
+        started = time.perf_counter()
+        store.append(accepted)
+        stats.record("store", len(accepted), time.perf_counter() - started)
+        yield accepted
+
+
+def ingest_paths(
+    paths,
+    rules=None,
+    rules_source=None,
+    store=None,
+    jobs=1,
+    workers=DEFAULT_WORKERS,
+    batch_size=DEFAULT_BATCH_SIZE,
+    scan_fields=SCAN_FIELDS,
+    keywords=DEFAULT_KEYWORDS,
+    stats=None,
+    log=sys.stderr,
+):
+    """Ingest JSON/NDJSON exports or ``.evtx`` files at ``paths`` into ``store`` (a new one by default).
+
+    Events are scored against ``keywords`` (``{keyword: weight}``; ``None`` skips scoring).
+    ``rules_source`` is the source ``rules`` were compiled from, which lets YARA scan batches as one buffer.
+    """
+    store = EventStore() if store is None else store
+    scorer = KeywordScorer(keywords) if keywords is not None else None
+    stats = StageStats() if stats is None else stats
+    parsed = groupby(_parsed_batches(list(paths), jobs, rules is not None, stats), key=itemgetter(0))
+    with YaraTagger(rules, workers=workers, batch_size=batch_size, fields=scan_fields, source=rules_source) as tagger:
+        for path, file_batches in parsed:
+            if log is not None:
+                print(f"ingesting {path}", file=log)
+            batches = (batch for _, batch in file_batches)
+            for _ in ingest_batches(batches, store, tagger, stats, scorer):
+                pass
+    return store
@@ -0,0 +1,116 @@
+"""ProcessGuid lookups for linking process events to their parents and children.
+
+The index is keyed by event id and kept up to date as the owning
+:class:`~logripper.store.EventStore` appends, hides and unhides events, so the
+graph and tree views never rescan the whole case to find a parent.
+"""
+from collections import defaultdict
+
+
+class ProcessIndex:
+    def __init__(self):
+        self._by_guid = defaultdict(list)
+        self._children = defaultdict(list)
+        self._guid = {}
+        self._parent_guid = {}
+        self._visible_per_guid = defaultdict(int)
+        self._hidden = set()
+        self._roots = set()
+
+    def _is_root(self, event_id):
+        parent_guid = self._parent_guid.get(event_id)
+        return not parent_guid or not self._visible_per_guid.get(parent_guid)
+
+    def _show(self, event_id):
+        guid = self._guid.get(event_id)
+        if guid:
+            self._visible_per_guid[guid] += 1
+            if self._visible_per_guid[guid] == 1:
+                self._roots.difference_update(self._children.get(guid, ()))
+        if self._is_root(event_id):
+            self._roots.add(event_id)
+
+    def _conceal(self, event_id):
+        self._roots.discard(event_id)
+        guid = self._guid.get(event_id)
+        if guid:
+            self._visible_per_guid[guid] -= 1
+            if not self._visible_per_guid[guid]:
+                self._roots.update(c for c in self._children.get(guid, ()) if c not in self._hidden)
+
+    # --- Maintenance ---
+    def add(self, events):
+        """Index a batch of event dicts carrying ``uuid`` and the process GUID fields."""
+        for evt in events:
+            event_id = evt["uuid"]
+            guid = evt.get("ProcessGuid")
+            parent_guid = evt.get("ParentProcessGuid")
+            if guid:
+                self._guid[event_id] = guid
+                self._by_guid[guid].append(event_id)
+            if parent_guid:
+                self._parent_guid[event_id] = parent_guid
+                self._children[parent_guid].append(event_id)
+            self._show(event_id)
+
+    def add_frame(self, event_ids, guids, parent_guids, hidden=()):
+        """Index stored events in one pass (e.g. a reopened case); ``hidden`` ones start hidden.
+
+        ``guids`` and ``parent_guids`` are aligned with ``event_ids``, ``None`` where missing.
+        """
+        event_ids = list(event_ids)
+        self._hidden.update(hidden)
+        shown_guids = set()
+        for event_id, guid, parent_guid in zip(event_ids, guids, parent_guids):
+            if guid:
+                self._guid[event_id] = guid
+                self._by_guid[guid].append(event_id)
+                if event_id not in self._hidden:
+                    if not self._visible_per_guid[guid]:
+                        shown_guids.add(guid)
+                    self._visible_per_guid[guid] += 1
+            if parent_guid:
+                self._parent_guid[event_id] = parent_guid
+                self._children[parent_guid].append(event_id)
+        for guid in shown_guids:
+            self._roots.difference_update(self._children.get(guid, ()))
+        self._roots.update(e for e in event_ids if e not in self._hidden and self._is_root(e))
+
+    def hide(self, event_id):
+        if event_id not in self._hidden:
+            self._hidden.add(event_id)
+            self._conceal(event_id)
+
+    def unhide(self, event_id):
+        if event_id in self._hidden:
+            self._hidden.discard(event_id)
+            self._show(event_id)
+
+    # --- Queries (visible events only) ---
+    def guid_of(self, event_id):
+        return self._guid.get(event_id)
+
+    def events_for(self, guid):
+        """Events whose ProcessGuid is ``guid``, in ingest order."""
+        return [e for e in self._by_guid.get(guid, ()) if e not in self._hidden]
+
+    def first_event(self, guid):
+        """First event for process ``guid``, or ``None``."""
+        return next((e for e in self._by_guid.get(guid, ()) if e not in self._hidden), None)
+
+    def parent_of(self, event_id):
+        """First event for the parent process of ``event_id``, or ``None``."""
+        parent_guid = self._parent_guid.get(event_id)
+        if not parent_guid:
+            return None
+        return self.first_event(parent_guid)
+
+    def children_of(self, guid):
+        """Events whose ParentProcessGuid is ``guid``, in ingest order."""
+        if not guid:
+            return []
+        return [e for e in self._children.get(guid, ()) if e not in self._hidden]
+
+    def roots(self):
+        """Events with no visible parent process."""
+        return set(self._roots)
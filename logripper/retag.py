@@ -0,0 +1,97 @@
+"""Retroactive re-tagging of stored events after the YARA rules change.
+
+Only the difference between the rule set the stored tags reflect and the new
+one is re-evaluated: events that matched a removed or modified rule are
+re-scanned against the full new rule set, and every other event is scanned
+against just the added and modified rules. Changes that can alter matches
+without showing in any event's ``yara_rule`` (imports, private and global
+rules, rules other rules' conditions use) re-scan every event in full. Tags
+set by an analyst are never overwritten; only their ``yara_rule`` list is
+refreshed.
+"""
+import yara
+
+from .yara_rules import compile_subset, diff_rules
+from .yara_tagging import DEFAULT_BATCH_SIZE, RULE_SEPARATOR, match_batch, supports_batch_scan, tag_fields
+
+
+def rule_names(yara_rule):
+    return [name for name in (yara_rule or "").split(RULE_SEPARATOR) if name]
+
+
+def _scan(rules, source, items, batch_size):
+    batch_scan = supports_batch_scan(rules, source)
+    for start in range(0, len(items), batch_size):
+        chunk = items[start:start + batch_size]
+        texts = [text for _, text, _ in chunk]
+        if batch_scan:
+            matches = match_batch(rules, texts)
+        else:
+            matches = [rules.match(data=text) for text in texts]
+        for (event_id, _, _), event_matches in zip(chunk, matches):
+            yield event_id, tag_fields(event_matches)
+
+
+def rescan(snapshot, old_source, new_source, rules, batch_size=DEFAULT_BATCH_SIZE):
+    """Re-evaluate ``snapshot`` after a change from ``old_source`` to ``new_source``.
+
+    ``snapshot`` holds ``(event_id, scan_text, yara_rule)`` tuples and ``rules``
+    is the compiled ``new_source``. Returns ``{event_id: (full, fields)}`` for
+    events whose tags may change: ``full`` results replace the event's YARA
+    fields (``fields`` is ``None`` when nothing matches any more), partial
+    results add newly matching rules.
+    """
+    diff = diff_rules(old_source, new_source)
+    if diff.unchanged:
+        return {}
+
+    stale = set(diff.removed).union(diff.modified)
+    if diff.header_changed or diff.shared_changed:
+        full_items, partial_items = list(snapshot), []
+    else:
+        full_items = [item for item in snapshot if stale.intersection(rule_names(item[2]))]
+        partial_items = [item for item in snapshot if not stale.intersection(rule_names(item[2]))]
+
+    delta_names = diff.added + diff.modified
+    delta_rules = None
+    if partial_items and delta_names:
+        try:
+            delta_rules = compile_subset(new_source, delta_names)
+        except yara.Error:
+            # Rules that reference others can't be compiled alone; rescan in full.
+            full_items, partial_items = list(snapshot), []
+
+    results = {event_id: (True, fields) for event_id, fields in _scan(rules, new_source, full_items, batch_size)}
+    if delta_rules is not None:
+        for event_id, fields in _scan(delta_rules, new_source, partial_items, batch_size):
+            if fields:
+                results[event_id] = (False, fields)
+    return results
+
+
+def apply_rescan(store, results):
+    """Write :func:`rescan` results into ``store``; returns the ids that changed."""
+    changed = []
+    for event_id, (full, fields) in results.items():
+        if event_id not in store:
+            continue
+        current = store.get(event_id)
+        manual = current.get("tag_source") == "manual"
+        if full:
+            update = {"yara_rule": fields["yara_rule"] if fields else ""}
+            if not manual:
+                update.update(
+                    tag=fields["tag"] if fields else "",
+                    mitre=fields["mitre"] if fields else "",
+                    tag_source="yara" if fields else "",
+                )
+        else:
+            names = rule_names(current.get("yara_rule"))
+            names += [name for name in rule_names(fields["yara_rule"]) if name not in names]
+            update = {"yara_rule": RULE_SEPARATOR.join(names)}
+            if not manual and not current.get("tag"):
+                update.update(tag=fields["tag"], mitre=fields["mitre"], tag_source="yara")
+        if any(current.get(k, "") != v for k, v in update.items()):
+            store.update(event_id, **update)
+            changed.append(event_id)
+    return changed
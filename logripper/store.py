@@ -0,0 +1,382 @@
+"""Columnar event store backing the viewers' session state.
+
+Events arrive as flattened dicts but are kept as pandas columns, with
+dictionary (categorical) encoding for fields that repeat across a case such as
+``Computer`` or ``Image``. Appends are buffered and folded into the frame the
+next time it is read, so ingesting a file in batches costs one concat. A
+:class:`~logripper.process_index.ProcessIndex` and the
+:class:`~logripper.event_graph.EventGraph` built on it are maintained alongside,
+as are the :class:`~logripper.dedup.DedupIndex` ingest checks new events
+against, the :class:`~logripper.text_index.TextIndex` behind full-text search
+and the :class:`~logripper.logons.LogonIndex` behind the logon filters.
+
+A store opened on a :class:`~logripper.casedb.CaseDB` writes every append,
+field update and hide/unhide through to the case file, and
+:meth:`EventStore.open` rebuilds the store from one, building the indexes
+in bulk. Such a store keeps :data:`BULKY_FIELDS` (the raw XML) only in the
+case file: :meth:`EventStore.frame_at` and :meth:`EventStore.fetch` read them
+from it for the rows being shown or exported.
+
+Headless ingest passes ``views=False`` to skip the indexes only the viewers
+query (process tree, graph, full-text search and logons); ids, times, hidden
+state and the dedup index are always kept.
+"""
+import numpy as np
+import pandas as pd
+
+from .dedup import DedupIndex
+from .event_graph import GRAPH_FIELDS, EventGraph
+from .logons import LogonIndex
+from .process_index import ProcessIndex
+from .text_index import TextIndex
+from .timestamps import TS_MISSING, event_timestamp
+
+CATEGORICAL_FIELDS = (
+    "EventID",
+    "Computer",
+    "Channel",
+    "ProviderName",
+    "User",
+    "Image",
+    "ParentImage",
+    "IntegrityLevel",
+    "matched_keywords",
+    "LogonType",
+    "TargetUserName",
+    "WorkstationName",
+    "IpAddress",
+)
+# Large per-event copies that are only displayed or exported, never filtered on.
+BULKY_FIELDS = ("PrettyXml",)
+
+
+def _is_missing(value):
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value)
+
+
+class _GrowingArray:
+    """A 1-D array extended batch by batch; capacity doubles so appends stay amortized O(1)."""
+
+    def __init__(self, dtype):
+        self._data = np.zeros(0, dtype=dtype)
+        self._size = 0
+
+    def extend(self, values):
+        end = self._size + len(values)
+        if end > len(self._data):
+            grown = np.zeros(max(end, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:end] = values
+        self._size = end
+
+    @property
+    def values(self):
+        """The filled part, as a view that writes through."""
+        return self._data[:self._size]
+
+
+def _categorize(frame):
+    for field in CATEGORICAL_FIELDS:
+        if field in frame.columns and not isinstance(frame[field].dtype, pd.CategoricalDtype):
+            frame[field] = frame[field].astype("category")
+    return frame
+
+
+class EventStore:
+    def __init__(self, db=None, views=True):
+        self.db = db
+        self.views = views
+        self._frame = pd.DataFrame()
+        self._pending = []
+        self._schema = {}
+        self._rows = {}
+        self._hidden_flags = _GrowingArray(bool)
+        self._hidden_ids = set()
+        self.hidden_version = 0  # bumped by every hide/unhide
+        self._time_values = _GrowingArray(np.int64)
+        self._time_order = None
+        self.processes = ProcessIndex()
+        self.graph = EventGraph(self.processes)
+        self.dedup = DedupIndex()
+        self.text = TextIndex()
+        self.logons = LogonIndex()
+
+    @classmethod
+    def open(cls, db, views=True):
+        """A store holding everything persisted in ``db``, writing through to it."""
+        store = cls(views=views)
+        frame = db.load_frame(exclude=BULKY_FIELDS)
+        if len(frame):
+            store._append_frame(frame)
+            for field, values in db.edits().items():
+                rows = [store._rows[event_id] for event_id in values if event_id in store._rows]
+                store._set_column(field, rows, [v for event_id, v in values.items() if event_id in store._rows])
+            hidden = [event_id for event_id in db.hidden_ids() if event_id in store._rows]
+            store._hidden[[store._rows[event_id] for event_id in hidden]] = True
+            store._hidden_ids.update(hidden)
+            if views:
+                store._index_processes(hidden)
+            store._schema = {**dict.fromkeys(db.fields()), **store._schema}
+        store.db = db
+        return store
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, event_id):
+        return event_id in self._rows
+
+    # --- Writes ---
+    def append(self, events):
+        """Add a batch of flattened events, each carrying a unique ``uuid``."""
+        if not events:
+            return 0
+        start = len(self._rows)
+        for offset, evt in enumerate(events):
+            self._rows[evt["uuid"]] = start + offset
+            if "ts" not in evt:
+                evt["ts"] = event_timestamp(evt)
+            for field in evt:
+                self._schema.setdefault(field, None)
+        self._pending.append(events)
+        self._hidden_flags.extend(np.zeros(len(events), dtype=bool))
+        self._add_times(np.fromiter((evt["ts"] for evt in events), dtype=np.int64, count=len(events)))
+        self.dedup.add(events)
+        if self.views:
+            self.processes.add(events)
+            self.graph.add(events)
+            self.text.add(start, events)
+            self.logons.add(events)
+        if self.db is not None:
+            self.db.add_events(events)
+        return len(events)
+
+    def _append_frame(self, frame):
+        # Bulk load of already-stored events: same bookkeeping as append without the dicts.
+        frame = frame.reset_index(drop=True)
+        frame["uuid"] = frame["uuid"].astype(np.int64)
+        if "ts" not in frame.columns:
+            frame["ts"] = [event_timestamp(evt) for evt in frame[[c for c in ("UtcTime", "TimeCreated") if c in frame.columns]].to_dict("records")]
+        frame["ts"] = frame["ts"].astype("Int64").fillna(TS_MISSING).astype(np.int64)
+        self._rows = dict(zip(frame["uuid"], range(len(frame))))
+        self._schema = dict.fromkeys(frame.columns)
+        self._frame = _categorize(frame)
+        self._pending = []
+        self._hidden_flags = _GrowingArray(bool)
+        self._hidden_flags.extend(np.zeros(len(frame), dtype=bool))
+        self._add_times(frame["ts"].to_numpy())
+        self.dedup.add_frame(frame)
+        if self.views:
+            self.text.add_frame(frame)
+            self.logons.add_frame(frame)
+
+    def _index_processes(self, hidden):
+        # Process index and graph for a bulk load, once edits and hidden flags are applied.
+        frame = self.frame
+        event_ids = frame["uuid"].tolist()
+        guids, parent_guids = (
+            frame[f].astype(object).where(frame[f].notna(), None).tolist() if f in frame.columns else [None] * len(frame)
+            for f in ("ProcessGuid", "ParentProcessGuid")
+        )
+        self.processes.add_frame(event_ids, guids, parent_guids, hidden=hidden)
+        self.graph.add_frame(frame[["uuid", *(f for f in GRAPH_FIELDS if f in frame.columns)]], self.visible_mask())
+
+    def _add_times(self, times):
+        self._time_values.extend(times)
+        self._time_order = None
+
+    @property
+    def _hidden(self):
+        return self._hidden_flags.values
+
+    @property
+    def _times(self):
+        return self._time_values.values
+
+    def _set_column(self, field, rows, values):
+        frame = self.frame
+        if field not in frame.columns:
+            frame[field] = pd.Series([None] * len(frame), dtype=object)
+            self._schema.setdefault(field, None)
+        if isinstance(frame[field].dtype, pd.CategoricalDtype):
+            frame[field] = frame[field].astype(object)
+        frame.iloc[rows, frame.columns.get_loc(field)] = list(values)
+
+    def update(self, event_id, **fields):
+        """Set fields on a single event in place."""
+        row = self._rows[event_id]
+        for field, value in fields.items():
+            self._set_column(field, [row], [value])
+        if self.views:
+            self.graph.update(event_id, fields)
+        if self.db is not None:
+            self.db.update(event_id, fields)
+
+    def update_many(self, event_ids, **fields):
+        """Set fields on many events at once; each value is a sequence aligned with ``event_ids``."""
+        if not event_ids:
+            return
+        rows = [self._rows[event_id] for event_id in event_ids]
+        for field, values in fields.items():
+            self._set_column(field, rows, values)
+        if self.views:
+            for index, event_id in enumerate(event_ids):
+                self.graph.update(event_id, {field: values[index] for field, values in fields.items()})
+        if self.db is not None:
+            self.db.update_many(event_ids, fields)
+
+    def hide(self, event_id):
+        self._hidden[self._rows[event_id]] = True
+        self._hidden_ids.add(event_id)
+        self.hidden_version += 1
+        if self.views:
+            self.processes.hide(event_id)
+            self.graph.hide(event_id)
+        if self.db is not None:
+            self.db.set_hidden(event_id, True)
+
+    def unhide(self, event_id):
+        self._hidden[self._rows[event_id]] = False
+        self._hidden_ids.discard(event_id)
+        self.hidden_version += 1
+        if self.views:
+            self.processes.unhide(event_id)
+            self.graph.unhide(event_id)
+        if self.db is not None:
+            self.db.set_hidden(event_id, False)
+
+    def _consolidate(self):
+        parts = [pd.DataFrame.from_records(batch) for batch in self._pending]
+        self._pending = []
+        if len(self._frame.columns):
+            parts.insert(0, self._frame)
+        frame = pd.concat(parts, ignore_index=True, sort=False)
+        if self.db is not None:
+            # Already written to the case file, which is where they are read from.
+            frame = frame.drop(columns=list(BULKY_FIELDS), errors="ignore")
+        self._frame = _categorize(frame)
+
+    # --- Reads ---
+    @property
+    def frame(self):
+        """The full event frame; callers must not add or drop rows."""
+        if self._pending:
+            self._consolidate()
+        return self._frame
+
+    @property
+    def schema(self):
+        """Union of all fields seen so far, in first-seen order."""
+        return list(self._schema)
+
+    @property
+    def hidden_ids(self):
+        return set(self._hidden_ids)
+
+    def is_hidden(self, event_id):
+        return event_id in self._hidden_ids
+
+    def timestamps(self):
+        """``ts`` per row: int64 epoch nanoseconds, ``TS_MISSING`` when unknown."""
+        return self._times
+
+    def _time_index(self):
+        # Rows with a known time, sorted by it; rebuilt lazily after appends.
+        if self._time_order is None:
+            known = np.flatnonzero(self._times != TS_MISSING)
+            self._time_order = known[np.argsort(self._times[known], kind="stable")]
+            self._sorted_times = self._times[self._time_order]
+        return self._sorted_times, self._time_order
+
+    def time_range(self):
+        """``(first, last)`` known ``ts`` in the case, or ``None``."""
+        sorted_times, _ = self._time_index()
+        if not len(sorted_times):
+            return None
+        return int(sorted_times[0]), int(sorted_times[-1])
+
+    def rows_between(self, start, end):
+        """Rows with ``start <= ts <= end`` in time order, by binary search on the time index."""
+        sorted_times, order = self._time_index()
+        lo = np.searchsorted(sorted_times, start, side="left")
+        hi = np.searchsorted(sorted_times, end, side="right")
+        return order[lo:hi]
+
+    def ids_between(self, start, end, visible_only=True):
+        return self.ids_at(self.rows_between(start, end), visible_only)
+
+    def search_rows(self, text, mode="substring"):
+        """Rows whose command lines or paths match ``text``; see :meth:`~logripper.text_index.TextIndex.search`."""
+        return self.text.search(text, mode)
+
+    def logon_rows(self, logon_filter):
+        """Rows of 4624/4625 events matching a :class:`~logripper.logons.LogonFilter`."""
+        return np.flatnonzero(self.logons.mask(logon_filter))
+
+    def rows_of(self, event_ids):
+        """Row positions of ``event_ids``, sorted."""
+        return np.sort(np.fromiter((self._rows[e] for e in event_ids), dtype=np.int64))
+
+    def ids_at(self, rows, visible_only=True):
+        """Event ids at row positions (as returned by the index lookups above)."""
+        if visible_only:
+            rows = rows[~self._hidden[rows]]
+        return self.frame["uuid"].to_numpy()[rows].tolist()
+
+    def visible_mask(self):
+        return ~self._hidden
+
+    def visible_frame(self, columns=None):
+        """Visible rows restricted to ``columns`` (defaults to the full schema)."""
+        frame = self.frame
+        if columns is not None:
+            frame = frame[[c for c in columns if c in frame.columns]]
+        return frame[~self._hidden]
+
+    def ids(self, visible_only=True):
+        if not len(self):
+            return []
+        frame = self.visible_frame(["uuid"]) if visible_only else self.frame
+        return frame["uuid"].tolist()
+
+    def get(self, event_id):
+        """One event as a dict, without fields it doesn't carry."""
+        row = self.frame.iloc[self._rows[event_id]]
+        return {k: v for k, v in row.items() if not _is_missing(v)}
+
+    def fetch(self, event_id):
+        """:meth:`get`, plus the fields only the case file holds."""
+        event = self.get(event_id)
+        if self.db is not None:
+            stored = self.db.fetch([event_id], BULKY_FIELDS).iloc[0]
+            event.update((k, v) for k, v in stored.items() if k in BULKY_FIELDS and not _is_missing(v))
+        return event
+
+    def frame_at(self, rows, columns):
+        """Rows at positions ``rows`` projected to ``columns``; fields only the case file holds are read from it."""
+        frame = self.frame
+        page = frame.iloc[rows, [frame.columns.get_loc(c) for c in columns if c in frame.columns]]
+        stored = [c for c in columns if c not in frame.columns and c in self._schema] if self.db is not None else []
+        if stored and len(page):
+            fetched = self.db.fetch(page["uuid"] if "uuid" in page.columns else frame["uuid"].iloc[rows], stored)
+            page = page.assign(**{c: fetched[c].to_numpy() for c in stored if c in fetched.columns})
+        return page[[c for c in columns if c in page.columns]]
+
+    def values(self, field, event_ids):
+        """``field`` for each of ``event_ids``, with ``None`` where it is missing."""
+        frame = self.frame
+        if field not in frame.columns:
+            return [None] * len(event_ids)
+        column = frame[field].iloc[[self._rows[e] for e in event_ids]]
+        return [None if _is_missing(v) else v for v in column.tolist()]
+
+    def records(self, columns=None, visible_only=True):
+        """Events as dicts projected to ``columns``, without missing fields."""
+        if not len(self):
+            return []
+        if visible_only:
+            frame = self.visible_frame(columns)
+        else:
+            frame = self.frame if columns is None else self.frame[[c for c in columns if c in self.frame.columns]]
+        return [{k: v for k, v in row.items() if not _is_missing(v)} for row in frame.to_dict("records")]
@@ -0,0 +1,156 @@
+"""Server-side filtering, sorting and paging for the event table.
+
+The viewers send the browser one page of the columns an analyst picked rather
+than the whole case. Filters run against the store's columns (dictionary codes
+for categorical fields, so e.g. an EventID or keyword filter never touches
+every row's strings), the time range is a binary search on the store's time
+index, full-text hits and logon filters come from the store's indexes, and only
+the filtered rows are sorted. The page itself is read through the store, so on a
+case file its fields that are kept only on disk (the raw XML) are fetched for
+just those rows.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .keywords import KEYWORD_SEPARATOR
+from .timestamps import as_datetimes
+
+DEFAULT_COLUMNS = ("ts", "EventID", "Computer", "Image", "CommandLine", "tag", "mitre", "risk_score", "uuid")
+PAGE_SIZES = (50, 100, 250, 500)
+
+
+@dataclass
+class TableQuery:
+    columns: list = field(default_factory=lambda: list(DEFAULT_COLUMNS))
+    event_ids: list = field(default_factory=list)
+    computers: list = field(default_factory=list)
+    tags: list = field(default_factory=list)
+    keywords: list = field(default_factory=list)  # any of these in matched_keywords
+    min_risk: float = 0
+    time_range: tuple = None  # (start, end) epoch nanoseconds, inclusive
+    rows: object = None  # store rows to limit the table to, e.g. full-text search hits
+    logon: object = None  # a LogonFilter over 4624/4625 events
+    text: str = ""
+    text_column: str = None
+    sort_by: str = "ts"
+    descending: bool = False
+    page: int = 0
+    page_size: int = PAGE_SIZES[0]
+
+
+def distinct_values(store, column):
+    """Sorted values seen in ``column``, for filter pickers."""
+    frame = store.frame
+    if column not in frame.columns:
+        return []
+    series = frame[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.cat.categories
+    else:
+        values = series.dropna().unique()
+    return sorted(values, key=str)
+
+
+def _contains(series, text):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        hits = categories[categories.astype(str).str.contains(text, case=False, regex=False)]
+        return series.isin(hits).to_numpy()
+    return series.astype(str).str.contains(text, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+
+
+def _has_any_keyword(series, keywords):
+    wanted = set(keywords)
+    matches = lambda value: isinstance(value, str) and not wanted.isdisjoint(value.split(KEYWORD_SEPARATOR))
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        return series.isin([c for c in categories if matches(c)]).to_numpy()
+    return series.map(matches).to_numpy(dtype=bool)
+
+
+def _sortable(series):
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series if series.dtype != object else series.astype(str)
+    # Categories are kept in first-seen order; sort by value instead.
+    categories = series.cat.categories
+    try:
+        ordered = categories.sort_values()
+    except TypeError:
+        ordered = sorted(categories, key=str)
+    return series.cat.reorder_categories(ordered, ordered=True)
+
+
+def filter_mask(store, query):
+    """Boolean mask over the store's rows for the visible rows ``query`` selects."""
+    frame = store.frame
+    mask = store.visible_mask().copy()
+    for column, values in (("EventID", query.event_ids), ("Computer", query.computers), ("tag", query.tags)):
+        if values and column in frame.columns:
+            mask &= frame[column].isin(values).to_numpy()
+    if query.keywords:
+        if "matched_keywords" in frame.columns:
+            mask &= _has_any_keyword(frame["matched_keywords"], query.keywords)
+        else:
+            mask[:] = False
+    if query.min_risk:
+        if "risk_score" in frame.columns:
+            mask &= (pd.to_numeric(frame["risk_score"], errors="coerce").fillna(0) >= query.min_risk).to_numpy(dtype=bool)
+        else:
+            mask[:] = False
+    if query.time_range is not None:
+        in_range = np.zeros(len(frame), dtype=bool)
+        in_range[store.rows_between(*query.time_range)] = True
+        mask &= in_range
+    if query.logon is not None and query.logon.active:
+        mask &= store.logons.mask(query.logon)
+    if query.rows is not None:
+        selected = np.zeros(len(frame), dtype=bool)
+        selected[query.rows] = True
+        mask &= selected
+    if query.text:
+        if query.text_column:
+            columns = [query.text_column] if query.text_column in frame.columns else []
+        else:
+            columns = list(frame.columns)
+        hits = np.zeros(len(frame), dtype=bool)
+        for column in columns:
+            # Only rows still in play need checking against the next column.
+            pending = mask & ~hits
+            if not pending.any():
+                break
+            hits[pending] = _contains(frame[column][pending], query.text)
+        mask &= hits
+    return mask
+
+
+def query_table(store, query):
+    """``(page, total)``: the requested page of matching rows, indexed by event id, and the match count.
+
+    A ``query.page`` past the end is clamped to the last page.
+    """
+    frame = store.frame
+    if not len(store):
+        return pd.DataFrame(columns=query.columns), 0
+    rows = np.flatnonzero(filter_mask(store, query))
+    total = len(rows)
+
+    if query.sort_by == "ts":
+        keys = pd.Series(as_datetimes(store.timestamps()[rows]))
+    elif query.sort_by in frame.columns:
+        keys = _sortable(frame[query.sort_by].iloc[rows])
+    else:
+        keys = None
+    if keys is not None:
+        keys = keys.reset_index(drop=True)
+        order = keys.sort_values(ascending=not query.descending, kind="stable", na_position="last").index
+        rows = rows[order.to_numpy()]
+
+    query.page = max(0, min(query.page, (total - 1) // query.page_size))
+    start = query.page * query.page_size
+    page_rows = rows[start:start + query.page_size]
+    page = store.frame_at(page_rows, query.columns)
+    if "ts" in page.columns:
+        page = page.assign(ts=as_datetimes(store.timestamps()[page_rows]))
+    return page.set_axis(store.ids_at(page_rows, visible_only=False)), total
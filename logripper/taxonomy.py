@@ -0,0 +1,113 @@
+"""Tag, color and MITRE ATT&CK vocabularies shared by the viewers and the CLI."""
+
+TAGS = [
+    "",
+    "Initial Access",
+    "Execution",
+    "Persistence",
+    "C2",
+    "Exfiltration",
+    "Cleanup",
+    "Enumeration",
+    "Discovery",
+    "Collection",
+]
+
+TAG_COLORS = {
+    "Initial Access": "#e74c3c",
+    "Execution": "#f39c12",
+    "Persistence": "#8e44ad",
+    "C2": "#3498db",
+    "Exfiltration": "#2ecc71",
+    "Cleanup": "#95a5a6",
+    "Enumeration": "#2980b9",
+    "Discovery": "#f1c40f",
+    "Collection": "#16a085",
+    "": "#bdc3c7",  # Uncategorized
+}
+
+TAG_EMOJI = {
+    "Initial Access": "\U0001f6aa",
+    "Execution": "💥",
+    "Persistence": "\U0001f6e1️",
+    "C2": "\U0001f4e1",
+    "Exfiltration": "\U0001f4e4",
+    "Enumeration": "🔍",
+    "Discovery": "💡",
+    "Cleanup": "\U0001f9f9",
+    "Collection": "🗃️",
+    "": "\U0001f9e9",
+}
+
+# MITRE ATT&CK techniques offered in the annotation sidebar
+MITRE_TECHNIQUES = {
+    "": {"name": "", "url": ""},
+    "T1059 Command and Scripting Interpreter": {
+        "name": "Command and Scripting Interpreter",
+        "url": "https://attack.mitre.org/techniques/T1059/",
+    },
+    "T1086 PowerShell": {
+        "name": "PowerShell",
+        "url": "https://attack.mitre.org/techniques/T1086/",
+    },
+    "T1569 System Services": {
+        "name": "System Services",
+        "url": "https://attack.mitre.org/techniques/T1569/",
+    },
+    "T1027 Obfuscated Files or Information": {
+        "name": "Obfuscated Files or Information",
+        "url": "https://attack.mitre.org/techniques/T1027/",
+    },
+    "T1204 User Execution": {
+        "name": "User Execution",
+        "url": "https://attack.mitre.org/techniques/T1204/",
+    },
+    "T1105 Ingress Tool Transfer": {
+        "name": "Ingress Tool Transfer",
+        "url": "https://attack.mitre.org/techniques/T1105/",
+    },
+    "T1003 OS Credential Dumping": {
+        "name": "OS Credential Dumping",
+        "url": "https://attack.mitre.org/techniques/T1003/",
+    },
+    "T1218 Signed Binary Proxy Execution": {
+        "name": "Signed Binary Proxy Execution",
+        "url": "https://attack.mitre.org/techniques/T1218/",
+    },
+    "T1047 Windows Management Instrumentation": {
+        "name": "Windows Management Instrumentation",
+        "url": "https://attack.mitre.org/techniques/T1047/",
+    },
+    "TA0010 Exfiltration": {
+        "name": "Exfiltration",
+        "url": "https://attack.mitre.org/tactics/TA0010/",
+    },
+    "T1033 System Owner/User Discovery": {
+        "name": "System Owner/User Discovery",
+        "url": "https://attack.mitre.org/techniques/T1033/",
+    },
+    "T1082 System Information Discovery": {
+        "name": "System Information Discovery",
+        "url": "https://attack.mitre.org/techniques/T1082/",
+    },
+    "T1057 Process Discovery": {
+        "name": "Process Discovery",
+        "url": "https://attack.mitre.org/techniques/T1057/",
+    },
+    "T1074 Data Staged": {
+        "name": "Data Staged",
+        "url": "https://attack.mitre.org/techniques/T1074/",
+    },
+    "T1074.001 Data Staged: Local Data Staging": {
+        "name": "Data Staged: Local Data Staging",
+        "url": "https://attack.mitre.org/techniques/T1074/001/",
+    },
+    "T1115 Clipboard Data": {
+        "name": "Clipboard Data",
+        "url": "https://attack.mitre.org/techniques/T1115/",
+    },
+    "T1059.001 Command and Scripting Interpreter: PowerShell": {
+        "name": "Command and Scripting Interpreter: PowerShell",
+        "url": "https://attack.mitre.org/techniques/T1059/001/",
+    },
+}
@@ -0,0 +1,247 @@
+"""Full-text index over command lines and paths.
+
+Hunting queries run against the distinct values of :data:`SEARCH_FIELDS`
+rather than against every event: a case with millions of events usually has
+far fewer distinct command lines and images. Each distinct value (lowercased)
+gets a string id, and the index keeps
+
+* trigram → string ids, to narrow queries down to candidate values;
+* string id → store rows holding that value in any search field.
+
+Trigrams are taken over UTF-8 bytes and packed into integers. Their postings
+are compact sorted arrays (``uint32`` trigram codes alongside ``uint32``
+string ids), built vectorized per ingest batch and merged into a few
+segments of growing size; row postings are append-only ``array('I')``.
+Candidates are always verified against the value itself, so results are
+exact: substring queries use the whole needle's trigrams, token queries each
+word's, and regex queries those of the literal runs the pattern requires
+(:func:`regex_literals`). Matching is case-insensitive. The indexed fields
+are raw event data the viewers never edit, so the index only ever grows.
+"""
+import re
+from array import array
+
+import numpy as np
+import pandas as pd
+
+SEARCH_FIELDS = ("CommandLine", "ParentCommandLine", "Image", "QueryName", "TargetFilename")
+SEARCH_MODES = ("substring", "token", "regex")
+
+_TOKEN = re.compile(r"\w+")
+_REGEX_META = set(".^$*+?{}[]()|\\")
+_ESCAPE_WIDTHS = {"x": 2, "u": 4, "U": 8}
+
+
+def _sorted_unique(values):
+    # np.unique hashes large integer arrays, which is far slower here than sorting.
+    values = np.sort(values)
+    return values[np.concatenate(([True], values[1:] != values[:-1]))] if len(values) else values
+
+
+def _gram_codes(text):
+    data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.uint32)
+    return _sorted_unique(data[:-2] << 16 | data[1:-1] << 8 | data[2:])
+
+
+def _build_segment(texts, first_id):
+    """Sorted ``(trigram codes, string ids)`` for ``texts``, numbered from ``first_id``."""
+    encoded = [text.encode("utf-8") for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    owner = np.repeat(np.arange(first_id, first_id + len(texts), dtype=np.uint64), lengths)
+    # Trigrams spanning two strings are dropped; each (trigram, string) pair is kept once.
+    inside = owner[:-2] == owner[2:]
+    keys = _sorted_unique(((data[:-2] << 16 | data[1:-1] << 8 | data[2:]) << 32 | owner[:-2])[inside])
+    return (keys >> 32).astype(np.uint32), (keys & 0xFFFFFFFF).astype(np.uint32)
+
+
+def _merge_segments(older, newer):
+    keys = np.concatenate([
+        older[0].astype(np.uint64) << 32 | older[1],
+        newer[0].astype(np.uint64) << 32 | newer[1],
+    ])
+    keys.sort()
+    return (keys >> 32).astype(np.uint32), (keys & 0xFFFFFFFF).astype(np.uint32)
+
+
+def _intersect(lists):
+    if not lists:
+        return None
+    lists = sorted(lists, key=len)
+    result = lists[0]
+    for values in lists[1:]:
+        if not len(result):
+            break
+        result = np.intersect1d(result, values, assume_unique=True)
+    return result
+
+
+def _escape_end(pattern, i):
+    """Index just past the escape whose character after the backslash is at ``i``."""
+    char = pattern[i]
+    if char == "N" and pattern[i + 1:i + 2] == "{":
+        return pattern.find("}", i) + 1 or len(pattern)
+    if char in _ESCAPE_WIDTHS:
+        return i + 1 + _ESCAPE_WIDTHS[char]
+    if char.isdigit():
+        # Octal escape or group reference: up to three digits.
+        end = i + 1
+        while end < min(len(pattern), i + 3) and pattern[end].isdigit():
+            end += 1
+        return end
+    return i + 1
+
+
+def regex_literals(pattern):
+    """Literal runs every match of ``pattern`` must contain, for prefiltering.
+
+    Only literals outside groups and classes are used, and none at all if the
+    pattern has an alternation or is verbose, so the result is conservative:
+    possibly empty, never wrong.
+    """
+    if "|" in pattern or re.compile(pattern).flags & re.VERBOSE:
+        return []
+    runs = [""]
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        literal = None
+        i += 1
+        if char == "\\" and i < len(pattern):
+            if not pattern[i].isalnum():
+                literal = pattern[i]
+            # Escapes like \x41, \101 or \N{...} end the run; skip all of their characters.
+            i = _escape_end(pattern, i)
+        elif char == "[":
+            # Skip the class; a ] right after [ or [^ is part of it.
+            i += pattern[i:i + 1] == "^"
+            i += pattern[i:i + 1] == "]"
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+        elif char == "{":
+            i = pattern.find("}", i) + 1 or len(pattern)
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char not in _REGEX_META:
+            literal = char
+        following = pattern[i:i + 1]
+        if literal is None or depth or following in ("?", "*") or pattern[i:i + 2] in ("{0", "{,"):
+            runs.append("")
+            continue
+        runs[-1] += literal
+        if following in ("+", "{"):
+            # Repeated: the literal is required, but what follows it may not be adjacent.
+            runs.append("")
+    return [run.lower() for run in runs if len(run) >= 3]
+
+
+class TextIndex:
+    def __init__(self, fields=SEARCH_FIELDS):
+        self.fields = tuple(fields)
+        self._ids = {}
+        self._strings = []
+        self._rows = []
+        self._segments = []
+        self._indexed = 0
+
+    def __len__(self):
+        return len(self._strings)
+
+    def _add(self, row, value):
+        text = str(value).lower()
+        string_id = self._ids.get(text)
+        if string_id is None:
+            string_id = self._ids[text] = len(self._strings)
+            self._strings.append(text)
+            self._rows.append(array("I"))
+        rows = self._rows[string_id]
+        # The same value in two fields of one event is indexed once.
+        if not rows or rows[-1] != row:
+            rows.append(row)
+
+    def _flush(self):
+        # Trigrams of the strings added since the last call go into a new segment.
+        # A segment at least half the size of the one before it is merged into it,
+        # so there are O(log n) segments and each pair is re-sorted O(log n) times.
+        if self._indexed == len(self._strings):
+            return
+        segment = _build_segment(self._strings[self._indexed:], self._indexed)
+        self._indexed = len(self._strings)
+        while self._segments and 2 * len(segment[0]) >= len(self._segments[-1][0]):
+            segment = _merge_segments(self._segments.pop(), segment)
+        self._segments.append(segment)
+
+    # --- Maintenance (called by the store with the row numbers it assigned) ---
+    def add(self, start, events):
+        for row, evt in enumerate(events, start):
+            for field in self.fields:
+                value = evt.get(field)
+                if value is not None and value != "":
+                    self._add(row, value)
+        self._flush()
+
+    def add_frame(self, frame):
+        columns = [frame[f].astype(object).to_numpy() for f in self.fields if f in frame.columns]
+        for row, values in enumerate(zip(*columns)):
+            for value in values:
+                if value is not None and not pd.isna(value) and value != "":
+                    self._add(row, value)
+        self._flush()
+
+    # --- Queries ---
+    def _postings(self, code):
+        found = []
+        bounds = np.array([code, code + 1], dtype=np.uint32)
+        for grams, string_ids in self._segments:
+            lo, hi = grams.searchsorted(bounds)
+            found.append(string_ids[lo:hi])
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.uint32)
+
+    def _candidates(self, literals):
+        """String ids that may contain every literal; ``None`` means all of them."""
+        lists = []
+        for literal in literals:
+            for code in _gram_codes(literal).tolist():
+                postings = self._postings(code)
+                if not len(postings):
+                    return postings
+                lists.append(postings)
+        return _intersect(lists)
+
+    def _string_ids(self, text, mode):
+        if mode == "substring":
+            needle = text.lower()
+            candidates = self._candidates([needle])
+            check = lambda s: needle in s
+        elif mode == "token":
+            tokens = set(_TOKEN.findall(text.lower()))
+            if not tokens:
+                return []
+            candidates = self._candidates(tokens)
+            words = [re.compile(rf"(?<!\w){re.escape(t)}(?!\w)") for t in tokens]
+            check = lambda s: all(w.search(s) for w in words)
+        elif mode == "regex":
+            compiled = re.compile(text, re.IGNORECASE)
+            candidates = self._candidates(regex_literals(text))
+            check = lambda s: compiled.search(s) is not None
+        else:
+            raise ValueError(f"unknown search mode {mode!r}; expected one of {SEARCH_MODES}")
+        ids = range(len(self._strings)) if candidates is None else candidates.tolist()
+        return [i for i in ids if check(self._strings[i])]
+
+    def search(self, text, mode="substring"):
+        """Sorted store rows whose search fields match ``text``.
+
+        ``mode`` is ``"substring"``, ``"token"`` (every word of ``text`` appears
+        as a whole word in one value) or ``"regex"`` (raises ``re.error`` for
+        an invalid pattern).
+        """
+        string_ids = self._string_ids(text, mode)
+        if not string_ids:
+            return np.zeros(0, dtype=np.int64)
+        rows = [np.frombuffer(self._rows[i], dtype=np.uint32) for i in string_ids]
+        return _sorted_unique(np.concatenate(rows)).astype(np.int64)
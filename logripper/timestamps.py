@@ -0,0 +1,71 @@
+"""Event timestamp normalization.
+
+Every event gets a ``ts`` field at ingest: int64 nanoseconds since the Unix
+epoch, UTC. Sysmon's ``UtcTime`` is preferred; otherwise ``TimeCreated`` is
+used, either as written by Windows PowerShell 5.1's ``ConvertTo-Json``
+(``/Date(1752344971000)/``) or as an ISO 8601 string (PowerShell 7). Events
+with neither get :data:`TS_MISSING`, which is also pandas' NaT value, so a
+``ts`` column viewed as ``datetime64[ns]`` shows them as NaT.
+"""
+import re
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+TS_MISSING = np.iinfo(np.int64).min
+TIME_FIELDS = ("UtcTime", "TimeCreated")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_DOTNET_DATE = re.compile(r"/Date\((-?\d+)(?:[+-]\d{4})?\)/")
+# Windows writes 100 ns ticks (seven fraction digits); datetime stops at microseconds.
+_SUBMICRO = re.compile(r"(\.\d{6})(\d{1,3})(?!\d)")
+
+
+def _iso_ns(text):
+    submicro = _SUBMICRO.search(text)
+    extra = 0
+    if submicro:
+        extra = int(submicro.group(2).ljust(3, "0"))
+        text = text[:submicro.end(1)] + text[submicro.end():]
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        # Slower, more forgiving parser for anything fromisoformat rejects.
+        try:
+            stamp = pd.Timestamp(text)
+        except (ValueError, TypeError):
+            return None
+        return None if pd.isna(stamp) else stamp.value + extra
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    delta = parsed - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000 + extra
+
+
+def parse_timestamp(value):
+    """Epoch nanoseconds for one timestamp value, or ``None`` if it can't be read."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # Bare numbers in exports are epoch milliseconds, as in /Date(...)/.
+        return int(value * 1_000_000) if value == value else None
+    text = str(value).strip()
+    match = _DOTNET_DATE.fullmatch(text)
+    if match:
+        return int(match.group(1)) * 1_000_000
+    return _iso_ns(text)
+
+
+def event_timestamp(evt):
+    """``ts`` for a flattened event: its first readable time field, else :data:`TS_MISSING`."""
+    for field in TIME_FIELDS:
+        ts = parse_timestamp(evt.get(field))
+        if ts is not None:
+            return ts
+    return TS_MISSING
+
+
+def as_datetimes(ts):
+    """View int64 ``ts`` values as ``datetime64[ns]`` (missing values become NaT)."""
+    return np.asarray(ts, dtype=np.int64).view("datetime64[ns]")
@@ -0,0 +1,167 @@
+"""Lazy, iterative layout and HTML rendering for the execution-flow tree view.
+
+The tree is walked without recursion, and only into nodes that are open:
+the first ``open_depth`` levels plus anything the analyst expanded, minus
+anything they collapsed. Collapsed subtrees are never enumerated. The walk
+yields flat :class:`TreeRow` records, and the viewers render one window of
+rows as a single HTML payload instead of several Streamlit elements per node.
+"""
+import html
+from dataclasses import dataclass
+
+from .graph import risk_color
+from .taxonomy import MITRE_TECHNIQUES, TAG_COLORS, TAG_EMOJI
+
+DEFAULT_OPEN_DEPTH = 1
+WINDOW_SIZES = (50, 100, 250, 500)
+
+
+@dataclass
+class TreeRow:
+    event_id: int
+    depth: int
+    is_last: bool
+    sibling_stack: tuple
+    has_children: bool
+    expanded: bool
+
+
+def get_tag_emoji(tag):
+    return TAG_EMOJI.get(tag, TAG_EMOJI[""])
+
+
+def get_tag_color(tag):
+    return TAG_COLORS.get(tag, "#bdc3c7")
+
+
+def format_tree_line(depth, is_last, sibling_stack):
+    prefix = ""
+    for i in range(depth - 1):
+        prefix += "│   " if sibling_stack[i] else "    "
+    prefix += "└── " if is_last else "├── "
+    return prefix
+
+
+def _sorted_events(store, event_ids, show_untagged, within):
+    if within is not None:
+        event_ids = [e for e in event_ids if e in within]
+    if not event_ids:
+        return []
+    times = store.values("ts", event_ids)
+    tags = store.values("tag", event_ids)
+    kept = [(t, e) for e, t, tag in zip(event_ids, times, tags) if show_untagged or tag]
+    kept.sort(key=lambda pair: pair[0])
+    return [e for _, e in kept]
+
+
+def tree_rows(
+    store,
+    show_untagged=True,
+    open_depth=DEFAULT_OPEN_DEPTH,
+    expanded=frozenset(),
+    collapsed=frozenset(),
+    within=None,
+):
+    """Visible tree rows in display order, descending only into open nodes.
+
+    Siblings are ordered by ``ts``. Each event is shown once: an event reachable
+    again (through another event of the same process, or a ProcessGuid cycle
+    in bad data) is skipped. With ``within`` (a set of event ids, e.g. a time
+    window) only those events are shown, and any whose parent is outside it
+    become roots.
+    """
+    processes = store.processes
+    rows = []
+    seen = set()
+    if within is None:
+        roots = list(processes.roots())
+    else:
+        roots = [e for e in within if not store.is_hidden(e) and processes.parent_of(e) not in within]
+    roots = _sorted_events(store, roots, show_untagged, within)
+    stack = [(event_id, 0, ()) for event_id in reversed(roots)]
+    while stack:
+        event_id, depth, sibling_stack = stack.pop()
+        if event_id in seen:
+            continue
+        seen.add(event_id)
+        child_ids = [
+            c for c in processes.children_of(processes.guid_of(event_id)) if c not in seen and (within is None or c in within)
+        ]
+        is_open = bool(child_ids) and (event_id in expanded or (depth < open_depth and event_id not in collapsed))
+        is_last = not sibling_stack[-1] if sibling_stack else True
+        rows.append(TreeRow(event_id, depth, is_last, sibling_stack, bool(child_ids), is_open))
+        if is_open:
+            children = _sorted_events(store, child_ids, show_untagged, within)
+            for idx in range(len(children) - 1, -1, -1):
+                stack.append((children[idx], depth + 1, sibling_stack + (idx < len(children) - 1,)))
+    return rows
+
+
+def tree_window(rows, window_size, window):
+    """``(index, count, rows)`` for 0-based window ``window`` of ``rows``, clamped to the first and last."""
+    count = max(1, -(-len(rows) // window_size))
+    index = max(0, min(window, count - 1))
+    return index, count, rows[index * window_size:(index + 1) * window_size]
+
+
+def _multiline(value):
+    # The window is rendered as one markdown HTML block, which a blank line would end.
+    return html.escape(str(value)).replace("\n", "&#10;")
+
+
+def _row_html(row, node, fields):
+    tag = node.get("tag", "")
+    indent = "&nbsp;&nbsp;&nbsp;" * (row.depth + 1)
+    prefix = html.escape(format_tree_line(row.depth, row.is_last, row.sibling_stack))
+    marker = ""
+    if row.has_children:
+        marker = " ▾" if row.expanded else " ▸ <span style='color:#888;'>(collapsed)</span>"
+    parts = [
+        f"<div style='white-space: pre; font-family: monospace;'>{prefix}{get_tag_emoji(tag)}{marker}</div>",
+        f"<div>{indent}<code>{html.escape(str(node.get('Image', 'Unknown')))}</code> "
+        f"<span style='color:#888; font-family: monospace;'>[{html.escape(str(row.event_id))}]</span></div>",
+    ]
+    time = html.escape(str(node.get("UtcTime", "")))
+    if tag:
+        parts.append(
+            f"<div>{indent}<span style='color:{get_tag_color(tag)}; font-style: italic; font-weight: 600;'>"
+            f"<code>{html.escape(tag)}</code>  \U0001f552 <em>{time}</em></span></div>"
+        )
+    else:
+        parts.append(
+            f"<div>{indent}<span style='color:gray; font-style: italic;'>\U0001f9e9 [Uncategorized] \U0001f552 <em>{time}</em></span></div>"
+        )
+
+    mitre_id = node.get("mitre", "")
+    if mitre_id in MITRE_TECHNIQUES and mitre_id != "":
+        mitre_info = MITRE_TECHNIQUES[mitre_id]
+        parts.append(
+            f"<div>{indent}🧩 <a href='{mitre_info['url']}' target='_blank'><code>{mitre_id}</code> - {html.escape(mitre_info['name'])}</a></div>"
+        )
+
+    risk = node.get("risk_score")
+    if risk:
+        parts.append(
+            f"<div>{indent}<span style='color:{risk_color(risk)}; font-weight: 600;'>⚠️ risk {html.escape(str(risk))}</span> "
+            f"<code>{html.escape(str(node.get('matched_keywords', '')))}</code></div>"
+        )
+
+    for field in fields:
+        value = node.get(field, "")
+        if field == "CommandLine":
+            value = str(value).strip()
+        if value:
+            parts.append(
+                f"<details style='margin-left: {(row.depth + 1) * 1.5}em;'><summary>Show {html.escape(field)}</summary>"
+                f"<pre>{_multiline(value)}</pre></details>"
+            )
+    return "\n".join(parts)
+
+
+def render_tree_html(rows, events, fields_for):
+    """One HTML block for ``rows``; ``events`` maps ids to event dicts and
+    ``fields_for(event)`` gives the fields to show under each node."""
+    return "\n".join(
+        f"<div style='margin-bottom: 0.6em;'>{_row_html(row, events[row.event_id], fields_for(events[row.event_id]))}</div>"
+        for row in rows
+    )
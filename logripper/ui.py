@@ -0,0 +1,630 @@
+"""Streamlit sections shared by both viewers.
+
+``log_UIviewer.py`` and ``log_UIviewer_plusYARA.py`` are thin scripts over
+these: session setup, the case file, keyword scoring, uploads and everything
+shown for an open case (filters, event table, annotation, graph, tree and
+export). The YARA viewer adds its rules editor, tagging and re-tagging around
+them. Every function reads and writes ``st.session_state``, so it must run
+inside a Streamlit script.
+"""
+import re
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .annotations import DEFAULT_ANALYST, AnnotationStore, journal_path
+from .casedb import DEFAULT_CASE_PATH, CaseDB
+from .correlate import RULES, VALUE_SEPARATOR, chains_frame, correlate
+from .export import EVENT_SCOPES, PROJECTIONS, compressions, export_bytes, export_store_file, file_name
+from .field_profiles import DEFAULT_FIELDS, FIELD_PROFILES, fields_for, profile_key
+from .graph import COLOR_MODES, DEFAULT_NODE_BUDGET, lod_graph, render_html
+from .ingest import hash_file, iter_batches
+from .keywords import DEFAULT_KEYWORDS, KeywordScorer, rescore
+from .logons import LogonFilter
+from .pipeline import ingest_batches, parse_file
+from .store import EventStore
+from .table import DEFAULT_COLUMNS, PAGE_SIZES, TableQuery, distinct_values, query_table
+from .taxonomy import MITRE_TECHNIQUES, TAGS
+from .text_index import SEARCH_MODES
+from .tree import DEFAULT_OPEN_DEPTH, WINDOW_SIZES, render_tree_html, tree_rows, tree_window
+
+
+@dataclass
+class ViewFilters:
+    """What the sidebar filters narrow the case to; the table, graph and tree all apply it."""
+
+    time_window: tuple = None  # (start, end) epoch nanoseconds
+    ids: set = None  # event ids left by the time window, search, logon filters and focused chain
+    search: tuple = None  # (text, mode)
+    rows: object = None  # store rows the table is limited to (search hits, focused chain)
+    logon: object = None
+    focus: str = None  # focused correlation chain
+
+    def narrow(self, hits):
+        self.ids = hits if self.ids is None else self.ids & hits
+
+
+# --- Session State Init ---
+def init_session(tree_fields=()):
+    """Session defaults; ``tree_fields`` are added to every tree view field profile."""
+    if "field_profiles" not in st.session_state:
+        st.session_state.field_profiles = {event_id: fields + list(tree_fields) for event_id, fields in FIELD_PROFILES.items()}
+        st.session_state.field_default = DEFAULT_FIELDS + list(tree_fields)
+        st.session_state.field_overrides = {}
+    if "graph_expanded" not in st.session_state:
+        st.session_state.graph_expanded = set()
+        st.session_state.graph_render = {}
+    if "correlations" not in st.session_state:
+        st.session_state.correlations = {}
+    if "tree_expanded" not in st.session_state:
+        st.session_state.tree_expanded = set()
+        st.session_state.tree_collapsed = set()
+    if "upload_digests" not in st.session_state:
+        st.session_state.upload_digests = {}
+        st.session_state.merged_journals = set()
+
+
+# --- Case File ---
+def case_sidebar():
+    """The case file picker; returns ``(store, opened)``, ``opened`` when the case was (re)opened this run.
+
+    Events, annotations and hidden state are written through to a SQLite case file
+    so a refresh or restart reopens the case instead of re-ingesting it. Analyst
+    annotations are also journaled next to it, one line per edit. An empty path
+    keeps the case in memory only.
+    """
+    st.sidebar.header("\U0001f5c2️ Case")
+    case_path = st.sidebar.text_input("Case file", value=DEFAULT_CASE_PATH)
+    analyst = st.sidebar.text_input("Analyst", value=DEFAULT_ANALYST, key="analyst")
+    opened = st.session_state.get("case_path") != case_path
+    if opened:
+        if "event_store" in st.session_state and st.session_state.event_store.db is not None:
+            st.session_state.event_store.db.close()
+        db = CaseDB(case_path) if case_path else None
+        store = EventStore.open(db) if db is not None else EventStore()
+        st.session_state.event_store = store
+        st.session_state.case_path = case_path
+        st.session_state.annotations = AnnotationStore(journal_path(case_path) if case_path else None)
+        # Edits journaled after the case file last saw them are replayed.
+        st.session_state.annotations.apply_to(store)
+        st.session_state.ingested_files = set(db.get_meta("ingested_files", [])) if db is not None else set()
+        st.session_state.keyword_weights = db.get_meta("keyword_weights", DEFAULT_KEYWORDS) if db is not None else DEFAULT_KEYWORDS
+        # Weights the stored risk scores reflect; a case from before scoring has none.
+        st.session_state.scored_weights = db.get_meta("scored_weights") if db is not None and len(store) else st.session_state.keyword_weights
+
+    st.session_state.annotations.analyst = analyst
+    return st.session_state.event_store, opened
+
+
+# --- Keyword Risk Scoring ---
+def keyword_sidebar():
+    """Weighted keyword editor.
+
+    Events are scored at ingest against weighted suspicious keywords (by default
+    the list TheLogRipper2.0.ps1 flags). Edited weights are applied to stored
+    events by :func:`rescore_stale`.
+    """
+    st.sidebar.header("⚠️ Keyword Scoring")
+    with st.sidebar.expander("Keywords and weights"):
+        with st.form("keyword_editor"):
+            weights = st.session_state.keyword_weights
+            edited_keywords = st.data_editor(
+                pd.DataFrame({"keyword": list(weights), "weight": list(weights.values())}),
+                num_rows="dynamic",
+                hide_index=True,
+                key="keyword_table",
+            )
+            keywords_applied = st.form_submit_button("✅ Apply Weights")
+    if keywords_applied:
+        st.session_state.keyword_weights = {
+            str(k): int(w) if float(w).is_integer() else float(w)
+            for k, w in zip(edited_keywords["keyword"], edited_keywords["weight"])
+            if isinstance(k, str) and k and pd.notna(w)
+        }
+        if st.session_state.event_store.db is not None:
+            st.session_state.event_store.db.set_meta("keyword_weights", st.session_state.keyword_weights)
+    if st.session_state.get("scorer_weights") != st.session_state.keyword_weights:
+        st.session_state.scorer = KeywordScorer(st.session_state.keyword_weights)
+        st.session_state.scorer_weights = st.session_state.keyword_weights
+
+
+def rescore_stale(store):
+    """Bring stored risk scores up to date when the weights change (or the case predates scoring)."""
+    if st.session_state.scored_weights != st.session_state.keyword_weights:
+        if len(store):
+            rescored = rescore(store, st.session_state.scorer)
+            st.sidebar.success(f"Re-scored {len(rescored):,} stored events with the updated keyword weights")
+        st.session_state.scored_weights = st.session_state.keyword_weights
+        if store.db is not None:
+            store.db.set_meta("scored_weights", st.session_state.scored_weights)
+
+
+# --- File Upload ---
+def upload_sidebar():
+    st.sidebar.header("\U0001f4c2 Upload Logs")
+    return st.sidebar.file_uploader(
+        "Upload one or more .evtx files or EVTX-converted JSON/NDJSON files",
+        type=["evtx", "json", "ndjson", "jsonl"],
+        accept_multiple_files=True,
+    )
+
+
+def file_digest(file):
+    """Digest of an upload's bytes, memoized per upload so reruns don't re-hash."""
+    file_id = getattr(file, "file_id", None) or (file.name, file.size)
+    digest = st.session_state.upload_digests.get(file_id)
+    if digest is None:
+        digest = hash_file(file)
+        st.session_state.upload_digests[file_id] = digest
+    return digest
+
+
+def ingest_uploads(files, make_tagger=None):
+    """Parse, score and store uploads not yet in the case; returns the taggers used.
+
+    Uploads are keyed by :func:`file_digest` so each file is ingested once.
+    ``make_tagger`` returns a fresh :class:`~logripper.yara_tagging.YaraTagger`
+    (a context manager) per file to tag events with.
+    """
+    store = st.session_state.event_store
+    taggers = []
+    for f in files or []:
+        ingest_key = file_digest(f)
+        if ingest_key in st.session_state.ingested_files:
+            continue
+        progress_bar = st.sidebar.progress(0.0, text=f"Loading {f.name}")
+        report_progress = lambda frac: progress_bar.progress(frac, text=f"Loading {f.name}")
+        with make_tagger() if make_tagger is not None else nullcontext() as tagger:
+            batches = iter_batches(parse_file(f, progress=report_progress, yara=tagger is not None))
+            for _ in ingest_batches(batches, store, tagger, scorer=st.session_state.scorer):
+                pass
+        if tagger is not None:
+            taggers.append(tagger)
+        progress_bar.empty()
+        st.session_state.annotations.apply_to(store)
+        st.session_state.ingested_files.add(ingest_key)
+        if store.db is not None:
+            store.db.set_meta("ingested_files", sorted(st.session_state.ingested_files))
+            store.db.set_meta("scored_weights", st.session_state.scored_weights)
+    return taggers
+
+
+# --- Open Case ---
+def case_views(store, manual_tag_source=False):
+    """Everything shown for the open case.
+
+    With ``manual_tag_source``, tags and MITRE IDs set by hand are marked
+    ``tag_source="manual"`` so re-tagging keeps them.
+    """
+    if not store.visible_mask().any():
+        st.info("Upload EVTX JSON files to start hunting.")
+        return
+    filters = ViewFilters()
+    _time_window(store, filters)
+    _search(store, filters)
+    _logon_filters(store, filters)
+    correlations, rule_name = _correlations(store, filters)
+    page = _event_table(store, filters)
+
+    with st.expander(f"\U0001f517 Correlated Chains: {rule_name} ({len(correlations[rule_name]):,})"):
+        st.caption(next(rule.description for rule in RULES if rule.name == rule_name))
+        st.dataframe(correlations[rule_name], use_container_width=True, hide_index=True)
+
+    _annotate(store, page, manual_tag_source)
+    _share_annotations(store)
+    _hidden_logs(store)
+    _process_graph(store, filters)
+    _tree_view(store, filters)
+    _export(store, correlations)
+
+
+def _time_window(store, filters):
+    # Applies to the table, graph and tree; slicing is a binary search on the store's time index.
+    bounds = store.time_range()
+    if bounds is None or bounds[0] >= bounds[1]:
+        return
+    first, last = (pd.Timestamp(b).to_pydatetime() for b in bounds)
+    picked = st.sidebar.slider(
+        "\U0001f552 Time window (UTC)",
+        min_value=first,
+        max_value=last,
+        value=(first, last),
+        step=timedelta(seconds=1),
+        key="time_window",
+    )
+    # The full range means no filter, which keeps events without a timestamp.
+    if picked != (first, last):
+        # The slider has microsecond resolution; include the whole last microsecond.
+        filters.time_window = (pd.Timestamp(picked[0]).value, pd.Timestamp(picked[1]).value + 999)
+        filters.narrow(set(store.ids_between(*filters.time_window)))
+
+
+def _search(store, filters):
+    # Answered from the store's text index; hits narrow the table, graph and tree like the time window.
+    st.sidebar.header("\U0001f50e Search")
+    search_text = st.sidebar.text_input("Command lines, images, DNS queries, file paths", key="search_text")
+    search_mode = st.sidebar.radio("Match", SEARCH_MODES, horizontal=True, key="search_mode")
+    if not search_text:
+        return
+    try:
+        filters.rows = store.search_rows(search_text, search_mode)
+    except re.error as e:
+        st.sidebar.error(f"Invalid regex: {e}")
+    else:
+        filters.search = (search_text, search_mode)
+        hits = set(store.ids_at(filters.rows))
+        filters.narrow(hits)
+        st.sidebar.caption(f"{len(hits):,} matching events")
+
+
+def _logon_filters(store, filters):
+    # The 4624/4625 filters from TheLogRipper2.0.ps1, answered from the store's logon
+    # index. When any is set, only matching logon events stay in the table, graph and tree.
+    st.sidebar.header("\U0001f510 Logon Filters (4624/4625)")
+    with st.sidebar.expander("LogonType, user, source IP, workstation"):
+        logon_filter = LogonFilter(
+            logon_types=tuple(st.multiselect("LogonType", distinct_values(store, "LogonType"), key="logon_types")),
+            users=tuple(st.multiselect("TargetUserName", distinct_values(store, "TargetUserName"), key="logon_users")),
+            workstations=tuple(st.multiselect("WorkstationName", distinct_values(store, "WorkstationName"), key="logon_workstations")),
+            ip=st.text_input("IpAddress or CIDR block", placeholder="10.10.53.248 or 10.10.0.0/16", key="logon_ip").strip(),
+            external_only=st.checkbox("External source IPs only", key="logon_external"),
+        )
+    if not logon_filter.active:
+        return
+    try:
+        logon_rows = store.logon_rows(logon_filter)
+    except ValueError as e:
+        st.sidebar.error(f"Invalid IP address or CIDR block: {e}")
+    else:
+        filters.logon = logon_filter
+        hits = set(store.ids_at(logon_rows))
+        filters.narrow(hits)
+        st.sidebar.caption(f"{len(hits):,} matching logon events")
+
+
+def _correlations(store, filters):
+    # Multi-event chains from logripper.correlate, recomputed only when events are
+    # added, hidden or unhidden (annotations don't affect them). Focusing a chain
+    # narrows the table, graph and tree to its events.
+    st.sidebar.header("\U0001f517 Correlations")
+    correlation_key = (id(store), len(store), store.hidden_version)
+    if st.session_state.correlations.get("key") != correlation_key:
+        st.session_state.correlations = {"key": correlation_key, "results": correlate(store)}
+    correlations = st.session_state.correlations["results"]
+    rule_name = st.sidebar.selectbox(
+        "Rule", list(correlations), format_func=lambda n: f"{n} ({len(correlations[n]):,})", key="correlation_rule"
+    )
+    chains = correlations[rule_name]
+    starts = dict(zip(chains["chain"], chains["start"]))
+    focus_chain = st.sidebar.selectbox(
+        "Focus chain",
+        [""] + chains["chain"].tolist(),
+        format_func=lambda c: f"{starts[c]} · {c.split(':', 1)[1]}" if c else "—",
+        key="correlation_focus",
+    )
+    if focus_chain in starts:
+        filters.focus = focus_chain
+        chain_events = chains.loc[chains["chain"] == focus_chain, "events"].iloc[0]
+        chain_ids = [int(e) for e in chain_events.split(VALUE_SEPARATOR)]
+        chain_rows = store.rows_of(chain_ids)
+        # The table takes a row restriction, shared with the search hits.
+        filters.rows = chain_rows if filters.rows is None else np.intersect1d(filters.rows, chain_rows)
+        filters.narrow(set(chain_ids))
+        st.sidebar.caption(f"{len(chain_ids):,} events in the chain")
+    return correlations, rule_name
+
+
+def _event_table(store, filters):
+    # Filtering, sorting and paging run here; only the current page is sent to the browser.
+    with st.expander("\U0001f50d Event Table (click to expand)", expanded=True):
+        all_columns = sorted(store.schema)
+        table_columns = st.multiselect(
+            "Columns",
+            all_columns,
+            default=[c for c in DEFAULT_COLUMNS if c in all_columns],
+            key="table_columns",
+        )
+        col1, col2, col3 = st.columns(3)
+        table_event_ids = col1.multiselect("EventID", distinct_values(store, "EventID"), key="table_event_ids")
+        table_computers = col2.multiselect("Computer", distinct_values(store, "Computer"), key="table_computers")
+        table_tags = col3.multiselect("Tag", [t for t in TAGS if t], key="table_tags")
+
+        col1, col2 = st.columns([1, 2])
+        table_min_risk = col1.number_input("Min risk score", min_value=0, value=0, key="table_min_risk")
+        table_keywords = col2.multiselect("Matched keyword", st.session_state.scorer.keywords, key="table_keywords")
+
+        col1, col2 = st.columns([3, 1])
+        table_text = col1.text_input("Contains", key="table_text")
+        # Fields kept only in the case file (the raw XML) are shown, not searched.
+        searchable = [c for c in all_columns if c in store.frame.columns]
+        table_text_column = col2.selectbox("in", ["(any column)"] + searchable, key="table_text_column")
+
+        col1, col2, col3, col4 = st.columns(4)
+        table_sort = col1.selectbox(
+            "Sort by", all_columns, index=all_columns.index("ts") if "ts" in all_columns else 0, key="table_sort"
+        )
+        table_descending = col2.checkbox("Descending", key="table_descending")
+        table_page_size = col3.selectbox("Rows per page", PAGE_SIZES, key="table_page_size")
+        query = TableQuery(
+            columns=table_columns,
+            event_ids=table_event_ids,
+            computers=table_computers,
+            tags=table_tags,
+            keywords=table_keywords,
+            min_risk=table_min_risk,
+            time_range=filters.time_window,
+            rows=filters.rows,
+            logon=filters.logon,
+            text=table_text,
+            text_column=None if table_text_column == "(any column)" else table_text_column,
+            sort_by=table_sort,
+            descending=table_descending,
+            page_size=table_page_size,
+        )
+        query.page = col4.number_input("Page", min_value=1, value=1, key="table_page") - 1
+        page, total = query_table(store, query)
+        st.dataframe(page, use_container_width=True, hide_index=True)
+        first = query.page * table_page_size
+        st.caption(
+            f"Rows {min(first + 1, total):,}–{first + len(page):,} of {total:,} matching events"
+            f" (page {query.page + 1} of {max(1, -(-total // table_page_size))})"
+        )
+    return page
+
+
+def _annotate(store, page, manual_tag_source):
+    st.sidebar.header("✏️ Annotate Events")
+    # Picked from the table's current page; the event is read from the case file,
+    # including the fields only kept there.
+    selected_uuid = st.sidebar.selectbox("Select Event by UUID (current table page)", page.index.tolist())
+    if selected_uuid is None:
+        st.sidebar.caption("No events on this table page.")
+        return
+    selected_event = store.fetch(selected_uuid)
+    if selected_event.get("PrettyXml"):
+        with st.sidebar.expander("Raw event XML"):
+            st.code(selected_event["PrettyXml"], language="xml")
+
+    st.sidebar.write(f"**Image:** {selected_event.get('Image', 'N/A')}")
+    new_tag = st.sidebar.selectbox(
+        "Tag",
+        TAGS,
+        index=TAGS.index(selected_event.get("tag", "")) if selected_event.get("tag", "") in TAGS else 0,
+    )
+    new_note = st.sidebar.text_area("Notes", value=selected_event.get("notes", ""))
+
+    # ======= MITRE Technique Selection Dropdown =======
+    mitre_ids = sorted(MITRE_TECHNIQUES.keys())
+    selected_mitre = st.sidebar.selectbox(
+        "MITRE Technique ID",
+        mitre_ids,
+        index=mitre_ids.index(selected_event.get("mitre", "") if selected_event.get("mitre", "") in mitre_ids else ""),
+    )
+    if selected_mitre:
+        mitre_info = MITRE_TECHNIQUES.get(selected_mitre, {"name": "", "url": ""})
+        if mitre_info["name"]:
+            st.sidebar.markdown(f"[{mitre_info['name']}]({mitre_info['url']})", unsafe_allow_html=True)
+    # ===================================================
+
+    annotation = {"tag": new_tag, "notes": new_note, "mitre": selected_mitre}
+    # Analyst tags are kept when rules change and events are re-tagged
+    if manual_tag_source and (new_tag, selected_mitre) != (selected_event.get("tag", ""), selected_event.get("mitre", "")):
+        annotation["tag_source"] = "manual"
+    # Only real edits are written, so reruns don't rewrite the case file
+    if any(selected_event.get(k, "") != v for k, v in annotation.items()):
+        # Journaled first, so the edit survives a crash before the case file write.
+        st.session_state.annotations.set(selected_uuid, **annotation)
+        store.update(selected_uuid, **annotation)
+
+    # Tree fields come from the event's EventID profile unless overridden here
+    overrides = st.session_state.field_overrides
+    if st.sidebar.checkbox("Custom tree fields for this event", value=selected_uuid in overrides, key=f"override_{selected_uuid}"):
+        all_keys = sorted(store.schema)
+        current = fields_for(selected_event, st.session_state.field_profiles, st.session_state.field_default, overrides)
+        overrides[selected_uuid] = st.sidebar.multiselect(
+            "Tree fields",
+            options=all_keys,
+            default=[f for f in current if f in all_keys],
+            key=f"override_fields_{selected_uuid}",
+        )
+    else:
+        overrides.pop(selected_uuid, None)
+
+    is_excluded = store.is_hidden(selected_uuid)
+    if st.sidebar.button("🚫 Hide this log from view" if not is_excluded else "♻️ Unhide this log"):
+        if is_excluded:
+            store.unhide(selected_uuid)
+        else:
+            store.hide(selected_uuid)
+
+
+def _share_annotations(store):
+    # Annotations travel as journal lines: download yours, merge other analysts'
+    # journals (latest edit per field wins); no event data is exchanged.
+    with st.sidebar.expander("\U0001f91d Share annotations"):
+        annotations = st.session_state.annotations
+        st.download_button(
+            f"Download annotations ({len(annotations):,} events)",
+            data=lambda: annotations.dumps(),
+            file_name="annotations.jsonl",
+        )
+        journals = st.file_uploader("Merge analysts' journals", type=["jsonl"], accept_multiple_files=True, key="merge_journals")
+        for journal in journals or []:
+            journal_key = file_digest(journal)
+            if journal_key in st.session_state.merged_journals:
+                continue
+            merged = annotations.merge(journal.getvalue().splitlines())
+            annotations.apply_to(store, merged)
+            st.session_state.merged_journals.add(journal_key)
+            st.success(f"Merged {journal.name}: {len(merged):,} events updated")
+
+
+def _hidden_logs(store):
+    if st.sidebar.checkbox("Show hidden logs"):
+        hidden_events = [store.get(event_id) for event_id in store.hidden_ids]
+        st.sidebar.write(f"Total hidden: {len(hidden_events)}")
+        for e in hidden_events:
+            st.sidebar.markdown(f"- `{e['uuid']}` | **{e.get('Image', 'N/A')}**")
+            if st.sidebar.button(f"Unhide {e['uuid']}", key=e["uuid"]):
+                store.unhide(e["uuid"])
+
+
+def _process_graph(store, filters):
+    st.subheader("\U0001f310 Process Relationship Graph")
+    # Level of detail: the graph is cut down to a node budget and aggregate
+    # nodes (grouped siblings, folded untagged subtrees, "+N more") are expanded
+    # from the picker below. Layout is precomputed, so the browser runs no physics.
+    def expand_graph_node():
+        if st.session_state.graph_drill:
+            st.session_state.graph_expanded.add(st.session_state.graph_drill)
+
+    col1, col2, col3, col4 = st.columns([1, 4, 1, 1])
+    node_budget = col1.number_input("Node budget", min_value=10, value=DEFAULT_NODE_BUDGET, step=50, key="graph_budget")
+    color_by = col1.radio("Color nodes by", COLOR_MODES, key="graph_color_by")
+
+    # The store keeps the graph up to date as events change; it is only reduced
+    # and rendered again when its version or the view settings change.
+    G = store.graph.G if filters.ids is None else store.graph.G.subgraph(filters.ids)
+    render_key = (
+        id(store),
+        store.graph.version,
+        node_budget,
+        frozenset(st.session_state.graph_expanded),
+        filters.time_window,
+        filters.search,
+        filters.logon,
+        filters.focus,
+        color_by,
+    )
+    if st.session_state.graph_render.get("key") != render_key:
+        view = lod_graph(G, budget=node_budget, expanded=st.session_state.graph_expanded, color_by=color_by)
+        st.session_state.graph_render = {
+            "key": render_key,
+            "html": render_html(view),
+            "nodes": len(view),
+            "aggregates": {n: d["label"].replace("\n", " · ") for n, d in view.nodes(data=True) if d.get("aggregate")},
+        }
+    graph_render = st.session_state.graph_render
+    aggregates = graph_render["aggregates"]
+    col2.selectbox("Drill into", [""] + list(aggregates), format_func=lambda n: aggregates.get(n, "—"), key="graph_drill")
+    col3.button("\U0001f50e Expand", on_click=expand_graph_node)
+    col4.button("↺ Reset view", on_click=st.session_state.graph_expanded.clear)
+    st.components.v1.html(graph_render["html"], height=600)
+    st.caption(f"{graph_render['nodes']:,} nodes shown for {len(G):,} visible events")
+
+
+def _tree_view(store, filters):
+    st.subheader("\U0001f9ec Execution Flow Timeline (Tree View)")
+
+    show_untagged = st.sidebar.checkbox("Show untagged events", value=True)
+
+    # --- Field profiles: one field list per EventID, with a default fallback ---
+    all_keys = sorted(store.schema)
+    profiles = st.session_state.field_profiles
+
+    def add_field_profile():
+        new_id = st.session_state.new_profile_event_id
+        if new_id != "":
+            profiles[profile_key(new_id)] = list(st.session_state.field_default)
+
+    st.sidebar.header("Fields Per EventID")
+    with st.sidebar.expander("Tree view field profiles"):
+        st.session_state.field_default = st.multiselect(
+            "Default (EventIDs without a profile)",
+            options=all_keys,
+            default=[f for f in st.session_state.field_default if f in all_keys],
+            key="profile_default",
+        )
+        case_event_ids = [profile_key(e) for e in distinct_values(store, "EventID")]
+        for event_id in sorted((e for e in case_event_ids if e in profiles), key=str):
+            profiles[event_id] = st.multiselect(
+                f"EventID {event_id}",
+                options=all_keys,
+                default=[f for f in profiles[event_id] if f in all_keys],
+                key=f"profile_{event_id}",
+            )
+        unprofiled = [e for e in case_event_ids if e not in profiles]
+        if unprofiled:
+            st.selectbox("Add a profile for EventID", [""] + unprofiled, key="new_profile_event_id")
+            st.button("➕ Add profile", on_click=add_field_profile)
+
+    # The tree is laid out iteratively and only into open nodes; each window of
+    # rows is sent as one HTML block.
+    def toggle_tree_node(open_state):
+        event_id = st.session_state.tree_toggle
+        if not event_id:
+            return
+        if open_state[event_id]:
+            st.session_state.tree_expanded.discard(event_id)
+            st.session_state.tree_collapsed.add(event_id)
+        else:
+            st.session_state.tree_collapsed.discard(event_id)
+            st.session_state.tree_expanded.add(event_id)
+
+    col1, col2, col3 = st.columns(3)
+    open_depth = col1.number_input("Levels open by default", min_value=0, value=DEFAULT_OPEN_DEPTH, key="tree_open_depth")
+    window_size = col2.selectbox("Rows per window", WINDOW_SIZES, key="tree_window_size")
+    rows = tree_rows(
+        store, show_untagged, open_depth, st.session_state.tree_expanded, st.session_state.tree_collapsed, within=filters.ids
+    )
+    window = col3.number_input("Window", min_value=1, value=1, key="tree_window") - 1
+    window_index, window_count, window_rows = tree_window(rows, window_size, window)
+    window_events = {row.event_id: store.get(row.event_id) for row in window_rows}
+
+    toggles = {
+        row.event_id: f"{'▾' if row.expanded else '▸'} {window_events[row.event_id].get('Image', 'Unknown')} [{row.event_id}]"
+        for row in window_rows
+        if row.has_children
+    }
+    col1, col2 = st.columns([5, 1])
+    col1.selectbox("Expand / collapse", [""] + list(toggles), format_func=lambda e: toggles.get(e, "—"), key="tree_toggle")
+    col2.button(
+        "↕️ Toggle",
+        on_click=toggle_tree_node,
+        args=({row.event_id: row.expanded for row in window_rows},),
+    )
+
+    st.markdown(
+        render_tree_html(
+            window_rows,
+            window_events,
+            lambda evt: fields_for(evt, profiles, st.session_state.field_default, st.session_state.field_overrides),
+        ),
+        unsafe_allow_html=True,
+    )
+    st.caption(f"Window {window_index + 1} of {window_count} · {len(rows):,} rows in the open tree")
+
+
+def _export(store, correlations):
+    # The file is only written when a download is clicked, chunk by chunk from the store
+    # into a temporary file; Streamlit then serves it from the one copy it keeps in memory.
+    st.sidebar.markdown("---")
+    st.sidebar.header("\U0001f4e4 Export Annotated Logs")
+    with st.sidebar.expander("Format, fields, events, compression"):
+        export_format = st.selectbox("Format", ["ndjson", "csv", "parquet", "json"], key="export_format")
+        export_projection = st.selectbox("Fields", PROJECTIONS, key="export_projection")
+        export_fields = ()
+        if export_projection == "selected fields":
+            export_fields = st.multiselect("Export fields", sorted(store.schema), key="export_fields")
+        export_scope = st.radio("Events", EVENT_SCOPES, horizontal=True, key="export_scope")
+        export_compression = st.selectbox("Compression", compressions(), key="export_compression")
+    export_options = {
+        "projection": export_projection,
+        "fields": tuple(export_fields),
+        "scope": export_scope,
+        "compression": export_compression,
+    }
+    st.sidebar.download_button(
+        "Download Annotated Logs",
+        data=lambda: export_store_file(store, export_format, **export_options),
+        file_name=file_name("annotated_logs", export_format, export_compression),
+    )
+    st.sidebar.download_button(
+        "Download Correlated Chains (CSV)",
+        data=lambda: export_bytes(chains_frame(correlations), "csv"),
+        file_name="correlated_chains.csv",
+    )
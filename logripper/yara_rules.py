@@ -0,0 +1,242 @@
+"""Helpers for compiling YARA rule source and working with it rule by rule.
+
+Compiled rule sets are cached in memory and on disk (via ``Rules.save`` /
+``yara.load``) keyed by a hash of their source, so large rule packs are only
+compiled once. Rule sets are also compared rule by rule (name plus a hash of
+the rule text) so a change to the sidebar editor can be turned into the
+smallest set of rules that existing events need to be re-scanned against.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yara
+
+CACHE_DIR = Path(os.environ.get("LOGRIPPER_CACHE_DIR", Path.home() / ".cache" / "logripper")) / "yara"
+MEMORY_CACHE_SIZE = 8
+
+_compiled = OrderedDict()
+_compiled_lock = threading.Lock()
+
+_RULE_START = re.compile(r"(?:(?:private|global)\s+)*rule\s+([A-Za-z_]\w*)")
+_MODIFIERS = re.compile(r"\s*((?:(?:private|global)\s+)*)rule\b")
+# Identifiers in a condition that could name a rule (not $string, #count, @offset or !length).
+_CONDITION_NAME = re.compile(r"(?<![$#@!\w.])([A-Za-z_]\w*)(\*)?")
+_HEADER_DIRECTIVE = re.compile(r"\b(?:import|include)\b")
+_CONDITION = re.compile(r"\bcondition\s*:")
+# Condition terms that read the scanned data rather than string hits.
+_DATA_TERM = re.compile(r"\b(?:filesize|entrypoint|u?int(?:8|16|32)(?:be)?)\b")
+_REGEX_STRING = re.compile(r"=\s*/((?:\\.|[^/\\\n])*)/")
+
+
+def _skip_literal(source, i):
+    """Index just past a comment or string literal starting at ``i``, else ``i``."""
+    if source.startswith("//", i):
+        end = source.find("\n", i)
+        return len(source) if end == -1 else end + 1
+    if source.startswith("/*", i):
+        end = source.find("*/", i + 2)
+        return len(source) if end == -1 else end + 2
+    if source[i] == '"':
+        j = i + 1
+        while j < len(source) and source[j] != '"':
+            j += 2 if source[j] == "\\" else 1
+        return j + 1
+    return i
+
+
+def _strip_literals(source):
+    """``source`` with comments removed and string literals emptied."""
+    parts = []
+    i = start = 0
+    while i < len(source):
+        skipped = _skip_literal(source, i)
+        if skipped == i:
+            i += 1
+            continue
+        parts.append(source[start:i])
+        parts.append('""' if source[i] == '"' else " ")
+        i = start = skipped
+    parts.append(source[start:])
+    return "".join(parts)
+
+
+def _anchored(regex):
+    """Whether a regex string body uses ``^`` or ``$`` as an anchor."""
+    body = re.sub(r"\\.", "", regex).replace("[^", "[")
+    return "^" in body or "$" in body
+
+
+def string_anchored(source):
+    """Whether every rule in ``source`` can match data only through hits of its strings.
+
+    Conditions reading the data directly (``filesize``, ``uint32(0)``, modules)
+    and regexes anchored with ``^``/``$`` can match an event on its own but not
+    inside a buffer of events, so rule sets using them are scanned event by event.
+    """
+    header, rules = split_rules(source)
+    if _HEADER_DIRECTIVE.search(_strip_literals(header)):
+        return False
+    for text in rules.values():
+        code = _strip_literals(text)
+        condition = _CONDITION.search(code)
+        if condition is None or _DATA_TERM.search(code, condition.end()):
+            return False
+        if any(_anchored(regex) for regex in _REGEX_STRING.findall(text)):
+            return False
+    return True
+
+
+def source_digest(source):
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def _load_saved(path):
+    try:
+        return yara.load(str(path))
+    except yara.Error:
+        return None
+
+
+def _save(rules, path):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(f".{os.getpid()}.tmp")
+        rules.save(str(partial))
+        os.replace(partial, path)
+    except (OSError, yara.Error):
+        pass
+
+
+def compile_cached(source, cache_dir=CACHE_DIR):
+    """Compile ``source``, reusing a cached compile of identical source.
+
+    Raises ``yara.SyntaxError`` like ``yara.compile`` when the source is invalid.
+    """
+    key = source_digest(source)
+    with _compiled_lock:
+        if key in _compiled:
+            _compiled.move_to_end(key)
+            return _compiled[key]
+
+    path = Path(cache_dir) / f"{key}.yarc"
+    rules = _load_saved(path) if path.exists() else None
+    if rules is None:
+        rules = yara.compile(source=source)
+        _save(rules, path)
+
+    with _compiled_lock:
+        _compiled[key] = rules
+        while len(_compiled) > MEMORY_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return rules
+
+
+def split_rules(source):
+    """Split rule source into its top-level header (imports/includes) and rules.
+
+    Returns ``(header, rules)`` where ``rules`` maps each rule name to its full
+    text, in declaration order.
+    """
+    header = []
+    rules = {}
+    depth = 0
+    i = 0
+    top_start = 0
+    rule_start = rule_name = None
+    while i < len(source):
+        skipped = _skip_literal(source, i)
+        if skipped != i:
+            i = skipped
+            continue
+        ch = source[i]
+        if depth == 0 and rule_name is None and (i == 0 or not (source[i - 1].isalnum() or source[i - 1] == "_")):
+            match = _RULE_START.match(source, i)
+            if match:
+                header.append(source[top_start:i])
+                rule_start, rule_name = i, match.group(1)
+                i = match.end()
+                continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0 and rule_name is not None:
+                rules[rule_name] = source[rule_start:i + 1]
+                rule_start = rule_name = None
+                top_start = i + 1
+        i += 1
+    header.append(source[top_start:] if rule_name is None else source[rule_start:])
+    return "".join(header).strip(), rules
+
+
+def rule_digest(text):
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _hidden_rule(text):
+    """Whether a rule is private or global, so its effect never shows as a match of its own name."""
+    return bool(_MODIFIERS.match(text).group(1).strip())
+
+
+def _referenced_names(text):
+    """Names and ``prefix*`` wildcards a rule's condition may use to refer to other rules."""
+    code = _strip_literals(text)
+    condition = _CONDITION.search(code)
+    if condition is None:
+        return set()
+    return {name + star for name, star in _CONDITION_NAME.findall(code, condition.end())}
+
+
+def _references(rules, names):
+    """Whether any of ``rules`` (name -> text) refers to one of ``names`` other than itself."""
+    for rule, text in rules.items():
+        for ref in _referenced_names(text):
+            if any(name != rule and (name.startswith(ref[:-1]) if ref.endswith("*") else name == ref) for name in names):
+                return True
+    return False
+
+
+@dataclass
+class RuleDiff:
+    added: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    modified: list = field(default_factory=list)
+    header_changed: bool = False
+    # A changed rule is private, global or used by another rule's condition,
+    # so events can start or stop matching without its name in their tags.
+    shared_changed: bool = False
+
+    @property
+    def unchanged(self):
+        return not (self.added or self.removed or self.modified or self.header_changed)
+
+
+def diff_rules(old_source, new_source):
+    """Compare two rule sources by rule name and normalized body hash."""
+    old_header, old_rules = split_rules(old_source or "")
+    new_header, new_rules = split_rules(new_source or "")
+    diff = RuleDiff(header_changed=rule_digest(old_header) != rule_digest(new_header))
+    for name, text in new_rules.items():
+        if name not in old_rules:
+            diff.added.append(name)
+        elif rule_digest(text) != rule_digest(old_rules[name]):
+            diff.modified.append(name)
+    diff.removed = [name for name in old_rules if name not in new_rules]
+    changed = diff.added + diff.removed + diff.modified
+    diff.shared_changed = (
+        any(_hidden_rule(rules[name]) for rules in (old_rules, new_rules) for name in changed if name in rules)
+        or _references(old_rules, changed)
+        or _references(new_rules, changed)
+    )
+    return diff
+
+
+def compile_subset(source, names):
+    """Compile only the named rules from ``source`` together with its header."""
+    header, rules = split_rules(source)
+    return yara.compile(source="\n\n".join([header, *(rules[name] for name in names)]))
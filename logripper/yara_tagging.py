@@ -0,0 +1,180 @@
+"""YARA tagging stage for ingested events.
+
+Matching runs in a thread pool so rules and events are never pickled.
+yara-python releases the GIL only inside ``Rules.match``, which is about a
+third of tagging time; building scan text, mapping hits back to events and
+writing tags hold it. Extra threads therefore add little (about 10% going
+from 1 to 8 workers), and the default stays small so tagging doesn't compete
+with the EVTX process pool. Batches are dispatched with ``Executor.map`` so
+results come back in ingest order and tagging stays deterministic.
+
+By default each batch is scanned as one delimited buffer: a single ``match``
+call finds which events have hits of any rule's strings (via a sorted offset
+table), and only those candidates are re-matched on their own text so every
+condition is still evaluated per event. That needs the rule source: rule sets
+that can match without a string hit (see :func:`supports_batch_scan`) are
+scanned event by event.
+"""
+import os
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+SCAN_FIELDS = ("CommandLine", "Image", "ParentCommandLine")
+DEFAULT_WORKERS = min(2, os.cpu_count() or 1)
+DEFAULT_BATCH_SIZE = 2048
+BUFFER_DELIMITER = b"\n\x00\n"
+RULE_SEPARATOR = ", "
+
+
+def scan_text(event, fields=SCAN_FIELDS):
+    return " ".join(str(event.get(f, "")) for f in fields)
+
+
+def tag_fields(matches):
+    """Annotation fields for an event from all rules that matched it."""
+    if not matches:
+        return None
+    meta = next((m.meta for m in matches if m.meta.get("tag")), matches[0].meta)
+    return {
+        "tag": meta.get("tag", ""),
+        "mitre": meta.get("mitre_id", ""),
+        "yara_rule": RULE_SEPARATOR.join(m.rule for m in matches),
+        "tag_source": "yara",
+    }
+
+
+def match_event(rules, event, fields=SCAN_FIELDS):
+    """Tag fields from every rule matching ``event``, or ``None``."""
+    return tag_fields(rules.match(data=scan_text(event, fields)))
+
+
+def _string_offsets(strings):
+    for string in strings:
+        instances = getattr(string, "instances", None)
+        if instances is None:
+            # yara-python < 4.3 reports (offset, identifier, data) tuples
+            yield string[0]
+        else:
+            for instance in instances:
+                yield instance.offset
+
+
+def match_batch(rules, texts):
+    """Match each text in ``texts`` using one buffer scan plus per-candidate checks.
+
+    Only valid for rules that :func:`supports_batch_scan`. Returns one list of
+    matches per text, in order.
+    """
+    import yara
+
+    encoded = [t.encode("utf-8") for t in texts]
+    starts = []
+    position = 0
+    for data in encoded:
+        starts.append(position)
+        position += len(data) + len(BUFFER_DELIMITER)
+
+    # Every rule's string hits count, matching or not: a rule that fails on the
+    # buffer (a count, a "not $b") can still match one of its events alone.
+    offsets = []
+    unattributed = []
+
+    def collect(data):
+        offsets.extend(_string_offsets(data["strings"]))
+        if data["matches"] and not data["strings"]:
+            unattributed.append(data["rule"])
+        return yara.CALLBACK_CONTINUE
+
+    def warn(kind, string):
+        # Hits past yara's per-string limit aren't reported, so they can't be attributed.
+        if kind == yara.CALLBACK_TOO_MANY_MATCHES:
+            unattributed.append(string)
+        return yara.CALLBACK_CONTINUE
+
+    rules.match(
+        data=BUFFER_DELIMITER.join(encoded),
+        callback=collect,
+        which_callbacks=yara.CALLBACK_ALL,
+        warnings_callback=warn,
+    )
+    if unattributed:
+        candidates = range(len(texts))
+    else:
+        candidates = {bisect_right(starts, offset) - 1 for offset in offsets}
+
+    results = [[] for _ in texts]
+    for index in candidates:
+        results[index] = rules.match(data=encoded[index])
+    return results
+
+
+def supports_batch_scan(rules, source=None):
+    """Whether every rule in ``rules`` (compiled from ``source``) needs a string hit to match.
+
+    Then an event without string hits evaluates like empty data, so buffer
+    offsets find every event that can match. ``None`` source means unknown.
+    """
+    from .yara_rules import string_anchored
+
+    return source is not None and string_anchored(source) and not rules.match(data=b"")
+
+
+class YaraTagger:
+    """Apply compiled rules to event batches on a pool of worker threads.
+
+    Use as a context manager so the pool is shut down after ingest. ``events``
+    and ``seconds`` accumulate across calls to :meth:`tag` for throughput
+    reporting. Buffer scanning needs the rules' ``source`` and is turned off
+    automatically for rule sets that can match without a string hit.
+    """
+
+    def __init__(
+        self,
+        rules,
+        workers=DEFAULT_WORKERS,
+        batch_size=DEFAULT_BATCH_SIZE,
+        fields=SCAN_FIELDS,
+        batch_scan=True,
+        source=None,
+    ):
+        self.rules = rules
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.fields = tuple(fields)
+        self.batch_scan = batch_scan and rules is not None and supports_batch_scan(rules, source)
+        self.events = 0
+        self.seconds = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="yara")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    @property
+    def rate(self):
+        """Events tagged per second so far."""
+        return self.events / self.seconds if self.seconds else 0.0
+
+    def _match_chunk(self, chunk):
+        if self.batch_scan:
+            texts = [scan_text(evt, self.fields) for evt in chunk]
+            return [tag_fields(matches) for matches in match_batch(self.rules, texts)]
+        return [match_event(self.rules, evt, self.fields) for evt in chunk]
+
+    def tag(self, events):
+        """Set ``tag``/``mitre``/``yara_rule``/``tag_source`` on matching events in place."""
+        started = time.perf_counter()
+        chunks = [events[i:i + self.batch_size] for i in range(0, len(events), self.batch_size)]
+        for chunk, results in zip(chunks, self._executor.map(self._match_chunk, chunks)):
+            for evt, result in zip(chunk, results):
+                if result:
+                    evt.update(result)
+        self.events += len(events)
+        self.seconds += time.perf_counter() - started
+        return events
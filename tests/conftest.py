@@ -0,0 +1,41 @@
+import pytest
+
+from logripper.casedb import CaseDB
+from logripper.dedup import event_id
+from logripper.store import EventStore
+
+
+def make_events(count=120):
+    events = []
+    for i in range(count):
+        evt = {
+            "EventID": (1, 3, 4624)[i % 3],
+            "Computer": f"host{i % 4}",
+            "Channel": "Microsoft-Windows-Sysmon/Operational",
+            "EventRecordID": i + 1,
+            "UtcTime": f"2025-07-12 07:{i // 60:02d}:{i % 60:02d}.000",
+            "ProcessGuid": f"{{guid-{i}}}",
+            "ParentProcessGuid": f"{{guid-{i // 2}}}" if i else "",
+            "Image": f"C:\\Windows\\System32\\tool{i % 5}.exe",
+            "CommandLine": f"tool{i % 5}.exe --run {i}",
+            "ProcessId": i * 4 if i % 2 else None,
+            "tag": "",
+            "notes": "",
+            "mitre": "",
+        }
+        evt["uuid"] = event_id(evt)
+        events.append({k: v for k, v in evt.items() if v is not None})
+    return events
+
+
+@pytest.fixture
+def case_path(tmp_path):
+    """A case file holding :func:`make_events`, written in batches and closed."""
+    path = tmp_path / "case.db"
+    db = CaseDB(path)
+    store = EventStore.open(db)
+    events = make_events()
+    for start in range(0, len(events), 50):
+        store.append(events[start:start + 50])
+    db.close()
+    return path
@@ -0,0 +1,126 @@
+import itertools
+
+from logripper.annotations import AnnotationStore, journal_path
+from logripper.store import EventStore
+
+from conftest import make_events
+
+
+def line(event_id, at, analyst="alice", **fields):
+    return AnnotationStore._line(event_id, fields, at, analyst)
+
+
+def test_journal_path():
+    assert journal_path("cases/incident.db") == "cases/incident.annotations.jsonl"
+
+
+def test_edits_survive_reopen(tmp_path):
+    path = str(tmp_path / "case.annotations.jsonl")
+    notes = AnnotationStore(path, analyst="alice")
+    assert notes.set(1, tag="Suspicious", notes="beacon", ignored="x") == {"tag": "Suspicious", "notes": "beacon"}
+    assert notes.set(1, tag="Suspicious") == {}
+    notes.set(2, mitre="T1059.001")
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+
+    reopened = AnnotationStore(path)
+    assert reopened.get(1) == {"tag": "Suspicious", "notes": "beacon"}
+    assert reopened.get(2) == {"mitre": "T1059.001"}
+    assert reopened.skipped == 0
+
+
+def test_torn_last_line_is_skipped_and_not_glued_to(tmp_path):
+    path = str(tmp_path / "case.annotations.jsonl")
+    complete = line(1, 10, tag="Malicious") + line(2, 11, notes="lateral movement")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(complete + line(3, 12, tag="Benign")[:25])  # crash mid-write
+
+    notes = AnnotationStore(path, analyst="bob")
+    assert notes.skipped == 1
+    assert (notes.get(1), notes.get(2), 3 in notes) == ({"tag": "Malicious"}, {"notes": "lateral movement"}, False)
+
+    # The next edit starts on a line of its own, so it isn't lost to the torn one.
+    notes.set(3, tag="Benign")
+    reopened = AnnotationStore(path)
+    assert reopened.get(3) == {"tag": "Benign"}
+    assert reopened.get(1) == {"tag": "Malicious"}
+    assert reopened.skipped == 1
+
+
+def test_complete_last_line_without_newline(tmp_path):
+    path = str(tmp_path / "case.annotations.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(line(1, 10, tag="Malicious").rstrip("\n"))
+    notes = AnnotationStore(path)
+    assert notes.get(1) == {"tag": "Malicious"}
+    notes.set(2, tag="Benign")
+    assert AnnotationStore(path).get(2) == {"tag": "Benign"}
+
+
+def test_unreadable_and_foreign_lines(tmp_path):
+    path = str(tmp_path / "case.annotations.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join([
+            "not json",
+            '{"uuid": "x", "fields": {"tag": "a"}, "at": 1}',
+            '{"uuid": 4, "at": 1}',
+            '["uuid", 4]',
+            '{"uuid": 4, "fields": {"tag": "kept", "risk_score": 99}, "at": 1}',
+            "",
+        ]))
+    notes = AnnotationStore(path)
+    assert notes.skipped == 4
+    assert notes.get(4) == {"tag": "kept"}
+
+
+def test_latest_edit_wins_in_any_merge_order():
+    edits = [
+        line(1, 10, "alice", tag="Suspicious", notes="first look"),
+        line(1, 20, "bob", tag="Malicious"),
+        line(1, 20, "alice", notes="same time, earlier name"),
+        line(1, 5, "carol", notes="stale", mitre="T1021"),
+        line(2, 7, "bob", tag="Benign"),
+    ]
+    results = set()
+    for order in itertools.permutations(edits):
+        notes = AnnotationStore()
+        notes.merge(list(order))
+        results.add(tuple(sorted((e, tuple(sorted(notes.get(e).items()))) for e in (1, 2))))
+    assert results == {
+        (
+            (1, (("mitre", "T1021"), ("notes", "same time, earlier name"), ("tag", "Malicious"))),
+            (2, (("tag", "Benign"),)),
+        )
+    }
+
+
+def test_merge_is_idempotent_and_journals_only_news(tmp_path):
+    theirs = AnnotationStore()
+    theirs.merge([line(1, 10, "bob", tag="Malicious"), line(2, 11, "bob", notes="pivot")])
+
+    path = str(tmp_path / "case.annotations.jsonl")
+    ours = AnnotationStore(path, analyst="alice")
+    ours.merge([line(2, 50, "alice", notes="newer note")])
+    shared = theirs.dumps().splitlines(keepends=True)
+    assert ours.merge(shared) == {1: {"tag": "Malicious"}}
+    assert ours.merge(shared) == {}
+    assert ours.get(2) == {"notes": "newer note"}
+
+    reopened = AnnotationStore(path)
+    assert (reopened.get(1), reopened.get(2)) == ({"tag": "Malicious"}, {"notes": "newer note"})
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+    assert AnnotationStore().merge(reopened.dumps().splitlines()) == {1: {"tag": "Malicious"}, 2: {"notes": "newer note"}}
+
+
+def test_apply_to_store_columns():
+    events = make_events(10)
+    store = EventStore()
+    store.append(events)
+    notes = AnnotationStore()
+    first, second = events[0]["uuid"], events[1]["uuid"]
+    notes.merge([line(first, 1, tag="Malicious", mitre="T1003"), line(second, 1, notes="ok"), line(12345, 1, tag="gone")])
+    assert notes.apply_to(store) == sorted([first, second])
+    assert store.get(first)["tag"] == "Malicious" and store.get(first)["mitre"] == "T1003"
+    assert store.get(second)["notes"] == "ok"
+    assert notes.apply_to(store) == []
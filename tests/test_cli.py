@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from logripper.casedb import CaseDB
+from logripper.cli import main
+from logripper.store import EventStore
+
+EVTX = str(Path(__file__).parent / "data" / "sysmon_security.evtx")
+WHOAMI_RULE = 'rule whoami { meta: tag = "Discovery" mitre_id = "T1033" strings: $a = "whoami" condition: $a }'
+CMD_RULE = 'rule cmd { meta: tag = "Execution" mitre_id = "T1059" strings: $a = "cmd.exe" condition: $a }'
+
+
+def ingest(case, *options):
+    assert main(["ingest", EVTX, "--out", str(case), "--jobs", "1", *options]) == 0
+    db = CaseDB(case)
+    return EventStore.open(db), db
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_case_records_keywords_and_rules(tmp_path):
+    pytest.importorskip("yara")
+    keywords = {"whoami": 5}
+    case = tmp_path / "case.db"
+    store, db = ingest(
+        case,
+        "--keywords", write(tmp_path, "weights.json", json.dumps(keywords)),
+        "--rules", write(tmp_path, "rules.yar", WHOAMI_RULE),
+    )
+    assert db.get_meta("keyword_weights") == keywords
+    assert db.get_meta("scored_weights") == keywords
+    assert db.get_meta("tagged_source") == WHOAMI_RULE
+    sysmon = store.frame[store.frame["EventID"] == 1]
+    assert set(sysmon["risk_score"]) == {5}
+    assert set(sysmon["tag"]) == {"Discovery"}
+
+
+def test_extending_a_case_rescores_and_retags(tmp_path):
+    pytest.importorskip("yara")
+    case = tmp_path / "case.db"
+    _, db = ingest(case, "--rules", write(tmp_path, "old.yar", WHOAMI_RULE))
+    db.close()
+    keywords = {"cmd.exe": 2}
+    store, db = ingest(
+        case,
+        "--keywords", write(tmp_path, "weights.json", json.dumps(keywords)),
+        "--rules", write(tmp_path, "new.yar", CMD_RULE),
+    )
+    assert len(store) == 12
+    assert db.get_meta("scored_weights") == keywords
+    assert db.get_meta("tagged_source") == CMD_RULE
+    sysmon = store.frame[store.frame["EventID"] == 1]
+    assert set(sysmon["risk_score"]) == {2}
+    assert set(sysmon["yara_rule"]) == {"cmd"}
+    assert set(sysmon["tag"]) == {"Execution"}
+
+
+def test_unscored_case_is_left_for_the_viewer(tmp_path):
+    _, db = ingest(tmp_path / "case.db", "--no-score")
+    assert db.get_meta("scored_weights", "unset") is None
+    assert db.get_meta("tagged_source") == ""
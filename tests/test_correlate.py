@@ -0,0 +1,137 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from logripper.correlate import RULES, band_join, chains_frame, correlate, run_rule
+from logripper.dedup import event_id
+from logripper.store import EventStore
+
+USER_RULE, DOWNLOAD_RULE = RULES
+_records = itertools.count(1)
+
+
+def event(event_id_, time, computer="WS-01", channel="Security", **fields):
+    evt = {
+        "EventID": event_id_,
+        "Computer": computer,
+        "Channel": channel,
+        "EventRecordID": next(_records),
+        "TimeCreated": f"2025-07-12T{time}Z",
+        **fields,
+    }
+    evt["uuid"] = event_id(evt)
+    return evt
+
+
+def sysmon(event_id_, time, computer="WS-01", **fields):
+    return event(event_id_, time, computer, "Microsoft-Windows-Sysmon/Operational", UtcTime=f"2025-07-12 {time}", **fields)
+
+
+def store_of(events):
+    store = EventStore()
+    store.append([dict(evt) for evt in events])
+    return store
+
+
+def test_created_user_joins_its_group_additions():
+    sid = "S-1-5-21-1004336348-1177238915-682003330-1106"
+    created = event(4720, "10:00:00", TargetUserName="svc-backup", TargetSid=sid, SubjectUserName="admin")
+    admins = event(4732, "10:00:05", TargetUserName="Administrators", MemberSid=sid.lower())
+    rdp = event(4732, "10:00:07", TargetUserName="Remote Desktop Users", MemberSid=f" {sid} ")
+    other = event(4732, "10:00:09", TargetUserName="Backup Operators", MemberSid="S-1-5-21-1-2-3-999")
+    lonely = event(4720, "09:00:00", TargetUserName="temp", TargetSid="S-1-5-21-1-2-3-1107")
+    no_sid = event(4732, "10:00:10", TargetUserName="Guests", MemberSid="-")
+    chains = run_rule(store_of([admins, created, rdp, other, lonely, no_sid]), USER_RULE)
+
+    # Anchors in time order; a 4720 without additions stays, as the step is optional.
+    assert chains["created.TargetUserName"].tolist() == ["temp", "svc-backup"]
+    assert chains["chain"].tolist() == [f"{USER_RULE.name}:{lonely['uuid']}", f"{USER_RULE.name}:{created['uuid']}"]
+    assert chains["added_to.TargetUserName"].tolist() == ["", "Administrators, Remote Desktop Users"]
+    assert chains["added_to.uuid"].tolist() == ["", f"{admins['uuid']}, {rdp['uuid']}"]
+    assert chains["events"].iloc[1] == f"{created['uuid']}, {admins['uuid']}, {rdp['uuid']}"
+    assert chains["created.SubjectUserName"].iloc[1] == "admin"
+
+
+def test_hidden_events_leave_chains():
+    sid = "S-1-5-21-1-2-3-1200"
+    created = event(4720, "10:00:00", TargetUserName="x", TargetSid=sid)
+    added = event(4732, "10:00:05", TargetUserName="Administrators", MemberSid=sid)
+    store = store_of([created, added])
+    store.hide(added["uuid"])
+    assert run_rule(store, USER_RULE)["added_to.uuid"].tolist() == [""]
+    store.hide(created["uuid"])
+    assert run_rule(store, USER_RULE).empty
+
+
+def download_chain(computer="WS-01", guid="{A1B2C3D4-0001-0000-0000-000000000001}", image="C:\\Users\\bob\\Downloads\\invoice.exe"):
+    return [
+        sysmon(15, "09:30:00.000", computer, TargetFilename=f"{image}:Zone.Identifier", Contents="[ZoneTransfer] HostUrl=http://evil.test/i.exe", Image="msedge.exe"),
+        sysmon(1, "10:00:00.000", computer, Image=image, CommandLine=f'"{image}"', ProcessGuid=guid, User="CORP\\bob"),
+        sysmon(22, "10:00:02.000", computer, ProcessGuid=guid.lower(), QueryName="c2.evil.test", QueryResults="203.0.113.9;"),
+        sysmon(3, "10:00:03.000", computer, ProcessGuid=guid, DestinationIp="203.0.113.9", DestinationPort="443"),
+        # Outside the hour after the process started.
+        sysmon(3, "11:30:00.000", computer, ProcessGuid=guid, DestinationIp="198.51.100.1", DestinationPort="80"),
+    ]
+
+
+def test_downloaded_file_executed_chain():
+    events = download_chain() + download_chain(computer="WS-02")[1:]  # WS-02 ran it without a recorded download
+    # The same ProcessGuid on another host isn't the same process.
+    events.append(sysmon(22, "10:00:04.000", "WS-03", ProcessGuid="{A1B2C3D4-0001-0000-0000-000000000001}", QueryName="other.test"))
+    chains = run_rule(store_of(events), DOWNLOAD_RULE)
+    assert len(chains) == 1
+    chain = chains.iloc[0]
+    assert chain["process.Image"] == "C:\\Users\\bob\\Downloads\\invoice.exe"
+    assert chain["download.Contents"].endswith("HostUrl=http://evil.test/i.exe")
+    assert chain["dns.QueryName"] == "c2.evil.test"
+    assert chain["network.DestinationIp"] == "203.0.113.9"
+    assert chain["events"] == ", ".join(str(evt["uuid"]) for evt in events[:4])
+
+
+@pytest.mark.parametrize(
+    "time, joined",
+    [
+        ("2025-07-05 10:00:00.000", True),
+        ("2025-07-05 09:59:59.999", False),
+        ("2025-07-12 10:01:00.000", True),
+        ("2025-07-12 10:01:00.001", False),
+    ],
+)
+def test_download_window_edges(time, joined):
+    # From seven days before the process started to a minute after.
+    events = download_chain()
+    events[0]["UtcTime"] = time
+    assert len(run_rule(store_of(events), DOWNLOAD_RULE)) == joined
+
+
+def test_optional_steps_missing():
+    events = download_chain()[:2]
+    chains = run_rule(store_of(events), DOWNLOAD_RULE)
+    assert chains[["dns.uuid", "network.uuid"]].values.tolist() == [["", ""]]
+
+
+def test_correlate_runs_every_rule():
+    results = correlate(store_of(download_chain()))
+    assert set(results) == {rule.name for rule in RULES}
+    assert results[USER_RULE.name].empty
+    assert list(chains_frame(results)["rule"]) == [DOWNLOAD_RULE.name]
+    assert chains_frame({}).empty
+
+
+def test_band_join_matches_nested_loops():
+    rng = np.random.default_rng(5)
+    left_codes, right_codes = rng.integers(-1, 6, 300), rng.integers(-1, 6, 400)
+    left_ts, right_ts = rng.integers(0, 50, 300) * 1_000_000_000, rng.integers(0, 50, 400) * 1_000_000_000
+    for within in (None, (0, 5), (-3, 2), (-10, -4)):
+        left, right = band_join(left_codes, left_ts, right_codes, right_ts, within)
+        expected = {
+            (i, j)
+            for i in range(300)
+            for j in range(400)
+            if left_codes[i] >= 0
+            and left_codes[i] == right_codes[j]
+            and (within is None or left_ts[i] + within[0] * 10**9 <= right_ts[j] <= left_ts[i] + within[1] * 10**9)
+        }
+        assert set(zip(left.tolist(), right.tolist())) == expected
+        assert len(left) == len(expected)
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+from logripper.casedb import CaseDB
+from logripper.dedup import ID_MASK, DedupIndex, content_hash, dedup_key, event_id
+from logripper.store import EventStore
+
+from conftest import make_events
+
+RECORD = {"Computer": "WS-01", "Channel": "Security", "EventRecordID": 42, "EventID": 4624, "LogonType": "3"}
+
+
+def test_record_id_identifies_the_event():
+    other_export = dict(RECORD, EventRecordID="42", LogonType="10", Message="rendered elsewhere", tag="x")
+    assert dedup_key(RECORD) == ("WS-01", "Security", "42")
+    assert event_id(other_export) == event_id(RECORD)
+    assert event_id(dict(RECORD, Computer="WS-02")) != event_id(RECORD)
+    assert event_id(dict(RECORD, Channel="System")) != event_id(RECORD)
+    assert event_id(dict(RECORD, EventRecordID=43)) != event_id(RECORD)
+
+
+@pytest.mark.parametrize("missing", [None, "", float("nan"), pd.NA])
+def test_missing_record_id_falls_back_to_content(missing):
+    evt = dict(RECORD, EventRecordID=missing)
+    assert dedup_key(evt) == content_hash(evt)
+    assert event_id(evt) == event_id({k: v for k, v in RECORD.items() if k != "EventRecordID"})
+    assert event_id(dict(evt, LogonType="10")) != event_id(evt)
+
+
+def test_content_hash_ignores_derived_fields_order_and_empty_values():
+    evt = {"Computer": "WS-01", "EventID": 1, "Image": "cmd.exe", "ProcessId": 4}
+    annotated = {
+        "ProcessId": "4",
+        "Image": "cmd.exe",
+        "EventID": 1,
+        "Computer": "WS-01",
+        "uuid": 7,
+        "ts": 0,
+        "tag": "Suspicious",
+        "notes": "seen",
+        "mitre": "T1059",
+        "yara_rule": "r",
+        "tag_source": "manual",
+        "risk_score": 3,
+        "matched_keywords": "cmd.exe",
+        "ParentImage": None,
+        "User": "",
+    }
+    assert content_hash(annotated) == content_hash(evt)
+    assert content_hash(dict(evt, Image="powershell.exe")) != content_hash(evt)
+
+
+def test_ids_fit_int64():
+    ids = [event_id(evt) for evt in make_events(500)] + [event_id({"EventID": i}) for i in range(500)]
+    assert all(0 <= i <= ID_MASK for i in ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_index_keeps_each_event_once():
+    index = DedupIndex()
+    events = make_events(10)
+    index.add(events[:4])
+    batch = events[2:] + events[5:7]
+    fresh = index.new_events(batch)
+    assert [evt["uuid"] for evt in fresh] == [evt["uuid"] for evt in events[4:]]
+    assert events[3] in index and events[4] not in index
+    index.add_frame(pd.DataFrame({"uuid": [evt["uuid"] for evt in events[4:]]}))
+    assert len(index) == 10
+    assert index.new_events(events) == []
+
+
+def test_ids_survive_a_case_round_trip(tmp_path):
+    # Events without record ids are read back with typed columns (ProcessId as Int64).
+    events = []
+    for evt in make_events(30):
+        evt.pop("EventRecordID")
+        evt["uuid"] = event_id(evt)
+        events.append(evt)
+    db = CaseDB(tmp_path / "case.db")
+    EventStore.open(db).append(events)
+    frame = db.fetch([evt["uuid"] for evt in events])
+    assert [event_id(row) for row in frame.to_dict("records")] == frame["uuid"].tolist()
+    db.close()
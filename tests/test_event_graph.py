@@ -0,0 +1,94 @@
+import random
+
+from logripper.store import EventStore
+from logripper.taxonomy import TAG_COLORS
+
+from conftest import make_events
+
+
+def rebuilt(events, hidden, edits):
+    """A store built in one go with the final state, to compare incremental maintenance against."""
+    store = EventStore()
+    store.append([dict(evt, **edits.get(evt["uuid"], {})) for evt in events])
+    for event_id in hidden:
+        store.hide(event_id)
+    return store
+
+
+def assert_same_graph(store, expected):
+    assert set(store.graph.G.edges) == set(expected.graph.G.edges)
+    assert dict(store.graph.G.nodes(data=True)) == dict(expected.graph.G.nodes(data=True))
+
+
+def test_annotation_edits_only_touch_their_node():
+    events = make_events(30)
+    store = EventStore()
+    store.append([dict(evt) for evt in events])
+    event_id = events[4]["uuid"]
+    edges, version = set(store.graph.G.edges), store.graph.version
+
+    store.update(event_id, notes="looked at this")
+    store.update(event_id, tag="")
+    assert store.graph.version == version
+
+    store.update(event_id, tag="Persistence", mitre="T1003")
+    assert store.graph.version == version + 1
+    assert store.graph.node_colors[event_id] == TAG_COLORS["Persistence"]
+    attrs = store.graph.G.nodes[event_id]
+    assert (attrs["tag"], attrs["color"]) == ("Persistence", TAG_COLORS["Persistence"])
+    assert "Persistence\nT1003: " in attrs["label"]
+    assert set(store.graph.G.edges) == edges
+
+    version = store.graph.version
+    store.update_many([events[5]["uuid"], events[6]["uuid"]], risk_score=[3, 3])
+    assert store.graph.G.nodes[events[5]["uuid"]]["risk"] == 3
+    assert store.graph.version > version
+    version = store.graph.version
+    store.update_many([events[5]["uuid"], events[6]["uuid"]], risk_score=[3, 3])
+    assert store.graph.version == version
+
+
+def test_hide_and_unhide_match_a_rebuild():
+    # Several events per process, so hiding a process's first event moves its children.
+    events = make_events(60)
+    events += [dict(evt, uuid=evt["uuid"] + 1, EventID=3, EventRecordID=evt["EventRecordID"] + 1000) for evt in events[::3]]
+    rng = random.Random(11)
+    rng.shuffle(events)
+
+    store = EventStore()
+    for start in range(0, len(events), 8):
+        store.append([dict(evt) for evt in events[start:start + 8]])
+    # Each event hidden on its own, then many at once and unhidden in another order.
+    for evt in events:
+        store.hide(evt["uuid"])
+        assert_same_graph(store, rebuilt(events, {evt["uuid"]}, {}))
+        store.unhide(evt["uuid"])
+        assert_same_graph(store, rebuilt(events, set(), {}))
+    hidden = {evt["uuid"] for evt in events[::3]}
+    for event_id in hidden:
+        store.hide(event_id)
+    assert_same_graph(store, rebuilt(events, hidden, {}))
+    for event_id in sorted(hidden):
+        version = store.graph.version
+        store.unhide(event_id)
+        hidden.discard(event_id)
+        assert store.graph.version > version
+        assert_same_graph(store, rebuilt(events, hidden, {}))
+    assert set(store.graph.G) == set(store.ids())
+
+
+def test_appends_link_to_parents_that_arrive_later():
+    events = make_events(40)
+    store = EventStore()
+    for evt in reversed(events):
+        store.append([dict(evt)])
+    store.update(events[1]["uuid"], tag="C2")
+    assert_same_graph(store, rebuilt(events, (), {events[1]["uuid"]: {"tag": "C2"}}))
+    assert store.graph.G.has_edge(events[0]["uuid"], events[1]["uuid"])
+
+
+def test_headless_store_has_no_graph_work():
+    store = EventStore(views=False)
+    store.append(make_events(10))
+    store.update(make_events(10)[0]["uuid"], tag="C2")
+    assert len(store.graph.G) == 0 and store.graph.version == 0
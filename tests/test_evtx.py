@@ -0,0 +1,153 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from logripper.evtx import is_evtx, iter_evtx
+from logripper.pipeline import parse_file
+
+# One 64 KB chunk with 12 records in the two shapes Windows writes: Sysmon
+# events with EventData in the event template, and Security events passing it
+# as an embedded BinXML fragment with its own template. It was built to the
+# EVTX format and cross-checked against the Rust ``evtx`` parser.
+FIXTURE = Path(__file__).parent / "data" / "sysmon_security.evtx"
+
+# A real Security log written by Windows (host "temporal", June 2016): seven
+# records of a failed RDP logon and the firewall drops around it. It is the
+# sample shipped with the ``evtx`` Python bindings (pyevtx-rs, MIT/Apache-2.0).
+WINDOWS_SAMPLE = Path(__file__).parent / "data" / "Security_short_selected.evtx"
+
+
+@pytest.fixture(scope="module")
+def events():
+    with open(FIXTURE, "rb") as f:
+        return list(iter_evtx(f))
+
+
+def data_values(event):
+    return {d["Name"]: d["Value"] for d in event["DataValues"]}
+
+
+def test_records_in_file_order(events):
+    assert [e["EventRecordID"] for e in events] == [str(i) for i in range(1, 13)]
+    assert [e["EventID"] for e in events[:3]] == [1, 1, 4624]
+
+
+def test_system_fields(events):
+    sysmon = events[0]
+    assert sysmon["TimeCreated"] == "2025-07-12T18:00:01.1234624Z"
+    assert sysmon["ProviderName"] == "Microsoft-Windows-Sysmon"
+    assert sysmon["Channel"] == "Microsoft-Windows-Sysmon/Operational"
+    assert sysmon["Computer"] == "WS-01.corp.local"
+    assert (sysmon["ProcessID"], sysmon["ThreadID"]) == ("2001", "3000")
+    assert sysmon["UserID"] == "S-1-5-18"
+    assert events[2]["UserID"] == ""
+
+
+def test_event_data_values(events):
+    assert data_values(events[0]) == {
+        "UtcTime": "2025-07-12 18:00:01.123",
+        "ProcessGuid": "{00000001-0000-0000-0000-000000000001}",
+        "ProcessId": "4001",
+        "Image": "C:\\Windows\\System32\\cmd.exe",
+        "CommandLine": "cmd.exe /c whoami 1 ü",
+        "ParentProcessGuid": "{00000000-0000-0000-0000-000000000000}",
+        "IsExecutable": "false",
+        "Empty": "null",
+        "Blob": "01AB",
+    }
+    assert data_values(events[2]) == {
+        "TargetUserName": "user3",
+        "LogonType": "3",
+        "IpAddress": "10.0.0.3",
+        "TargetUserSid": "S-1-5-21-1-2-3-1003",
+        "Note": "a&c",
+    }
+
+
+def test_chunk_workers_keep_order(events):
+    with open(FIXTURE, "rb") as f:
+        assert list(iter_evtx(f, workers=2)) == events
+
+
+def test_parse_file_flattens(events):
+    with open(FIXTURE, "rb") as f:
+        assert is_evtx(f)
+        flat = list(parse_file(f))
+    assert len(flat) == len(events)
+    assert flat[0]["CommandLine"] == "cmd.exe /c whoami 1 ü"
+    assert flat[2]["TargetUserName"] == "user3"
+    assert len({e["uuid"] for e in flat}) == len(flat)
+
+
+def test_not_evtx():
+    with pytest.raises(ValueError):
+        list(iter_evtx(io.BytesIO(b"[]")))
+
+
+def test_matches_reference_parser(events):
+    evtx = pytest.importorskip("evtx")
+
+    def normal(value):
+        # The reference renders booleans as JSON and GUIDs without braces.
+        return "null" if value in (None, "") else str(value).strip("{}").lower()
+
+    for record, event in zip(evtx.PyEvtxParser(str(FIXTURE)).records_json(), events):
+        reference = json.loads(record["data"])["Event"]
+        assert str(reference["System"]["EventRecordID"]) == event["EventRecordID"]
+        assert reference["System"]["Computer"] == event["Computer"]
+        expected = {k: normal(v) for k, v in (reference.get("EventData") or {}).items()}
+        assert {k: normal(v) for k, v in data_values(event).items()} == expected
+
+
+def test_real_windows_log():
+    with open(WINDOWS_SAMPLE, "rb") as f:
+        events = list(iter_evtx(f))
+    assert [(e["EventRecordID"], e["EventID"]) for e in events] == [
+        ("319457771", 5152),
+        ("319457830", 4611),
+        ("319457831", 4776),
+        ("319457832", 4625),
+        ("319457855", 5152),
+        ("319457856", 5157),
+        ("319457858", 4673),
+    ]
+    failed = events[3]
+    assert failed["TimeCreated"] == "2016-06-29T15:24:36.6860000Z"
+    assert failed["ProviderName"] == "Microsoft-Windows-Security-Auditing"
+    assert (failed["Channel"], failed["Computer"]) == ("Security", "temporal")
+    assert (failed["ProcessID"], failed["ThreadID"], failed["Task"]) == ("768", "2764", "12544")
+    assert data_values(failed) == {
+        "SubjectUserSid": "S-1-5-18",
+        "SubjectUserName": "TEMPORAL$",
+        "SubjectDomainName": "WORKGROUP",
+        "SubjectLogonId": "0x3e7",
+        "TargetUserSid": "S-1-0-0",
+        "TargetUserName": "Administrator",
+        "TargetDomainName": "TEMPORAL",
+        "Status": "0xc000006d",
+        "FailureReason": "%%2313",
+        "SubStatus": "0xc000006a",
+        "LogonType": "10",
+        "LogonProcessName": "User32 ",
+        "AuthenticationPackageName": "Negotiate",
+        "WorkstationName": "TEMPORAL",
+        "TransmittedServices": "-",
+        "LmPackageName": "-",
+        "KeyLength": "0",
+        "ProcessId": "0xc38",
+        "ProcessName": "C:\\Windows\\System32\\winlogon.exe",
+        "IpAddress": "23.94.153.202",
+        "IpPort": "60167",
+    }
+    assert data_values(events[5])["RemoteUserID"] == "S-1-0-0"
+    assert data_values(events[6])["PrivilegeList"] == "SeTcbPrivilege"
+
+
+def test_real_windows_log_flattens():
+    with open(WINDOWS_SAMPLE, "rb") as f:
+        flat = list(parse_file(f))
+    assert flat[2]["Status"] == "0xc000006a"
+    assert flat[3]["IpAddress"] == "23.94.153.202"
+    assert flat[0]["DestPort"] == "3389"
@@ -0,0 +1,63 @@
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from logripper.casedb import CaseDB
+from logripper.export import EVENT_SCOPES, export_store_bytes, export_store_file
+from logripper.store import EventStore
+
+from conftest import make_events
+
+
+@pytest.mark.parametrize("scope", EVENT_SCOPES)
+def test_parquet_export_after_reopen(case_path, scope):
+    store = EventStore.open(CaseDB(case_path))
+    store.hide(store.ids()[0])
+    table = pq.read_table(io.BytesIO(export_store_bytes(store, "parquet", scope=scope, chunk_size=16)))
+    rows = {"all": slice(None), "visible": store.visible_mask(), "hidden": ~store.visible_mask()}[scope]
+    frame = store.frame[rows]
+    assert table.num_rows == len(frame)
+    assert table.column("EventID").to_pylist() == frame["EventID"].astype(int).tolist()
+    assert table.column("uuid").to_pylist() == frame["uuid"].tolist()
+
+
+@pytest.mark.parametrize("fmt", ["json", "ndjson", "csv"])
+def test_text_export_after_reopen(case_path, fmt):
+    store = EventStore.open(CaseDB(case_path))
+    data = export_store_bytes(store, fmt, compression="gzip", projection="annotations only")
+    assert data[:2] == b"\x1f\x8b"
+
+
+@pytest.fixture
+def gappy_store():
+    # One event without an EventRecordID turns the column into floats in the store.
+    events = make_events(4)
+    del events[1]["EventRecordID"]
+    store = EventStore()
+    store.append(events)
+    return store
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson", "json", "parquet"])
+def test_record_ids_export_as_integers(gappy_store, fmt):
+    data = export_store_bytes(gappy_store, fmt, projection="annotations only")
+    if fmt == "parquet":
+        column = pq.read_table(io.BytesIO(data)).column("EventRecordID")
+        assert str(column.type) == "int64" and column.to_pylist() == [1, None, 3, 4]
+    elif fmt == "csv":
+        assert pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)["EventRecordID"].tolist() == ["1", "", "3", "4"]
+    else:
+        text = data.decode("utf-8").replace(" ", "")
+        assert '"EventRecordID":1,' in text and '"EventRecordID":null' in text and "1.0" not in text
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson", "json", "parquet"])
+def test_export_file_matches_bytes(gappy_store, fmt):
+    reader = export_store_file(gappy_store, fmt, scope="visible")
+    # Streamlit's download button reads BufferedReader objects; other file types are refused.
+    assert isinstance(reader, io.BufferedReader) and reader.tell() == 0
+    with reader:
+        assert reader.read() == export_store_bytes(gappy_store, fmt, scope="visible")
+    assert reader.raw.closed
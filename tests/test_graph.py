@@ -0,0 +1,102 @@
+import networkx as nx
+import pytest
+
+from logripper.graph import AGGREGATE_COLOR, lod_graph, render_html, risk_color, tree_layout
+from logripper.keywords import FLAG_SCORE
+
+
+def graph(edges, tagged=(), risky=(), images=None):
+    G = nx.DiGraph()
+    nodes = {n for edge in edges for n in edge} | set(tagged) | set(risky) | set(images or {})
+    for n in sorted(nodes):
+        image = (images or {}).get(n, f"img{n}.exe")
+        G.add_node(n, label=f"{image}\n{n}", color="#fff", image=image, tag="C2" if n in tagged else "", risk=FLAG_SCORE if n in risky else 0)
+    G.add_edges_from(edges)
+    return G
+
+
+def represented(G, view):
+    """Each event of ``G`` the view shows, directly or through an aggregate, mapped to its view node."""
+    shown = {}
+    for node, attrs in view.nodes(data=True):
+        for member in attrs["members"] if attrs.get("aggregate") else [node]:
+            assert member not in shown, f"{member} shown twice"
+            shown[member] = node
+    assert set(shown) == set(G)
+    return shown
+
+
+def test_repeated_children_collapse_by_image():
+    edges = [(0, i) for i in range(1, 201)] + [(5, 500), (6, 501)]
+    G = graph(edges, tagged=[7], images={i: "conhost.exe" for i in range(1, 201)})
+    view = lod_graph(G)
+    shown = represented(G, view)
+    group = "group:0:conhost.exe"
+    assert shown[5] == shown[500] == shown[200] == group
+    assert view.nodes[group]["label"].startswith("conhost.exe ×199\n201 untagged events")
+    assert view.nodes[group]["color"] == AGGREGATE_COLOR
+    assert shown[7] == 7 and view.has_edge(0, 7)
+    assert len(view) == 3
+
+
+def test_untagged_subtrees_fold_but_tagged_paths_stay():
+    # 1 -> 2 -> 3 -> 4 (tagged); 1 -> 10 -> 11 -> 12 (untagged); 1 -> 20 -> 21 (risky)
+    G = graph([(1, 2), (2, 3), (3, 4), (1, 10), (10, 11), (11, 12), (1, 20), (20, 21)], tagged=[4], risky=[21])
+    view = lod_graph(G)
+    shown = represented(G, view)
+    assert [shown[n] for n in (1, 2, 3, 4, 20, 21)] == [1, 2, 3, 4, 20, 21]
+    assert shown[10] == shown[12] == "fold:10"
+    assert "+2 untagged descendants" in view.nodes["fold:10"]["label"]
+    assert set(view.edges) == {(1, 2), (2, 3), (3, 4), (1, "fold:10"), (1, 20), (20, 21)}
+
+
+@pytest.mark.parametrize("budget", [5, 20, 60])
+def test_budget_bounds_the_view(budget):
+    # Every node tagged, so nothing folds: only the budget can shrink the view.
+    edges = [(0, i) for i in range(1, 40)] + [(i, 100 + i) for i in range(1, 40)]
+    G = graph(edges, tagged=list(range(140)))
+    view = lod_graph(G, budget=budget)
+    shown = represented(G, view)
+    # Past the budget only "+N more" placeholders are added, one per parent already shown.
+    events = [n for n, attrs in view.nodes(data=True) if not attrs.get("aggregate")]
+    assert len(events) <= budget
+    assert all(str(n).startswith("more:") for n in view if n not in events)
+    assert shown[0] == 0
+    assert view.nodes["more:0"]["members"] and "more" in view.nodes["more:0"]["label"]
+
+
+def test_expanding_aggregates_drills_down():
+    edges = [(0, i) for i in range(1, 6)] + [(1, 10), (10, 11)]
+    G = graph(edges, images={i: "svchost.exe" for i in range(1, 6)})
+    view = lod_graph(G)
+    assert set(view) == {"fold:0"}
+    view = lod_graph(G, expanded={"fold:0"})
+    assert set(view) == {0, "group:0:svchost.exe"}
+    view = lod_graph(G, expanded={"fold:0", "group:0:svchost.exe"})
+    assert set(view) == {0, "fold:1", 2, 3, 4, 5}
+    view = lod_graph(G, expanded={"fold:0", "group:0:svchost.exe", "fold:1", "fold:10"})
+    represented(G, view)
+    assert set(view) == set(G)
+
+    tagged = graph([(0, i) for i in range(1, 30)], tagged=range(30))
+    assert len(lod_graph(tagged, budget=10, expanded={"more:0"})) == 30
+
+
+def test_cycles_and_color_modes():
+    G = graph([(1, 2), (2, 3), (3, 1), (4, 5)], tagged=[2], risky=[5])
+    view = lod_graph(G, color_by="risk")
+    represented(G, view)
+    assert view.nodes[5]["color"] == risk_color(FLAG_SCORE)
+    assert risk_color(None) == risk_color(0) != risk_color(2 * FLAG_SCORE)
+
+
+def test_layout_and_html():
+    G = graph([(0, i) for i in range(1, 4)], tagged=range(4))
+    view = lod_graph(G)
+    positions = tree_layout(view)
+    assert tree_layout(view) is positions
+    # Leaves spread along x, parents centred above them.
+    assert positions == {0: (180.0, 0), 1: (0, 140), 2: (180, 140), 3: (360, 140)}
+    page = render_html(view)
+    assert page.count('"physics": false') == 4
+    assert '"id": "3"' in page
@@ -0,0 +1,88 @@
+import io
+import json
+
+import pytest
+
+from logripper import ingest
+from logripper.ingest import iter_batches, iter_events, iter_json_values
+
+EVENTS = [
+    {"EventID": 1, "Computer": "WS-01", "CommandLine": "cmd.exe /c echo ü € 𝄞", "DataValues": [{"Name": "Image", "Value": "a"}]},
+    {"EventID": 4624, "Computer": "DC-01", "Message": "line\nbreak, \"quoted\" [x] {y}", "DataValues": {"Name": "LogonType", "Value": "3"}},
+    {"EventID": 12, "Computer": "WS-02", "Score": 1234567, "Flag": True, "Empty": None},
+]
+
+
+def as_array(events, indent=None):
+    return json.dumps(events, ensure_ascii=False, indent=indent)
+
+
+def as_ndjson(events):
+    return "\n".join(json.dumps(evt, ensure_ascii=False) for evt in events) + "\n"
+
+
+def read(data, **kwargs):
+    return list(iter_json_values(io.BytesIO(data), **kwargs))
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "utf-16", "utf-16-le", "utf-16-be", "utf-32"])
+@pytest.mark.parametrize("layout", [as_array, as_ndjson])
+def test_encodings(encoding, layout):
+    # Windows PowerShell 5.1 Out-File writes UTF-16 with a BOM; PowerShell 7 writes UTF-8.
+    assert read(layout(EVENTS).encode(encoding)) == EVENTS
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7, 64])
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-16"])
+@pytest.mark.parametrize("layout", [as_array, as_ndjson, lambda events: as_array(events, indent=2)])
+def test_values_split_across_reads(monkeypatch, read_size, encoding, layout):
+    # Small reads cut values, multi-byte characters and separators at every offset.
+    monkeypatch.setattr(ingest, "READ_SIZE", read_size)
+    assert read(layout(EVENTS).encode(encoding)) == EVENTS
+
+
+def test_scalars_at_read_boundaries(monkeypatch):
+    monkeypatch.setattr(ingest, "READ_SIZE", 1)
+    assert read(b"[12, 345,6789 ,true]") == [12, 345, 6789, True]
+    assert read(b"12\n345\n6789") == [12, 345, 6789]
+
+
+def test_single_object_and_nested_arrays():
+    assert read(json.dumps(EVENTS[0]).encode()) == [EVENTS[0]]
+    assert read(b"[[1, 2], [3]]") == [[1, 2], [3]]
+    # An array that follows another value is unpacked like an NDJSON line holding a batch.
+    assert read(b'{"a": 1}\n[{"b": 2}, {"c": 3}]') == [{"a": 1}, {"b": 2}, {"c": 3}]
+
+
+def test_empty_inputs():
+    assert read(b"") == []
+    assert read(b" \r\n") == []
+    assert read(b"[]") == []
+
+
+def test_truncated_input_raises(monkeypatch):
+    monkeypatch.setattr(ingest, "READ_SIZE", 5)
+    with pytest.raises(json.JSONDecodeError):
+        read(as_array(EVENTS).encode()[:-20])
+
+
+def test_progress_reaches_the_end(monkeypatch):
+    monkeypatch.setattr(ingest, "READ_SIZE", 16)
+    seen = []
+    data = as_ndjson(EVENTS).encode()
+    assert read(data, progress=seen.append) == EVENTS
+    assert seen == sorted(seen) and seen[-1] == 1.0
+
+
+def test_events_are_flattened(monkeypatch):
+    monkeypatch.setattr(ingest, "READ_SIZE", 3)
+    events = list(iter_events(io.BytesIO((as_array(EVENTS + [1, "x"])).encode("utf-16"))))
+    assert len(events) == 3
+    assert events[0]["Image"] == "a" and "DataValues" not in events[0]
+    assert events[1]["LogonType"] == "3"
+    assert events[2] == EVENTS[2]
+
+
+def test_batches():
+    assert [len(batch) for batch in iter_batches(range(12), size=5)] == [5, 5, 2]
+    assert list(iter_batches([], size=5)) == []
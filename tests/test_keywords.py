@@ -0,0 +1,118 @@
+import time
+
+from logripper import keywords
+from logripper.keywords import KeywordScorer, rescore
+from logripper.store import EventStore
+
+from conftest import make_events
+
+# Field values a second scoring has to sustain, and the matcher on distinct values alone.
+MIN_VALUES_PER_SECOND = 1_000_000
+
+
+def expected_masks(scorer, values):
+    return [sum(1 << i for i, keyword in enumerate(scorer.keywords) if keyword in value.lower()) for value in values]
+
+
+def test_masks_find_overlapping_and_prefix_keywords():
+    scorer = KeywordScorer({"cmd.exe": 1, ".exe": 1, "invoke-": 1, "invoke-expression": 2, "exec": 1, "ünïcode": 1})
+    values = [
+        "C:\\Windows\\System32\\CMD.EXE /c whoami",
+        "Invoke-Expression (iwr http://x)",
+        ".exec",
+        "İnvoke-",  # lowercases to two characters
+        "path\\ÜNÏCODE.exe",
+        "",
+        "cmd.ex",
+    ]
+    assert scorer._masks(values).tolist() == expected_masks(scorer, values)
+
+
+def test_many_keywords_keep_every_bit():
+    weights = {f"kw{i:03d}": 1 for i in range(80)}
+    scorer = KeywordScorer(weights)
+    values = ["kw000 kw079", "xkw064x", "kw0"]
+    assert scorer._masks(values).tolist() == expected_masks(scorer, values)
+    assert scorer.score([{"CommandLine": "kw000 kw079"}])[0]["risk_score"] == 2
+
+
+def test_cache_eviction_keeps_the_batch_being_scored(monkeypatch):
+    monkeypatch.setattr(keywords, "CACHE_SIZE", 10)
+    scorer = KeywordScorer()
+    scorer._lookup(["powershell.exe"])
+    values = ["powershell.exe"] + [f"C:\\tools\\host{i}.exe" for i in range(20)] + ["powershell.exe"]
+    assert scorer._lookup(values) == expected_masks(scorer, values)
+
+    events = [
+        {"Image": "C:\\tools\\powershell.exe", "ParentImage": f"C:\\tools\\host{i}.exe", "CommandLine": f"powershell -enc {i}"}
+        for i in range(30)
+    ]
+    scored = scorer.score([dict(evt) for evt in events])
+    assert [evt["matched_keywords"] for evt in scored] == [".exe, powershell"] * 30
+    store = EventStore()
+    store.append([dict(evt, uuid=i) for i, evt in enumerate(events)])
+    scores, matched = scorer.score_frame(store.frame)
+    assert scores.tolist() == [2] * 30
+    assert matched.tolist() == [".exe, powershell"] * 30
+
+
+def test_rescore_reports_only_changed_events():
+    store = EventStore()
+    store.append(KeywordScorer().score(make_events(40)))
+    assert rescore(store, KeywordScorer()) == []
+    changed = rescore(store, KeywordScorer({"tool3": 5}))
+    assert changed == [evt["uuid"] for evt in make_events(40)]
+    assert set(store.frame.loc[store.frame["Image"].str.contains("tool3"), "risk_score"]) == {5}
+
+
+def sysmon_events(count):
+    # Repeating images, users and parents alongside unique command lines, guids and hashes.
+    images = [f"C:\\Windows\\System32\\tool{i}.exe" for i in range(40)]
+    return [
+        {
+            "EventID": 1,
+            "ProcessGuid": f"{{{i:08x}-6c1b-686f-0a00-000000001f00}}",
+            "ParentProcessGuid": f"{{{i // 2:08x}-6c1b-686f-0a00-000000001f00}}",
+            "Image": images[i % 40],
+            "ParentImage": images[i // 2 % 40],
+            "CommandLine": f"\"{images[i % 40]}\" -NoProfile -ExecutionPolicy Bypass -File run{i}.ps1",
+            "ParentCommandLine": f"cmd.exe /c job{i // 100}",
+            "CurrentDirectory": f"C:\\Users\\user{i % 20}\\",
+            "User": f"CORP\\user{i % 20}",
+            "IntegrityLevel": ("Medium", "High", "System")[i % 3],
+            "Hashes": f"SHA256={i * 2654435761 % (1 << 64):016x}{i:048x}",
+        }
+        for i in range(count)
+    ]
+
+
+def best_rate(count, run, repeat=5):
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = max(best, count / (time.perf_counter() - start))
+    return best
+
+
+def test_matcher_throughput_on_distinct_values():
+    values = [evt["CommandLine"] if i % 2 else evt["Hashes"] for i, evt in enumerate(sysmon_events(200_000))]
+    rate = best_rate(len(values), lambda: KeywordScorer()._masks(values))
+    assert rate >= MIN_VALUES_PER_SECOND, f"{rate:,.0f} distinct values/s"
+
+
+def test_scoring_throughput_on_events():
+    events = sysmon_events(50_000)
+    count = sum(1 for evt in events for field, value in evt.items() if type(value) is str and field not in keywords.SKIP_FIELDS)
+
+    def score():
+        scorer = KeywordScorer()
+        for start in range(0, len(events), 5000):
+            scorer.score([dict(evt) for evt in events[start:start + 5000]])
+
+    rate = best_rate(count, score, repeat=3)
+    assert rate >= MIN_VALUES_PER_SECOND, f"{rate:,.0f} field values/s"
+    store = EventStore(views=False)
+    store.append([dict(evt, uuid=i) for i, evt in enumerate(events)])
+    rate = best_rate(count, lambda: KeywordScorer().score_frame(store.frame), repeat=3)
+    assert rate >= MIN_VALUES_PER_SECOND, f"{rate:,.0f} field values/s"
@@ -0,0 +1,164 @@
+import ipaddress
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from logripper.casedb import CaseDB
+from logripper.logons import INTERNAL_NETWORKS, LogonFilter, LogonIndex, ip_number, network_bounds
+from logripper.store import EventStore
+
+ADDRESSES = [
+    "10.1.2.3",
+    "172.31.255.255",
+    "172.32.0.1",
+    "192.168.1.50",
+    "127.0.0.1",
+    "8.8.8.8",
+    "203.0.113.9",
+    "::ffff:10.1.2.4",  # Windows logs IPv4 peers of dual-stack sockets like this
+    "::ffff:198.51.100.7",
+    "::1",
+    "fe80::1c2d:3e4f:5a6b:7c8d%12",
+    "fd00:1234::5",
+    "2001:db8::1",
+    "2001:db8:ffff::1",
+    "-",
+    "",
+    None,
+    "not-an-ip",
+]
+
+
+def logon_events(count=400, seed=3):
+    rng = random.Random(seed)
+    return [
+        {
+            "uuid": i,
+            "EventID": rng.choice([4624, 4625, "4624", 4688]),
+            "LogonType": rng.choice(["2", "3", 10, " 3 ", "-", None]),
+            "TargetUserName": rng.choice(["alice", "ALICE", "bob", "-", None]),
+            "WorkstationName": rng.choice(["WS-01", "ws-02", None]),
+            "IpAddress": rng.choice(ADDRESSES),
+        }
+        for i in range(count)
+    ]
+
+
+def parsed(value):
+    try:
+        return ipaddress.ip_address(str(value))
+    except ValueError:
+        return None
+
+
+def in_network(address, cidr):
+    network = ipaddress.ip_network(cidr.strip(), strict=False)
+    if address is None:
+        return False
+    # IPv4 and IPv4-mapped IPv6 are the same peer, whichever way the block is written.
+    if network.version == 6 and address.version == 4:
+        address = ipaddress.IPv6Address(f"::ffff:{address}")
+    elif network.version == 4 and address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return address.version == network.version and address in network
+
+
+def expected(events, logon_filter):
+    rows = []
+    for evt in events:
+        keep = str(evt["EventID"]) in ("4624", "4625")
+        if logon_filter.logon_types:
+            keep &= str(evt["LogonType"]).strip() in logon_filter.logon_types
+        if logon_filter.users:
+            keep &= str(evt["TargetUserName"]).lower() in {u.lower() for u in logon_filter.users}
+        address = parsed(evt["IpAddress"])
+        if logon_filter.ip:
+            keep &= in_network(address, logon_filter.ip)
+        if logon_filter.external_only:
+            keep &= address is not None and not any(in_network(address, n) for n in INTERNAL_NETWORKS)
+        rows.append(keep)
+    return np.array(rows)
+
+
+def indexes(events):
+    added = LogonIndex()
+    added.add(events[:150])
+    added.add(events[150:])
+    loaded = LogonIndex()
+    loaded.add_frame(pd.DataFrame(events))
+    return added, loaded
+
+
+@pytest.mark.parametrize(
+    "logon_filter",
+    [
+        LogonFilter(),
+        LogonFilter(ip="10.0.0.0/8"),
+        LogonFilter(ip="172.16.0.0/12"),
+        LogonFilter(ip="10.1.2.3"),
+        LogonFilter(ip=" 192.168.1.0/24 "),
+        LogonFilter(ip="0.0.0.0/0"),
+        LogonFilter(ip="2001:db8::/32"),
+        LogonFilter(ip="2001:db8::/48"),
+        LogonFilter(ip="fe80::/10"),
+        LogonFilter(ip="::1"),
+        LogonFilter(ip="::/0"),
+        LogonFilter(external_only=True),
+        LogonFilter(ip="2001:db8::/32", external_only=True),
+        LogonFilter(logon_types=("3", "10"), users=("Alice",), external_only=True),
+        LogonFilter(logon_types=("2",), ip="10.0.0.0/8"),
+    ],
+)
+def test_mask_matches_per_event_checks(logon_filter):
+    events = logon_events()
+    want = expected(events, logon_filter)
+    assert want.any() or logon_filter.ip in ("::1", "2001:db8::/48")
+    for index in indexes(events):
+        assert index.mask(logon_filter).tolist() == want.tolist()
+
+
+def test_ipv4_ranges_cover_mapped_addresses():
+    first, last = network_bounds("10.0.0.0/8")
+    assert first <= ip_number("::ffff:10.200.0.1") <= last
+    assert ip_number("::ffff:10.200.0.1") == ip_number("10.200.0.1")
+    assert not first <= ip_number("10::1") <= last
+    assert ip_number("fe80::1%eth0") == ip_number("fe80::1")
+    assert ip_number("-") is None
+
+
+def test_ranges_across_the_64_bit_split():
+    index = LogonIndex()
+    addresses = ["2001:db8:0:1:ffff:ffff:ffff:ffff", "2001:db8:0:2::", "2001:db8:0:2::1", "2001:db8:0:3::"]
+    index.add([{"EventID": 4624, "IpAddress": a} for a in addresses])
+    assert index.mask(LogonFilter(ip="2001:db8:0:2::/64")).tolist() == [False, True, True, False]
+    assert index.mask(LogonFilter(ip="2001:db8:0:1:8000::/65")).tolist() == [True, False, False, False]
+
+
+def test_invalid_ip_filter_raises():
+    index, _ = indexes(logon_events(10))
+    with pytest.raises(ValueError):
+        index.mask(LogonFilter(ip="10.0.0.0/33"))
+    with pytest.raises(ValueError):
+        index.mask(LogonFilter(ip="alice"))
+
+
+def test_unknown_user_matches_nothing():
+    index, _ = indexes(logon_events())
+    assert not index.mask(LogonFilter(users=("mallory",))).any()
+
+
+def test_store_rows_after_reopen(tmp_path):
+    events = logon_events(120)
+    db = CaseDB(tmp_path / "case.db")
+    EventStore.open(db).append([dict(evt) for evt in events])
+    db.close()
+    db = CaseDB(tmp_path / "case.db")
+    store = EventStore.open(db)
+    logon_filter = LogonFilter(ip="::ffff:0:0/96", external_only=True)
+    rows = store.logon_rows(logon_filter)
+    assert store.frame["uuid"].to_numpy()[rows].tolist() == [
+        evt["uuid"] for evt, keep in zip(events, expected(events, logon_filter)) if keep
+    ]
+    db.close()
@@ -0,0 +1,47 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from logripper.pipeline import StageStats, _parsed_batches, ingest_paths
+from logripper.store import EventStore
+
+EVTX = Path(__file__).parent / "data" / "sysmon_security.evtx"
+
+
+def copies(tmp_path, count=3):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"host{i}.evtx"
+        shutil.copy(EVTX, path)
+        paths.append(str(path))
+    return paths
+
+
+def batches(paths, jobs):
+    return [(path, [evt["uuid"] for evt in batch]) for path, batch in _parsed_batches(paths, jobs, False, StageStats())]
+
+
+def test_workers_stream_batches_in_file_order(tmp_path):
+    paths = copies(tmp_path)
+    assert batches(paths, 2) == batches(paths, 1)
+    assert [path for path, _ in batches(paths, 2)] == paths
+
+
+def test_worker_errors_reach_the_caller(tmp_path):
+    paths = copies(tmp_path, 1) + [str(tmp_path / "broken.json")]
+    Path(paths[1]).write_text("{not json", encoding="utf-8")
+    with pytest.raises(ValueError):
+        batches(paths, 2)
+
+
+def test_headless_store_skips_the_viewer_indexes(tmp_path):
+    paths = copies(tmp_path, 2)
+    viewer = ingest_paths(paths, jobs=1, log=None)
+    headless = ingest_paths(paths, store=EventStore(views=False), jobs=1, log=None)
+    pd.testing.assert_frame_equal(headless.frame, viewer.frame)
+    assert len(viewer.graph.G) == len(viewer) > 0
+    assert len(headless.graph.G) == len(headless.text.search("exe")) == 0
+    headless.hide(headless.ids()[0])
+    assert headless.hidden_ids == {viewer.ids()[0]}
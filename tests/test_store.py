@@ -0,0 +1,93 @@
+import numpy as np
+
+from logripper.casedb import CaseDB
+from logripper.store import EventStore
+from logripper.table import TableQuery, query_table
+from logripper.timestamps import event_timestamp
+
+from conftest import make_events
+
+
+def test_appends_keep_rows_aligned():
+    events = make_events()
+    store = EventStore()
+    for start in range(0, len(events), 7):
+        store.append([dict(evt) for evt in events[start:start + 7]])
+    store.hide(events[5]["uuid"])
+    store.hide(events[100]["uuid"])
+    store.append([dict(evt, uuid=evt["uuid"] + 1, EventRecordID=1000) for evt in events[:3]])
+    assert len(store) == len(store.timestamps()) == len(store.visible_mask()) == len(events) + 3
+    assert store.timestamps()[:len(events)].tolist() == [event_timestamp(evt) for evt in events]
+    assert np.flatnonzero(~store.visible_mask()).tolist() == [5, 100]
+    assert store.hidden_ids == {events[5]["uuid"], events[100]["uuid"]}
+
+
+def test_reopen_restores_edits_and_hidden(case_path):
+    store = EventStore.open(CaseDB(case_path))
+    event_id = store.ids()[3]
+    store.update(event_id, tag="C2", notes="beacon")
+    store.hide(store.ids()[0])
+    hidden = store.hidden_ids
+
+    reopened = EventStore.open(CaseDB(case_path))
+    assert reopened.frame["uuid"].tolist() == store.frame["uuid"].tolist()
+    assert reopened.get(event_id)["tag"] == "C2"
+    assert reopened.get(event_id)["notes"] == "beacon"
+    assert reopened.hidden_ids == hidden
+    assert reopened.timestamps().tolist() == store.timestamps().tolist()
+
+
+def _process_events():
+    # Several events per process, arriving children first, so links have to move.
+    events = make_events(60)
+    events += [dict(evt, uuid=evt["uuid"] + 1, EventID=3, EventRecordID=evt["EventRecordID"] + 1000) for evt in events[::3]]
+    return events[::-1]
+
+
+def _expected_edges(store):
+    first = {}
+    for event_id in store.ids():
+        first.setdefault(store.get(event_id).get("ProcessGuid"), event_id)
+    edges = set()
+    for event_id in store.ids():
+        parent = first.get(store.get(event_id).get("ParentProcessGuid") or None)
+        if parent is not None:
+            edges.add((parent, event_id))
+    return edges
+
+
+def test_graph_links_each_process_to_its_parents_first_event(tmp_path):
+    events = _process_events()
+    store = EventStore.open(CaseDB(tmp_path / "case.db"))
+    for start in range(0, len(events), 9):
+        store.append([dict(evt) for evt in events[start:start + 9]])
+    for event_id in store.ids()[::7]:
+        store.hide(event_id)
+    assert set(store.graph.G.edges) == _expected_edges(store)
+    assert set(store.graph.G.nodes) == set(store.ids())
+
+    reopened = EventStore.open(CaseDB(tmp_path / "case.db"))
+    assert set(reopened.graph.G.edges) == _expected_edges(store)
+    assert reopened.processes.roots() == store.processes.roots()
+    assert dict(reopened.graph.G.nodes(data=True)) == dict(store.graph.G.nodes(data=True))
+
+
+def test_bulky_fields_stay_in_the_case_file(tmp_path):
+    events = [dict(evt, PrettyXml=f"<Event>{i}</Event>") for i, evt in enumerate(make_events(30))]
+    store = EventStore.open(CaseDB(tmp_path / "case.db"))
+    store.append(events)
+    store.update(events[4]["uuid"], tag="C2")
+
+    for opened in (store, EventStore.open(CaseDB(tmp_path / "case.db"))):
+        assert "PrettyXml" not in opened.frame.columns
+        assert "PrettyXml" in opened.schema
+        event = opened.fetch(events[4]["uuid"])
+        assert event["PrettyXml"] == "<Event>4</Event>"
+        assert event["tag"] == "C2"
+        page = opened.frame_at(np.array([9, 2]), ["uuid", "PrettyXml", "tag"])
+        assert page.columns.tolist() == ["uuid", "PrettyXml", "tag"]
+        assert page["PrettyXml"].tolist() == ["<Event>9</Event>", "<Event>2</Event>"]
+        table, total = query_table(opened, TableQuery(columns=["EventRecordID", "PrettyXml"], sort_by="EventRecordID", page_size=5))
+        assert total == 30
+        assert table.index.tolist() == [evt["uuid"] for evt in events[:5]]
+        assert table["PrettyXml"].tolist() == [evt["PrettyXml"] for evt in events[:5]]
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from logripper.keywords import KeywordScorer
+from logripper.store import EventStore
+from logripper.table import TableQuery, distinct_values, filter_mask, query_table
+from logripper.timestamps import parse_timestamp
+
+from conftest import make_events
+
+START = parse_timestamp("2025-07-12 07:00:00.000")
+SECOND = 1_000_000_000
+
+
+@pytest.fixture
+def store():
+    events = make_events()
+    store = EventStore()
+    store.append(KeywordScorer({"tool3": 2, "--run 1": 1}).score(events))
+    store.update(events[7]["uuid"], tag="Suspicious")
+    store.update(events[8]["uuid"], tag="Malicious")
+    store.hide(events[2]["uuid"])
+    return store
+
+
+def ids(events, indexes):
+    return [events[i]["uuid"] for i in indexes]
+
+
+def test_pages_cover_every_match_once(store):
+    visible = [i for i in range(120) if i != 2]
+    query = TableQuery(columns=["EventRecordID"], page_size=50)
+    seen = []
+    for page_number, size in ((0, 50), (1, 50), (2, 19)):
+        query.page = page_number
+        page, total = query_table(store, query)
+        assert (total, len(page), query.page) == (119, size, page_number)
+        seen += page.index.tolist()
+    assert seen == ids(make_events(), visible)
+
+
+@pytest.mark.parametrize("requested, clamped", [(3, 2), (99, 2), (-1, 0)])
+def test_page_past_the_ends_is_clamped(store, requested, clamped):
+    query = TableQuery(page=requested, page_size=50)
+    page, total = query_table(store, query)
+    assert query.page == clamped
+    assert len(page) == (19 if clamped == 2 else 50)
+
+
+def test_exact_last_page(store):
+    query = TableQuery(event_ids=[1], page=5, page_size=10)
+    page, total = query_table(store, query)
+    assert total == 40 and query.page == 3 and len(page) == 10
+
+
+def test_no_matches_and_empty_store(store):
+    query = TableQuery(columns=["uuid", "EventID"], computers=["nowhere"], page=4)
+    page, total = query_table(store, query)
+    assert (total, len(page), query.page) == (0, 0, 0)
+    page, total = query_table(EventStore(), TableQuery(columns=["uuid", "EventID"]))
+    assert (total, page.columns.tolist()) == (0, ["uuid", "EventID"])
+
+
+def test_time_window_bounds_are_inclusive(store):
+    query = TableQuery(columns=["ts", "EventRecordID"], time_range=(START + 10 * SECOND, START + 19 * SECOND))
+    page, total = query_table(store, query)
+    assert page["EventRecordID"].tolist() == list(range(11, 21))
+    query.time_range = (START + 10 * SECOND + 1, START + 19 * SECOND - 1)
+    assert query_table(store, query)[1] == 8
+    query.time_range = (START - 10 * SECOND, START)
+    assert query_table(store, query)[0].index.tolist() == ids(make_events(), [0])
+    assert str(page["ts"].iloc[0]) == "2025-07-12 07:00:10"
+
+
+def test_filters_combine(store):
+    events = make_events()
+    mask = filter_mask(store, TableQuery(event_ids=[1], computers=["host0", "host2"]))
+    assert np.flatnonzero(mask).tolist() == [i for i in range(120) if i % 3 == 0 and i % 4 in (0, 2)]
+    assert query_table(store, TableQuery(tags=["Malicious", "Suspicious"]))[0].index.tolist() == ids(events, [7, 8])
+    # Hidden events stay out even when selected directly.
+    assert np.flatnonzero(filter_mask(store, TableQuery(rows=np.array([1, 2, 3])))).tolist() == [1, 3]
+    # tool3 (2) and "--run 1" (1) together: tool3.exe --run 13, 18, 103, ...
+    assert np.flatnonzero(filter_mask(store, TableQuery(min_risk=3))).tolist() == [13, 18, 103, 108, 113, 118]
+    keyword_rows = np.flatnonzero(filter_mask(store, TableQuery(keywords=["tool3"])))
+    assert keyword_rows.tolist() == [i for i in range(120) if i % 5 == 3]
+
+
+def test_text_search(store):
+    assert query_table(store, TableQuery(text="TOOL4.EXE --RUN 9", text_column="CommandLine"))[1] == 3
+    assert query_table(store, TableQuery(text="host3"))[1] == 30
+    assert query_table(store, TableQuery(text="host3", text_column="Image"))[1] == 0
+    assert query_table(store, TableQuery(text="x", text_column="NoSuchField"))[1] == 0
+
+
+def test_sorting(store):
+    page, _ = query_table(store, TableQuery(columns=["EventRecordID"], descending=True, page_size=3))
+    assert page["EventRecordID"].tolist() == [120, 119, 118]
+    page, _ = query_table(store, TableQuery(columns=["Computer", "EventRecordID"], sort_by="Computer", page_size=100))
+    assert page["Computer"].tolist() == sorted(page["Computer"].tolist())
+    # Ties keep time order.
+    assert page["EventRecordID"].tolist()[:3] == [1, 5, 9]
+    page, _ = query_table(store, TableQuery(columns=["risk_score", "EventRecordID"], sort_by="risk_score", descending=True, page_size=2))
+    assert page["EventRecordID"].tolist() == [14, 19]
+
+
+def test_distinct_values(store):
+    assert distinct_values(store, "Computer") == ["host0", "host1", "host2", "host3"]
+    assert distinct_values(store, "missing") == []
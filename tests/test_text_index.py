@@ -0,0 +1,57 @@
+import re
+
+import numpy as np
+import pytest
+
+from logripper.text_index import TextIndex, regex_literals
+
+VALUES = [
+    "cmd /c Abcdef",
+    "powershell -enc SQBFAFgA",
+    "C:\\Users\\bob\\AppData\\Local\\Temp\\a.exe",
+    "rundll32.exe shell32.dll,Control_RunDLL",
+    "whoami /all",
+    "net user admin P@ss /add",
+]
+
+PATTERNS = [
+    r"\x41bcd",
+    r"pow\x65rshell",
+    r"pow\u0065rshell",
+    r"pow\U00000065rshell",
+    r"pow\N{LATIN SMALL LETTER E}rshell",
+    r"\101bcd",
+    r"pow\145rshell",
+    r"(pow)\1?ershell",
+    r"(?x) power shell",
+    r"\\appdata\\local\\temp\\",
+    r"rundll32\.exe\s+\w+\.dll",
+    r"net user \w+",
+    r"who(ami)?",
+    r"[a-c]md /c",
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    index = TextIndex(fields=("CommandLine",))
+    index.add(0, [{"CommandLine": value} for value in VALUES])
+    return index
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_regex_search_matches_full_scan(index, pattern):
+    compiled = re.compile(pattern, re.IGNORECASE)
+    expected = [row for row, value in enumerate(VALUES) if compiled.search(value.lower())]
+    assert expected
+    assert index.search(pattern, "regex").tolist() == expected
+
+
+def test_escapes_end_literal_runs():
+    assert regex_literals(r"pow\x65rshell") == ["pow", "rshell"]
+    assert regex_literals(r"\101bcd\.exe") == ["bcd.exe"]
+    assert regex_literals(r"(?x) power shell") == []
+
+
+def test_substring_search(index):
+    assert np.array_equal(index.search("SHELL"), [1, 3])
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from logripper.timestamps import TS_MISSING, as_datetimes, event_timestamp, parse_timestamp
+
+# 2025-07-12T18:00:01Z
+SECOND = 1_752_343_201 * 1_000_000_000
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        # Windows PowerShell 5.1 ConvertTo-Json: epoch milliseconds, UTC whatever the offset suffix says.
+        ("/Date(1752343201123)/", SECOND + 123_000_000),
+        ("/Date(1752343201123+0200)/", SECOND + 123_000_000),
+        ("/Date(1752343201123-0530)/", SECOND + 123_000_000),
+        (" /Date(1752343201000)/ ", SECOND),
+        ("/Date(-1000)/", -1_000_000_000),
+        (1752343201123, SECOND + 123_000_000),
+        # PowerShell 7 and .evtx TimeCreated: ISO 8601 with 100 ns ticks.
+        ("2025-07-12T18:00:01.1234567Z", SECOND + 123_456_700),
+        ("2025-07-12T18:00:01.1234567+00:00", SECOND + 123_456_700),
+        ("2025-07-12T20:00:01.1234567+02:00", SECOND + 123_456_700),
+        ("2025-07-12T13:00:01-05:00", SECOND),
+        ("2025-07-12T18:00:01.123456789Z", SECOND + 123_456_789),
+        # Sysmon UtcTime: no offset, already UTC.
+        ("2025-07-12 18:00:01.123", SECOND + 123_000_000),
+        ("2025-07-12T18:00:01", SECOND),
+    ],
+)
+def test_parse_timestamp(value, expected):
+    assert parse_timestamp(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, "", "   ", "not a time", "/Date(abc)/", "/Date()/", float("nan"), True])
+def test_unreadable_timestamps(value):
+    assert parse_timestamp(value) is None
+
+
+def test_forgiving_fallback_matches_pandas():
+    assert parse_timestamp("July 12 2025 18:00:01") == pd.Timestamp("2025-07-12 18:00:01").value
+    assert parse_timestamp("2025-07-12 18:00:01.1234567 +0000") == SECOND + 123_456_700
+
+
+def test_event_timestamp_prefers_utc_time():
+    assert event_timestamp({"UtcTime": "2025-07-12 18:00:01.000", "TimeCreated": "/Date(0)/"}) == SECOND
+    assert event_timestamp({"UtcTime": "", "TimeCreated": "/Date(1752343201000)/"}) == SECOND
+    assert event_timestamp({"UtcTime": "garbage", "TimeCreated": "2025-07-12T18:00:01Z"}) == SECOND
+    assert event_timestamp({"EventID": 1}) == TS_MISSING
+
+
+def test_missing_views_as_nat():
+    dates = as_datetimes([SECOND, TS_MISSING])
+    assert dates[0] == np.datetime64("2025-07-12T18:00:01", "ns")
+    assert np.isnat(dates[1])
@@ -0,0 +1,120 @@
+import sys
+
+import pytest
+
+from logripper.store import EventStore
+from logripper.tree import format_tree_line, render_tree_html, tree_rows, tree_window
+
+from conftest import make_events
+
+
+@pytest.fixture
+def heap():
+    # make_events links event i to parent i // 2: 0 -> 1 -> (2, 3) -> (4, 5), (6, 7) -> ...
+    events = make_events(31)
+    store = EventStore()
+    # Ingested newest first; siblings are still shown in time order.
+    store.append(events[::-1])
+    return store, [evt["uuid"] for evt in events]
+
+
+def indexes(rows, ids):
+    return [ids.index(row.event_id) for row in rows]
+
+
+def test_open_depth_and_toggles(heap):
+    store, ids = heap
+    assert indexes(tree_rows(store, open_depth=0), ids) == [0]
+    rows = tree_rows(store, open_depth=1)
+    assert [(ids.index(r.event_id), r.depth, r.has_children, r.expanded) for r in rows] == [(0, 0, True, True), (1, 1, True, False)]
+    assert indexes(tree_rows(store, open_depth=3), ids) == [0, 1, 2, 4, 5, 3, 6, 7]
+    assert indexes(tree_rows(store, open_depth=2, expanded={ids[3]}), ids) == [0, 1, 2, 3, 6, 7]
+    assert indexes(tree_rows(store, open_depth=2, expanded={ids[3]}, collapsed={ids[0]}), ids) == [0]
+    assert indexes(tree_rows(store, open_depth=3, collapsed={ids[2]}), ids) == [0, 1, 2, 3, 6, 7]
+    assert len(tree_rows(store, open_depth=10)) == 31
+
+
+def test_collapsed_subtrees_are_never_walked(heap, monkeypatch):
+    store, ids = heap
+    asked = []
+    children_of = store.processes.children_of
+    monkeypatch.setattr(store.processes, "children_of", lambda guid: asked.append(guid) or children_of(guid))
+    rows = tree_rows(store, open_depth=10, collapsed={ids[2]})
+    # Only shown rows are asked for their children; nothing below event 2 is.
+    assert sorted(asked) == sorted(store.processes.guid_of(row.event_id) for row in rows)
+    below = {4, 5, 8, 9, 10, 11, *range(16, 24)}
+    assert not {f"{{guid-{i}}}" for i in below} & set(asked)
+    assert len(rows) == 31 - len(below)
+
+
+def test_connectors(heap):
+    store, ids = heap
+    rows = tree_rows(store, open_depth=3)
+    lines = [format_tree_line(r.depth, r.is_last, r.sibling_stack) for r in rows]
+    assert lines == ["└── ", "└── ", "    ├── ", "    │   ├── ", "    │   └── ", "    └── ", "        ├── ", "        └── "]
+
+
+def test_untagged_filter(heap):
+    store, ids = heap
+    for i in (0, 1, 3, 4):
+        store.update(ids[i], tag="C2")
+    assert indexes(tree_rows(store, show_untagged=False, open_depth=5), ids) == [0, 1, 3]
+
+
+def test_time_window_promotes_orphans_to_roots(heap):
+    store, ids = heap
+    within = {ids[i] for i in (2, 4, 5, 9, 3, 20)}
+    rows = tree_rows(store, open_depth=5, within=within)
+    assert indexes(rows, ids) == [2, 4, 9, 5, 3, 20]
+    assert [r.depth for r in rows] == [0, 1, 2, 1, 0, 0]
+
+
+def test_hidden_events_drop_out(heap):
+    store, ids = heap
+    store.hide(ids[1])
+    rows = tree_rows(store, open_depth=1)
+    assert indexes(rows, ids) == [0, 2, 4, 5, 3, 6, 7]
+    assert not rows[0].has_children
+
+
+def test_deep_chain_is_walked_iteratively():
+    events = [
+        {
+            "uuid": i + 1,
+            "EventID": 1,
+            "UtcTime": f"2025-07-12 07:00:00.{i % 1000:03d}",
+            "ProcessGuid": f"{{p-{i}}}",
+            "ParentProcessGuid": f"{{p-{i - 1}}}" if i else "",
+            "Image": "cmd.exe",
+        }
+        for i in range(sys.getrecursionlimit() + 500)
+    ]
+    store = EventStore()
+    store.append(events)
+    rows = tree_rows(store, open_depth=len(events))
+    assert [r.depth for r in rows] == list(range(len(events)))
+
+
+@pytest.mark.parametrize(
+    "requested, index, size",
+    [(0, 0, 10), (2, 2, 10), (3, 3, 1), (4, 3, 1), (99, 3, 1), (-1, 0, 10)],
+)
+def test_window_bounds(heap, requested, index, size):
+    store, ids = heap
+    rows = tree_rows(store, open_depth=10)
+    got_index, count, window = tree_window(rows, 10, requested)
+    assert (got_index, count, len(window)) == (index, 4, size)
+    assert window == rows[index * 10:index * 10 + size]
+    assert tree_window([], 10, 3) == (0, 1, [])
+
+
+def test_window_html(heap):
+    store, ids = heap
+    store.update(ids[0], tag="C2", mitre="T1059 Command and Scripting Interpreter", notes="multi\n\nline")
+    rows = tree_rows(store, open_depth=1)
+    events = {row.event_id: store.get(row.event_id) for row in rows}
+    page = render_tree_html(rows, events, lambda evt: ["notes", "CommandLine"])
+    assert page.count("margin-bottom: 0.6em") == 2
+    assert "<code>T1059 Command and Scripting Interpreter</code>" in page and "(collapsed)" in page
+    # One markdown block: a blank line inside a field would end it.
+    assert "\n\n" not in page and "multi&#10;&#10;line" in page
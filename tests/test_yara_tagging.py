@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+yara = pytest.importorskip("yara")
+
+from logripper.retag import rescan, rule_names
+from logripper.yara_tagging import match_batch, supports_batch_scan
+
+WORDS = ["cmd.exe", "/c", "powershell", "-enc", "whoami", "net", "user", "rundll32", "temp", "x", "abc"]
+
+# Conditions that only need string hits, batched.
+STRING_RULES = """
+rule exactly_one_whoami { strings: $a = "whoami" condition: #a == 1 }
+rule enc_without_cmd { strings: $a = "-enc" $b = "cmd.exe" condition: $a and not $b }
+rule two_of { strings: $a = "net" $b = "user" $c = "temp" condition: 2 of them }
+rule unanchored_regex { strings: $a = /rundll32\\s+[a-z]+/ condition: $a }
+rule offset_in_event { strings: $a = "abc" condition: $a and not $a at 0 }
+"""
+
+# Conditions that can match without a string hit, or only at the buffer edges.
+DATA_RULES = {
+    "filesize": 'rule small { strings: $a = "zzz" condition: filesize < 12 and not $a }',
+    "uint": "rule starts_c { condition: uint8(0) == 0x63 }",
+    "anchor_end": 'rule ends_exe { strings: $a = /cmd\\.exe$/ condition: $a }',
+    "anchor_start": 'rule starts_power { strings: $a = /^powershell/ condition: $a }',
+    "import": 'import "math"\nrule entropy { condition: math.entropy(0, filesize) > 3 }',
+}
+
+
+def texts(count=500, seed=7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 6))) for _ in range(count)]
+
+
+def names(matches):
+    return [sorted(m.rule for m in event) for event in matches]
+
+
+def test_batch_matches_per_event():
+    rules = yara.compile(source=STRING_RULES)
+    data = texts()
+    assert supports_batch_scan(rules, STRING_RULES)
+    per_event = names([rules.match(data=t) for t in data])
+    assert names(match_batch(rules, data)) == per_event
+    assert any(event for event in per_event)
+
+
+@pytest.mark.parametrize("kind", sorted(DATA_RULES))
+def test_data_dependent_rules_are_scanned_per_event(kind):
+    source = STRING_RULES + DATA_RULES[kind]
+    assert not supports_batch_scan(yara.compile(source=source), source)
+
+
+def test_unknown_source_is_scanned_per_event():
+    assert not supports_batch_scan(yara.compile(source=STRING_RULES), None)
+
+
+def assert_rescan_matches_per_event(old, new):
+    old_rules, rules = yara.compile(source=old), yara.compile(source=new)
+    snapshot = [(i, text, ",".join(sorted(m.rule for m in old_rules.match(data=text)))) for i, text in enumerate(texts())]
+    results = rescan(snapshot, old, new, rules)
+    for event_id, text, yara_rule in snapshot:
+        tagged = set(rule_names(yara_rule))
+        if event_id in results:
+            full, fields = results[event_id]
+            found = set(rule_names(fields["yara_rule"] if fields else ""))
+            tagged = found if full else tagged | found
+        assert sorted(tagged) == sorted(m.rule for m in rules.match(data=text))
+    return results
+
+
+def test_rescan_matches_per_event():
+    assert_rescan_matches_per_event('rule enc { strings: $a = "-enc" condition: $a }', STRING_RULES)
+
+
+PUBLIC_OVER_PRIVATE = """
+private rule shell { strings: $a = "%s" condition: $a }
+rule shell_user { strings: $a = "user" condition: $a and shell }
+"""
+
+
+def test_rescan_after_private_rule_edit():
+    results = assert_rescan_matches_per_event(PUBLIC_OVER_PRIVATE % "cmd.exe", PUBLIC_OVER_PRIVATE % "powershell")
+    assert results
+
+
+def test_rescan_after_referenced_rule_edit():
+    old = 'rule net { strings: $a = "net" condition: $a }\nrule net_user { strings: $a = "user" condition: $a and net }'
+    assert_rescan_matches_per_event(old, old.replace('"net"', '"temp"'))
+    wildcard = 'rule net_a { strings: $a = "net" condition: $a }\n%s\nrule both { condition: all of (net_*) }'
+    assert_rescan_matches_per_event(wildcard % "", wildcard % 'rule net_b { strings: $a = "whoami" condition: $a }')
+
+
+def test_rescan_after_global_rule_change():
+    base = 'rule whoami { strings: $a = "whoami" condition: $a }'
+    added = 'global rule short { strings: $a = "x" condition: not $a }\n' + base
+    results = assert_rescan_matches_per_event(base, added)
+    assert any(full and fields is None for full, fields in results.values())
+    assert_rescan_matches_per_event(added, added.replace('"x"', '"abc"'))